@@ -1,59 +1,202 @@
 import streamlit as st
 import os
 import tempfile
-import json
-import pandas as pd
-from crew import run_job_analysis_crew
-import markdown
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.units import inch
-import io
-import re
-
-
-# Function to clean and parse the LLM JSON output
-def clean_and_parse_json(crew_result: str):
-    """
-    Cleans up potential markdown fences and extraneous characters,
-    then finds and parses the first complete JSON object.
-    """
-    cleaned_result = crew_result.strip()
+from crew import JOB_ANALYSIS_STAGES, run_job_analysis_crew
+from job_queue import DONE, FAILED, QueueFullError, get_job_queue
+from resources import warm_up
+from facets import list_facets
+from llm import requires_api_key
+from tracing import start_metrics_server
+# Heavy modules (crewAI and the agents, the encoder, pandas, reportlab) are imported on first
+# use or by the background warm-up, not here: this module is on the path to the first page render.
 
-    # 1. Handle Markdown fences (e.g., ```json\n{...}\n```)
-    if cleaned_result.startswith('```'):
-        start = cleaned_result.find('\n')
-        end = cleaned_result.rfind('```')
+# How often the page polls a running analysis for progress
+PROGRESS_POLL_SECONDS = float(os.getenv("PROGRESS_POLL_SECONDS", "2"))
 
-        if start != -1 and end != -1 and end > start:
-            cleaned_result = cleaned_result[start+1:end].strip()
-        else:
-            cleaned_result = cleaned_result.strip('`').strip('json').strip()
+STAGE_LABELS = {
+    "read_pdf_task": "Reading the PDF",
+    "summarize_text_task": "Summarizing the resume",
+    "job_searcher_task": "Searching matching jobs",
+    "resume_drafting_task": "Drafting the enhanced resume",
+}
 
-    # 2. Aggressively find and isolate the first JSON object
-    try:
-        start_index = cleaned_result.index('{')
-        end_index = cleaned_result.rindex('}') + 1
 
-        if start_index != -1 and end_index > start_index:
-            json_content = cleaned_result[start_index:end_index].strip()
-            return json.loads(json_content)
-        else:
-            raise ValueError("Could not find a valid start '{' and end '}' for JSON.")
+@st.cache_resource(show_spinner=False)
+def start_resource_warm_up():
+    """Builds the crew and loads the embedding model and job index once per server process, off the script thread."""
+    return warm_up(background=True)
 
-    except ValueError:
-        return json.loads(cleaned_result) # Fallback attempt
+
+def analyze_resume(pdf_bytes: bytes, progress):
+    """
+    Runs the crew on an uploaded PDF; executed on a job queue worker thread.
+
+    Args:
+        pdf_bytes (bytes): Contents of the uploaded file.
+        progress (callable): Called with each task's name as it finishes.
+    """
+    temp_file_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+            tmp_file.write(pdf_bytes)
+            temp_file_path = tmp_file.name
+        result = run_job_analysis_crew(temp_file_path, task_callback=lambda output: progress(output.name))
+        if not isinstance(result, str) and result.enhanced_resume_markdown:
+            from pdf_render import render_pdf
+            # Lay the PDF out here, off the script thread; the results page then gets it from the render cache
+            try:
+                render_pdf(result.enhanced_resume_markdown)
+            except Exception:
+                pass  # the page renders it again and shows the error
+        return result
+    finally:
+        # Crucial: Delete the temporary file
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+
+
+@st.fragment(run_every=PROGRESS_POLL_SECONDS)
+def show_job_progress(job_id: str):
+    """Polls a queued/running analysis; reruns the whole page once it has finished."""
+    job = get_job_queue().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
+
+    if job.queue_position is not None:
+        st.info(f"'{job.label}' is queued for analysis (position {job.queue_position} in line)...")
+    elif job.current_stage is None:
+        st.info(f"'{job.label}' is starting...")
+    else:
+        st.info(f"Analyzing '{job.label}': {STAGE_LABELS.get(job.current_stage, job.current_stage)}...")
+    st.progress(job.progress, text=f"{len(job.completed_stages)} of {len(job.stages)} steps complete")
+    for stage in job.stages:
+        mark = "✅" if stage in job.completed_stages else ("⏳" if stage == job.current_stage else "▫️")
+        st.markdown(f"{mark} {STAGE_LABELS.get(stage, stage)}")
+
+
+def show_analysis_job(job_id: str):
+    """Renders the session's analysis: progress while it runs, the results once it is done."""
+    results = st.session_state.setdefault("analysis_results", {})
+    if job_id not in results:
+        job = get_job_queue().get(job_id)
+        if job is None:
+            st.warning("This analysis is no longer available; please start it again.")
+            del st.session_state["analysis_job_id"]
+            return
+        if job.status == FAILED:
+            st.error("The analysis failed.")
+            st.code(job.error, language="text")
+            return
+        if job.status != DONE:
+            show_job_progress(job_id)
+            return
+        # Keep the result in the session so it survives reruns after the queue forgets the job
+        results[job_id] = job.result
+
+    render_analysis(results[job_id])
+
+
+def job_table(jobs: list):
+    """The recommended jobs (JobListing) as the rows shown in the app, in a pandas DataFrame."""
+    import pandas as pd
+
+    rows = []
+    for job in jobs:
+        metadata = job.model_dump()
+        rows.append({
+            "Job Title - Company": " - ".join(part for part in (metadata.get("job_title"), metadata.get("company")) if part),
+            "Location": metadata.get("job_location", ""),
+            "Similarity Score": f"{job.similarity_score:.4f}",
+            "Summary": metadata.get("job_summary", ""),
+            "Skills": metadata.get("job_skills", ""),
+            "Link": metadata.get("job_link", ""),
+        })
+    return pd.DataFrame(rows)
+
+
+def render_analysis(crew_result):
+    """Shows the job recommendations and the enhanced resume from a finished analysis (a JobAnalysisResult)."""
+    st.subheader("✅ Analysis and Enhancement Complete")
+
+    if isinstance(crew_result, str):  # "API Key Error"
+        st.error("Analysis failed. Please ensure the GEMINI_API_KEY is correctly set in your environment.")
+        return
+
+    final_resume_markdown = crew_result.enhanced_resume_markdown
+
+    st.markdown("## 🔎 Recommended Jobs from DB")
+    if crew_result.jobs:
+        st.dataframe(job_table(crew_result.jobs), use_container_width=True, column_config={
+            "Job Title - Company": st.column_config.TextColumn("Title & Company"),
+            "Similarity Score": st.column_config.TextColumn("Match Score"),
+            "Link": st.column_config.LinkColumn("Link", display_text="Apply Link")
+        })
+    else:
+        st.warning("No job recommendations were found.")
+
+    st.markdown("---")
+
+    # --- 2. Display Enhanced Resume and Download Option ---
+    st.markdown("## ✨ Your Enhanced Resume Draft")
+
+    if final_resume_markdown:
+        # Display the Markdown
+        st.markdown(final_resume_markdown)
+
+        # --- NEW PDF GENERATION & DOWNLOAD LOGIC ---
+        from pdf_render import render_pdf
+        try:
+            # Rendered when the analysis finished, so reruns are a cache lookup
+            pdf_bytes = render_pdf(final_resume_markdown)
+
+            # 3. Create the download button
+            st.download_button(
+                label="⬇️ Download Enhanced Resume as PDF",
+                data=pdf_bytes,
+                file_name="enhanced_resume_draft.pdf",
+                mime="application/pdf",
+                help="Click to download your new, ATS-optimized resume draft."
+            )
+            st.success("PDF created successfully!")
+
+        except (IOError, ValueError) as e:
+            st.error(f"PDF Conversion Failed. Error: {e}")
+            st.code(final_resume_markdown, language="markdown")
+        # --- End of NEW PDF LOGIC ---
+
+        st.warning(
+            "🚨 **Important User Warning:** This is an AI-generated draft. "
+            "**You must review and verify all content** (dates, titles, skills) before using it. "
+            "Ensure the enhancements align with your professional experience and ethical standards."
+        )
+    else:
+        st.error("The Enhancement Agent returned an empty or unreadable draft.")
 
 
 def main():
     st.set_page_config(page_title="Resume Enhancer & Recommender 🚀", layout="wide")
+
+    # Optional eager warm-up so the first analysis doesn't pay the imports and model load (WARM_UP_ON_START=0 disables)
+    if os.getenv("WARM_UP_ON_START", "1") == "1":
+        start_resource_warm_up()
+    # Prometheus metrics on METRICS_PORT (no-op when unset; started once per server process)
+    start_metrics_server()
+
     st.title("🚀 ATS Resume Enhancer & Job Recommender powered by CrewAI and Gemini")
     st.markdown("Upload your resume (PDF) to get an immediate, structured analysis, **job recommendations**, and an **ATS-friendly enhanced resume draft**.")
 
+    # Job index overview from the precomputed facet index (no collection scan)
+    index_facets = list_facets()
+    if index_facets:
+        with st.sidebar.expander("📊 Jobs in the index", expanded=False):
+            for field, label in [("search_country", "Country"), ("job_level", "Level"), ("job_type", "Type")]:
+                values = index_facets.get(field, {})
+                if values:
+                    st.markdown(f"**{label}**: " + ", ".join(f"{value} ({count})" for value, count in values.items()))
+
     # ... (API Key check remains the same) ...
 
-    if "GEMINI_API_KEY" not in os.environ:
+    if requires_api_key() and "GEMINI_API_KEY" not in os.environ:
         st.warning("⚠️ **Warning:** GEMINI_API_KEY environment variable is not set. The application will not be able to execute the LLM calls.")
         st.markdown("To run this, ensure your GEMINI_API_KEY is set in your environment.")
 
@@ -65,153 +208,22 @@ def main():
 
     if uploaded_file is not None:
         if st.button("Start Analysis and Enhancement", type="primary"):
-
-            temp_file_path = None
+            # Hand the analysis to the background queue; the page only polls for progress
             try:
-                # 1. Create temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    temp_file_path = tmp_file.name
-
-                st.info(f"File '{uploaded_file.name}' temporarily saved for processing...")
-
-                # 2. Run the Crew
-                with st.spinner("Analyzing resume, searching jobs, and drafting enhanced resume (This might take a moment)..."):
-                    crew_result = run_job_analysis_crew(temp_file_path)
-
-                st.subheader("✅ Analysis and Enhancement Complete")
-
-                if crew_result.strip() == "API Key Error":
-                    st.error("Analysis failed. Please ensure the GEMINI_API_KEY is correctly set in your environment.")
-                    return
-
-                # 3. Attempt to parse the aggregated JSON result
-                try:
-                    aggregated_output = clean_and_parse_json(crew_result)
-                    job_recommendations_json = aggregated_output.get("jobs", {})
-                    final_resume_markdown = aggregated_output.get("enhanced_resume_markdown", "")
-
-                    # --- 1. Display Job Recommendations (omitted for brevity, keep your existing code) ---
-                    # ... (Your code to display job recommendations goes here) ...
-
-                    st.markdown("## 🔎 Recommended Jobs from DB")
-                    # Placeholder for your job display logic
-                    if job_recommendations_json:
-                        jobs_list = list(job_recommendations_json.values())
-                        df = pd.DataFrame(jobs_list)
-                        if "Similarity Score" in df.columns:
-                            df["Similarity Score"] = df["Similarity Score"].astype(float).map('{:.4f}'.format)
-                        display_cols = ["Job Title - Company", "Location", "Similarity Score", "Summary", "Skills", "Link"]
-                        st.dataframe(df[[col for col in display_cols if col in df.columns]], use_container_width=True, column_config={
-                            "Job Title - Company": st.column_config.TextColumn("Title & Company"),
-                            "Similarity Score": st.column_config.TextColumn("Match Score"),
-                            "Link": st.column_config.LinkColumn("Link", display_text="Apply Link")
-                        })
-                    else:
-                        st.warning("No job recommendations were found.")
-
-                    st.markdown("---")
-
-
-                    # --- 2. Display Enhanced Resume and Download Option ---
-                    st.markdown("## ✨ Your Enhanced Resume Draft")
-
-                    if final_resume_markdown:
-
-                        # Display the Markdown
-                        st.markdown(final_resume_markdown)
-
-                        # --- NEW PDF GENERATION & DOWNLOAD LOGIC ---
-                        try:
-                            # Convert markdown to HTML
-                            html_content = markdown.markdown(final_resume_markdown)
-
-                            # Clean up bad HTML (ReportLab can't handle <ul>, <li> directly)
-                            html_content = re.sub(r'<ul>', '', html_content)
-                            html_content = re.sub(r'</ul>', '', html_content)
-                            html_content = re.sub(r'<li>', '• ', html_content)
-                            html_content = re.sub(r'</li>', '<br/>', html_content)
-
-                            # Set up PDF buffer
-                            pdf_io = io.BytesIO()
-                            doc = SimpleDocTemplate(pdf_io, pagesize=letter,
-                                                    leftMargin=0.8*inch, rightMargin=0.8*inch,
-                                                    topMargin=0.8*inch, bottomMargin=0.8*inch)
-
-                            # Define styles
-                            styles = getSampleStyleSheet()
-                            styles.add(ParagraphStyle(name='Heading', fontSize=13, leading=16, spaceAfter=8, spaceBefore=8, bold=True))
-                            styles.add(ParagraphStyle(name='Body', fontSize=11, leading=14, spaceAfter=6))
-                            styles.add(ParagraphStyle(name='SmallGap', fontSize=8, spaceAfter=4))
-
-                            # Split the HTML content into paragraphs
-                            parts = re.split(r'(<h\d>|<p>|<br\s*/?>)', html_content)
-                            elements = []
-
-                            for part in parts:
-                                part = part.strip()
-                                if not part:
-                                    continue
-
-                                # Headings
-                                if re.search(r'<h\d>', part):
-                                    text = re.sub(r'<.*?>', '', part)
-                                    elements.append(Paragraph(f"<b>{text}</b>", styles['Heading']))
-
-                                # Normal paragraphs
-                                else:
-                                    text = re.sub(r'<.*?>', '', part)
-                                    if text.strip():
-                                        elements.append(Paragraph(text, styles['Body']))
-
-                                # Add small spacing
-                                elements.append(Spacer(1, 4))
-
-                            # Build PDF
-                            doc.build(elements)
-                            pdf_io.seek(0)
-                            pdf_bytes = pdf_io.getvalue()
-
-                            # 3. Create the download button
-                            st.download_button(
-                                label="⬇️ Download Enhanced Resume as PDF",
-                                data=pdf_bytes,
-                                file_name="enhanced_resume_draft.pdf",
-                                mime="application/pdf",
-                                help="Click to download your new, ATS-optimized resume draft."
-                            )
-                            st.success("PDF created successfully!")
-
-                        except IOError as e:
-                            st.error(f"PDF Conversion Failed. Error: {e}")
-                            st.code(final_resume_markdown, language="markdown")
-
-                        # --- End of NEW PDF LOGIC ---
-
-                        st.warning(
-                            "🚨 **Important User Warning:** This is an AI-generated draft. "
-                            "**You must review and verify all content** (dates, titles, skills) before using it. "
-                            "Ensure the enhancements align with your professional experience and ethical standards."
-                        )
-                    else:
-                        st.error("The Enhancement Agent returned an empty or unreadable draft.")
-
-                except json.JSONDecodeError as e:
-                    st.error(f"The model returned a non-JSON formatted output or an error occurred during parsing: {e}")
-                    st.code(crew_result, language="json")
-                except Exception as e:
-                    st.error(f"An unexpected error occurred during result processing: {e}")
-                    st.code(crew_result, language="text")
-
-            finally:
-                # 4. Crucial: Delete the temporary file
-                if temp_file_path and os.path.exists(temp_file_path):
-                    os.remove(temp_file_path)
-                    st.success(f"File '{uploaded_file.name}' analysis complete and temporary file deleted.")
-
+                st.session_state["analysis_job_id"] = get_job_queue().submit(
+                    analyze_resume,
+                    uploaded_file.getvalue(),
+                    label=uploaded_file.name,
+                    stages=JOB_ANALYSIS_STAGES,
+                )
+            except QueueFullError as e:
+                st.error(str(e))
     else:
         st.info("Awaiting PDF resume upload. Your data will be processed and deleted immediately.")
 
+    if "analysis_job_id" in st.session_state:
+        show_analysis_job(st.session_state["analysis_job_id"])
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,121 @@
+"""
+Matches many resumes against the job index at once.
+
+    python batch_match.py resumes/ extra_resume.pdf --out matches.jsonl
+    python batch_match.py resumes/ --no-llm          # pure retrieval, no Gemini calls
+
+Resumes are extracted on the PDF process pool, encoded in large batches and
+sent to Chroma as one multi-query per batch. One JSON line per resume is
+streamed out as soon as its batch is done. Without --no-llm each resume is
+first summarized by the summarizer agent, and the summary is searched like the
+job searcher tool does (same query text and derived filters, see
+retrieval.search_resumes).
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_extract import extract_texts
+from retrieval import search_resumes
+
+
+def collect_pdfs(inputs: list) -> list:
+    """Expands directories into the PDFs they contain (sorted) and keeps explicit files as given."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "**", "*.pdf"), recursive=True)))
+        else:
+            paths.append(item)
+    return paths
+
+
+def summarize_resume(resume_text: str) -> str:
+    """Runs the summarizer agent on one resume text (one Gemini call)."""
+    from crewai import Task
+    from agents import build_summarize_agent
+    from tasks import build_summarize_text_task
+
+    # A fresh agent per call: summaries run concurrently (llm_concurrency)
+    agent = build_summarize_agent()
+    template = build_summarize_text_task(agent)
+    task = Task(
+        description=template.description + "\n\nResume text:\n" + resume_text,
+        expected_output=template.expected_output,
+        agent=agent,
+    )
+    return task.execute_sync().raw
+
+
+def match_resumes(pdf_paths: list, top_k: int = 5, use_llm: bool = True, batch_size: int = 64,
+                  llm_concurrency: int = 4):
+    """
+    Yields one result dict per resume, in input order, batch by batch.
+
+    Args:
+        pdf_paths (list): Resume PDFs to match.
+        top_k (int): Jobs returned per resume.
+        use_llm (bool): Summarize each resume with the LLM before searching.
+        batch_size (int): Resumes extracted, encoded and queried together.
+        llm_concurrency (int): Concurrent summarization calls when `use_llm` is set.
+    """
+    def _summarize(text):
+        try:
+            return summarize_resume(text)
+        except Exception as e:  # fall back to the raw text for this resume
+            return e
+
+    with ThreadPoolExecutor(max_workers=llm_concurrency) as llm_pool:
+        for start in range(0, len(pdf_paths), batch_size):
+            batch = list(extract_texts(pdf_paths[start:start + batch_size]))
+            ok = [i for i, (_, text) in enumerate(batch) if not isinstance(text, Exception)]
+
+            summaries = {}
+            if use_llm and ok:
+                summaries = dict(zip(ok, llm_pool.map(_summarize, [batch[i][1] for i in ok])))
+
+            queries = [summaries[i] if isinstance(summaries.get(i), str) else batch[i][1] for i in ok]
+            matches = dict(zip(ok, search_resumes(queries, top_k=top_k)))
+
+            for i, (path, text) in enumerate(batch):
+                if isinstance(text, Exception):
+                    yield {"resume": path, "error": str(text)}
+                    continue
+                result = {"resume": path, "jobs": matches[i]["jobs"]}
+                if matches[i]["filters"]:
+                    result["filters"] = matches[i]["filters"]
+                if isinstance(summaries.get(i), str):
+                    result["summary"] = summaries[i]
+                elif i in summaries:
+                    result["summary_error"] = str(summaries[i])
+                yield result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match a batch of resume PDFs against the job index.")
+    parser.add_argument("inputs", nargs="+", help="Resume PDFs and/or directories containing them")
+    parser.add_argument("--out", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--no-llm", action="store_true", help="Skip the Gemini summarization and query with the raw text")
+    parser.add_argument("--llm-concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    pdf_paths = collect_pdfs(args.inputs)
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        for result in match_resumes(pdf_paths, top_k=args.top_k, use_llm=not args.no_llm,
+                                    batch_size=args.batch_size, llm_concurrency=args.llm_concurrency):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
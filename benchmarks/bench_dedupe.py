@@ -0,0 +1,114 @@
+"""
+Near-duplicate clustering benchmark (dedupe.py) on generated postings.
+
+    python benchmarks/bench_dedupe.py --docs 200000 --repost-rate 0.3
+
+Generates --docs postings, a --repost-rate share of which are reposts of an
+earlier posting with a few words changed (a city, a date, a reworded
+sentence), and clusters them chunk by chunk as ingest.py does. Reports
+signature and assignment throughput, peak memory, the size of the SQLite band
+index, and how well the clusters match the generated ones: the share of
+reposts put in their original's cluster (recall) and the share of distinct
+postings merged into another one (false merges).
+
+Results are printed as JSON (and written to --out when given).
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import git_commit  # noqa: E402
+from dedupe import DEDUP_THRESHOLD, MinHasher, NearDuplicateIndex  # noqa: E402
+
+
+def generate_postings(rng, count: int, repost_rate: float, length: int, edits: int, vocab: int):
+    """Texts and, per posting, the index of the original it reposts (itself for originals)."""
+    texts, origins = [], []
+    for i in range(count):
+        if i and rng.random() < repost_rate:
+            origin = origins[int(rng.integers(0, i))]
+            words = texts[origin].split()
+            for position in rng.integers(0, len(words), size=edits):
+                words[position] = f"w{rng.integers(0, vocab)}"
+            texts.append(" ".join(words))
+        else:
+            origin = i
+            # Zipf-distributed words, so unrelated postings still share common terms
+            ids = np.minimum(rng.zipf(1.2, size=length), vocab) - 1
+            texts.append(" ".join(f"w{w}" for w in ids))
+        origins.append(origin)
+    return texts, origins
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--repost-rate", type=float, default=0.3, help="Share of postings that repost an earlier one")
+    parser.add_argument("--length", type=int, default=120, help="Words per posting (title + summary)")
+    parser.add_argument("--edits", type=int, default=2, help="Words changed in a repost")
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    texts, origins = generate_postings(rng, args.docs, args.repost_rate, args.length, args.edits, args.vocab)
+    ids = [f"doc{i}" for i in range(args.docs)]
+    hasher = MinHasher()
+    workdir = tempfile.mkdtemp(prefix="bench_dedupe_")
+    try:
+        path = os.path.join(workdir, "dedupe.sqlite")
+        index = NearDuplicateIndex(path, threshold=args.threshold)
+        signature_seconds = assign_seconds = 0.0
+        clusters = []
+        for start in range(0, args.docs, args.chunk_size):
+            started = time.perf_counter()
+            signatures = hasher.signatures(texts[start:start + args.chunk_size])
+            signature_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            clusters += index.assign(ids[start:start + args.chunk_size], signatures)
+            assign_seconds += time.perf_counter() - started
+        cluster_count = index.cluster_count()
+        index.close()
+        index_bytes = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    reposts = [i for i, origin in enumerate(origins) if origin != i]
+    originals = [i for i, origin in enumerate(origins) if origin == i]
+    found = sum(clusters[i] == clusters[origins[i]] for i in reposts)
+    merged = sum(clusters[i] != ids[i] for i in originals)
+
+    report = {
+        "meta": {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args)},
+        "postings": args.docs,
+        "generated_clusters": len(originals),
+        "clusters": cluster_count,
+        "repost_recall": round(found / len(reposts), 4) if reposts else 1.0,
+        "false_merge_rate": round(merged / len(originals), 4),
+        "signatures_per_second": round(args.docs / signature_seconds, 1),
+        "assignments_per_second": round(args.docs / assign_seconds, 1),
+        "index_bytes_per_posting": round(index_bytes / args.docs, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Embedding backend benchmark (embeddings.py) on the local fixtures.
+
+    python benchmarks/bench_embeddings.py --data-dir data/fixtures
+    python benchmarks/bench_embeddings.py --backends torch torch-int8 --threads 4 --out embeddings.json
+
+Encodes the job texts built from --data-dir (as ingest.py builds them, the set
+repeated --repeat times for stable timings) and resume-style queries derived
+from the same postings with the current model, i.e. the stock
+SentenceTransformer.encode in float32, and then with each of --backends. For
+each backend it reports load time, bulk throughput on the job texts, single
+query latency, the cosine similarity of its vectors to the current model's
+(mean and worst case) and the overlap of each query's top --top-k jobs with
+the current model's ranking. The query embedding cache is timed separately
+(miss vs hit). ONNX backends are skipped when onnx/onnxruntime are missing.
+
+Results are printed as JSON (and written to --out when given).
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hybrid import percentiles  # noqa: E402
+from bench_pipeline import git_commit  # noqa: E402
+import embeddings  # noqa: E402
+from disk_cache import DiskCache  # noqa: E402
+from ingest import build_embedding_text, iter_job_chunks  # noqa: E402
+from resources import EMBEDDING_MODEL_NAME  # noqa: E402
+
+
+def fixture_texts(data_dir: str) -> tuple:
+    """Job embedding texts of every posting, and one resume-style query per posting."""
+    rows = [row for chunk in iter_job_chunks(data_dir, chunk_size=10000) for row in chunk]
+    if not rows:
+        raise SystemExit(f"No joined job rows in {data_dir}")
+    jobs = [build_embedding_text(row) for row in rows]
+    queries = [f"role: {row['job_title']} skills: {row['job_skills']} location: {row['job_location']}"
+               for row in rows]
+    return jobs, queries
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.sum(a * b, axis=1) / np.where(norms == 0, 1.0, norms)
+
+
+def top_k_overlap(query_vectors: np.ndarray, job_vectors: np.ndarray, reference: tuple, k: int) -> float:
+    def normalized(vectors):
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def ranking(queries, jobs):
+        return np.argsort(-(normalized(queries) @ normalized(jobs).T), axis=1)[:, :k]
+
+    found, truth = ranking(query_vectors, job_vectors), ranking(*reference)
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def time_bulk(encode, texts: list, rounds: int) -> float:
+    """Best texts/second over `rounds` passes."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        encode(texts)
+        best = min(best, time.perf_counter() - started)
+    return len(texts) / best
+
+
+def time_queries(encode, queries: list) -> dict:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        encode([query])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return percentiles(latencies)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data", "fixtures"))
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--backends", nargs="*", default=list(embeddings.BACKENDS))
+    parser.add_argument("--threads", type=int, help="Intra-op threads (default: EMBEDDING_THREADS)")
+    parser.add_argument("--repeat", type=int, default=20, help="Copies of the job texts in the bulk pass")
+    parser.add_argument("--rounds", type=int, default=3, help="Bulk passes per backend; the fastest counts")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    embeddings.set_thread_count(args.threads or embeddings.thread_count())
+    jobs, queries = fixture_texts(args.data_dir)
+    bulk = jobs * args.repeat
+
+    from sentence_transformers import SentenceTransformer
+
+    started = time.perf_counter()
+    stock = SentenceTransformer(args.model)
+    stock_load = time.perf_counter() - started
+    stock.encode(queries[:1])  # first call allocates
+    reference = (np.asarray(stock.encode(queries), dtype=np.float32), np.asarray(stock.encode(jobs), dtype=np.float32))
+    results = [{
+        "backend": "current (SentenceTransformer.encode)",
+        "load_seconds": round(stock_load, 3),
+        "texts_per_second": round(time_bulk(stock.encode, bulk, args.rounds), 1),
+        "query_latency": time_queries(stock.encode, queries),
+    }]
+
+    loaded = {}
+    for name in args.backends:
+        started = time.perf_counter()
+        try:
+            backend = embeddings.load_embedding_backend(args.model, name)
+        except ImportError as e:
+            results.append({"backend": name, "skipped": str(e)})
+            continue
+        load_seconds = time.perf_counter() - started
+        backend.encode(queries[:1])
+        query_vectors, job_vectors = backend.encode(queries), backend.encode(jobs)
+        cosines = np.concatenate([cosine_rows(query_vectors, reference[0]), cosine_rows(job_vectors, reference[1])])
+        results.append({
+            "backend": name,
+            "load_seconds": round(load_seconds, 3),
+            "texts_per_second": round(time_bulk(backend.encode, bulk, args.rounds), 1),
+            "query_latency": time_queries(backend.encode, queries),
+            "cosine_to_current": {"mean": round(float(cosines.mean()), 6), "min": round(float(cosines.min()), 6)},
+            f"top_{args.top_k}_overlap": round(top_k_overlap(query_vectors, job_vectors, reference, args.top_k), 4),
+        })
+        loaded[name] = backend
+
+    cache_report = {}
+    if loaded:
+        backend = next(iter(loaded.values()))
+        workdir = tempfile.mkdtemp(prefix="bench_embeddings_")
+        try:
+            cache = DiskCache(os.path.join(workdir, "query_embeddings.sqlite"))
+
+            def cached(texts):
+                return embeddings.encode_queries(backend, texts, cache=cache, use_cache=True)
+
+            cache_report = {"backend": backend.name, "miss": time_queries(cached, queries),
+                            "hit": time_queries(cached, queries)}
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args),
+                 "threads": embeddings.thread_count()},
+        "model": args.model,
+        "job_texts": len(jobs),
+        "bulk_texts": len(bulk),
+        "queries": len(queries),
+        "backends": results,
+        "query_cache": cache_report,
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Load test of the execution limits (execution.py, job_queue.py) against a local fake LLM endpoint.
+
+    python benchmarks/bench_execution.py --analyses 40 --server-max-requests 60 --window-seconds 10
+    python benchmarks/bench_execution.py --client-rpm 0          # no client-side limiter, for comparison
+
+Starts benchmarks/fake_llm_endpoint.py with a provider-style quota of
+--server-max-requests requests per --window-seconds, and submits --analyses
+synthetic analyses to a JobQueue at once. Each analysis holds an "embedding"
+CPU stage slot for --cpu-ms and then makes --calls-per-analysis LLM calls
+through build_llm() (CachedLLM over crewAI's OpenAI provider, response cache
+off), so every call goes through the shared rate limiter and the 429 retries.
+
+Reports how many submissions the bounded queue rejected and the queue
+positions it handed out, completed and failed analyses, the 429s the endpoint
+sent, client retries, and per-analysis latency. The client limiter defaults to
+90% of the server quota (--client-rpm, in requests per minute), with bursts of
+a tenth of a window.
+
+Results are printed as JSON (and written to --out when given).
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_hybrid import percentiles  # noqa: E402
+from bench_pipeline import git_commit  # noqa: E402
+from fake_llm_endpoint import FakeLLMEndpoint  # noqa: E402
+
+
+def burn_cpu(ms: float):
+    deadline = time.perf_counter() + ms / 1000
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+
+
+def counter_total(metrics_text: str, name: str) -> float:
+    """Sum of a counter over its label sets, from render_metrics() output."""
+    total = 0.0
+    for line in metrics_text.splitlines():
+        if line.startswith(name) and line[len(name):len(name) + 1] in ("{", " "):
+            total += float(line.rsplit(" ", 1)[1])
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyses", type=int, default=40, help="Analyses submitted at once")
+    parser.add_argument("--calls-per-analysis", type=int, default=5)
+    parser.add_argument("--cpu-ms", type=float, default=50, help="CPU work per analysis in the embedding stage")
+    parser.add_argument("--workers", type=int, default=8, help="JobQueue workers")
+    parser.add_argument("--max-pending", type=int, default=32, help="JobQueue bound; the rest is rejected")
+    parser.add_argument("--server-max-requests", type=int, default=60, help="Fake endpoint quota per window")
+    parser.add_argument("--window-seconds", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=100, help="Fake endpoint response time")
+    parser.add_argument("--client-rpm", type=float, help="Client limiter in requests/minute (0 disables)")
+    parser.add_argument("--max-attempts", type=int, default=5, help="LLM_MAX_ATTEMPTS")
+    parser.add_argument("--retry-base-seconds", type=float, default=0.5, help="LLM_RETRY_BASE_SECONDS")
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    server_rpm = args.server_max_requests * 60 / args.window_seconds
+    client_rpm = 0.9 * server_rpm if args.client_rpm is None else args.client_rpm
+    endpoint = FakeLLMEndpoint(max_requests=args.server_max_requests, window_seconds=args.window_seconds,
+                               latency_ms=args.latency_ms).start()
+    # Must be set before the project modules are imported: they read their settings at import time
+    os.environ.update({
+        "LLM_BACKEND": "gemini",
+        "LLM_MODEL": "openai/fake-model",
+        "LLM_BASE_URL": endpoint.url,
+        "OPENAI_API_KEY": "fake",
+        "LLM_CACHE": "0",
+        "LLM_MAX_ATTEMPTS": str(args.max_attempts),
+        "LLM_RETRY_BASE_SECONDS": str(args.retry_base_seconds),
+    })
+    import execution
+    import tracing
+    from job_queue import DONE, JobQueue, QueueFullError
+    from llm import build_llm
+
+    # The endpoint counts requests in a sliding window, so the burst plus the refill over one
+    # window has to stay within its quota: bursts of a tenth of a window at 90% of the rate
+    execution.set_llm_limiter(execution.RateLimiter(requests_per_minute=client_rpm, tokens_per_minute=0,
+                                                    burst_seconds=args.window_seconds / 10))
+    llm = build_llm()
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def analysis(index: int, submitted: float, progress):
+        with execution.cpu_stage("embedding"):
+            burn_cpu(args.cpu_ms)
+        progress("embedding")
+        for call in range(args.calls_per_analysis):
+            llm.call([{"role": "user", "content": f"Analysis {index}, step {call}: summarize the resume."}])
+            progress(f"llm_{call}")
+        with latencies_lock:
+            latencies.append((time.perf_counter() - submitted) * 1000)
+
+    queue = JobQueue(max_workers=args.workers, max_pending=args.max_pending)
+    job_ids, rejected, positions = [], 0, []
+    started = time.perf_counter()
+    # crewAI prints an error panel for every 429; keep stdout for the JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        for index in range(args.analyses):
+            try:
+                job_id = queue.submit(analysis, index, time.perf_counter(), label=f"analysis {index}")
+            except QueueFullError:
+                rejected += 1
+                continue
+            job_ids.append(job_id)
+            position = queue.get(job_id).queue_position
+            if position is not None:
+                positions.append(position)
+        while any(not queue.get(job_id).finished for job_id in job_ids):
+            time.sleep(0.05)
+    wall = time.perf_counter() - started
+    queue.shutdown()
+    endpoint.stop()
+
+    jobs = [queue.get(job_id) for job_id in job_ids]
+    metrics = tracing.render_metrics()
+    report = {
+        "meta": {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args)},
+        "server_requests_per_minute": round(server_rpm, 1),
+        "client_requests_per_minute": round(client_rpm, 1),
+        "submitted": args.analyses,
+        "rejected": rejected,
+        "max_queue_position": max(positions, default=0),
+        "completed": sum(job.status == DONE for job in jobs),
+        "failed": sum(job.status != DONE for job in jobs),
+        "wall_seconds": round(wall, 3),
+        "endpoint": endpoint.stats(),
+        "client_retries": counter_total(metrics, "job_analysis_llm_retries_total"),
+        "analysis_latency": percentiles(latencies) if latencies else {},
+    }
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
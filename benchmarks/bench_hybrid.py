@@ -0,0 +1,146 @@
+"""
+Hybrid (BM25 + vector) retrieval benchmark.
+
+    # BM25 scoring latency on a synthetic index of N postings
+    python benchmarks/bench_hybrid.py synthetic --docs 1000000
+
+    # latency and top-k overlap of vector-only vs hybrid search on a built index
+    CHROMA_PATH=chroma_db python benchmarks/bench_hybrid.py compare --queries queries.txt
+
+Results are printed as JSON (and written to --out when given).
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexical_index import LexicalIndex, LexicalIndexBuilder  # noqa: E402
+
+
+def percentiles(samples_ms: list) -> dict:
+    values = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def synthetic_texts(rng, count: int, vocab_size: int, length: int):
+    # Zipf-distributed term ids give realistic posting-list lengths (a few huge, most tiny)
+    ids = np.minimum(rng.zipf(1.3, size=(count, length)), vocab_size) - 1
+    return [" ".join(f"t{i}" for i in row) for row in ids]
+
+
+def run_synthetic(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    workdir = tempfile.mkdtemp(prefix="bench_lexical_")
+    try:
+        path = os.path.join(workdir, "lexical")
+        builder = LexicalIndexBuilder(path)
+        started = time.perf_counter()
+        chunk = 50000
+        for index, start in enumerate(range(0, args.docs, chunk)):
+            count = min(chunk, args.docs - start)
+            builder.add_chunk(index, [f"doc{start + i}" for i in range(count)],
+                              synthetic_texts(rng, count, args.vocab, args.doc_length))
+        builder.finish()
+        build_seconds = time.perf_counter() - started
+
+        index = LexicalIndex(path)
+        queries = synthetic_texts(rng, args.queries, args.vocab, args.query_length)
+        index.search(queries[0])  # touch the memory maps once
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, top_n=50)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        index_bytes = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+        return {
+            "mode": "synthetic",
+            "documents": args.docs,
+            "postings": index.meta["postings"],
+            "index_mb": round(index_bytes / 1024 / 1024, 1),
+            "build_seconds": round(build_seconds, 1),
+            "lexical_query": percentiles(latencies),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def default_queries() -> list:
+    import pandas as pd
+    skills = pd.read_csv(os.path.join(os.path.dirname(__file__), "..", "data", "fixtures", "job_skills.csv"))
+    return [f"experienced professional skilled in {s}" for s in skills["job_skills"]]
+
+
+def run_compare(args) -> dict:
+    from retrieval import search_jobs
+
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = default_queries()
+
+    search_jobs(queries[:1], top_k=args.top_k, hybrid=True)  # load model, collection and index
+
+    results, latencies = {}, {}
+    for mode, hybrid in (("vector", False), ("hybrid", True)):
+        latencies[mode], results[mode] = [], []
+        for query in queries:
+            started = time.perf_counter()
+            jobs = search_jobs([query], top_k=args.top_k, hybrid=hybrid)[0]
+            latencies[mode].append((time.perf_counter() - started) * 1000)
+            results[mode].append([job.get("job_link") for job in jobs])
+
+    overlap = [len(set(v) & set(h)) / args.top_k for v, h in zip(results["vector"], results["hybrid"])]
+    return {
+        "mode": "compare",
+        "queries": len(queries),
+        "top_k": args.top_k,
+        "vector_only": percentiles(latencies["vector"]),
+        "hybrid": percentiles(latencies["hybrid"]),
+        "mean_overlap_at_k": round(float(np.mean(overlap)), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synthetic = sub.add_parser("synthetic", help="BM25 latency on a generated index")
+    synthetic.add_argument("--docs", type=int, default=200000)
+    synthetic.add_argument("--vocab", type=int, default=200000)
+    synthetic.add_argument("--doc-length", type=int, default=80)
+    synthetic.add_argument("--queries", type=int, default=200)
+    synthetic.add_argument("--query-length", type=int, default=40)
+    synthetic.add_argument("--seed", type=int, default=0)
+
+    compare = sub.add_parser("compare", help="Vector-only vs hybrid on the index at CHROMA_PATH")
+    compare.add_argument("--queries", help="Text file with one query per line (default: fixture skills)")
+    compare.add_argument("--top-k", type=int, default=5)
+
+    for command in (synthetic, compare):
+        command.add_argument("--out", help="Also write the JSON results to this file")
+
+    args = parser.parse_args(argv)
+    report = run_synthetic(args) if args.command == "synthetic" else run_compare(args)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
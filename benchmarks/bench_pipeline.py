@@ -0,0 +1,279 @@
+"""
+End-to-end pipeline benchmark with a per-stage latency breakdown.
+
+    python benchmarks/bench_pipeline.py --resumes 8 --jobs 2000 --concurrency 1 2 4 --out bench.json
+    python benchmarks/bench_pipeline.py --out bench_new.json --baseline bench.json
+
+Runs fully offline. It generates a corpus of synthetic resume PDFs (1 to 8
+pages) and a job index of --jobs generated postings (built with ingest.py in
+a temporary directory), and uses the stub LLM (LLM_BACKEND=stub, with
+--llm-latency-ms standing in for the API round trip). The encoder named by
+EMBEDDING_MODEL_NAME must be available locally.
+
+Timed stages, per resume:
+
+- pdf_extract: PDFReaderTool on the resume
+- job_search: JobSearcherTool (embedding + index query) on the resume details
+- task:<name>: each crew task, as run by run_job_analysis_crew / the DAG scheduler
+- pdf_render: pdf_render.render_pdf on the enhanced resume (render cache bypassed)
+- end_to_end: all of the above for one resume
+
+Each concurrency level runs the corpus --rounds times on that many threads and
+reports p50/p95/p99 per stage plus throughput. The JSON results carry the git
+commit, so runs from two commits can be compared with --baseline.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_hybrid import percentiles  # noqa: E402
+
+ROLES = [
+    ("Data Scientist", ["Python", "SQL", "Machine Learning", "Statistics", "Pandas", "Scikit-learn"]),
+    ("Data Engineer", ["Python", "Spark", "Airflow", "SQL", "AWS", "Docker"]),
+    ("Software Engineer", ["Java", "JavaScript", "React", "Docker", "Kubernetes", "AWS"]),
+    ("Registered Nurse", ["Patient Care", "Communication", "Leadership", "Electronic Health Records"]),
+    ("Accountant", ["Accounting", "Excel", "Tableau", "Communication", "SQL"]),
+    ("Project Manager", ["Project Management", "Leadership", "Communication", "Excel", "Agile"]),
+]
+COMPANIES = ["Northwind", "Contoso", "Fabrikam", "Tailspin", "Litware", "Adventure Works", "Wide World"]
+LOCATIONS = [
+    ("Seattle", "Seattle, WA", "United States"), ("Austin", "Austin, TX", "United States"),
+    ("Toronto", "Toronto, ON", "Canada"), ("Sydney", "Sydney, NSW", "Australia"),
+    ("London", "London, England", "United Kingdom"),
+]
+PAGE_COUNTS = [1, 2, 4, 8]
+
+
+def make_resume_pdf(path: str, rng, pages: int) -> dict:
+    """Writes a synthetic resume of `pages` pages and returns the details it was built from."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer
+
+    role, skills = ROLES[rng.integers(len(ROLES))]
+    _, location, country = LOCATIONS[rng.integers(len(LOCATIONS))]
+    years = int(rng.integers(1, 15))
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph(f"Candidate {rng.integers(10000)}", styles["Title"]),
+        Paragraph(f"{role} | {location}, {country} | {years} years of experience", styles["Normal"]),
+        Paragraph("Skills: " + ", ".join(skills), styles["Normal"]),
+    ]
+    for page in range(pages):
+        if page:
+            story.append(PageBreak())
+        for job in range(4):
+            company = COMPANIES[rng.integers(len(COMPANIES))]
+            story.append(Paragraph(f"{role} at {company} ({2010 + page + job})", styles["Heading3"]))
+            for _ in range(5):
+                picked = ", ".join(rng.choice(skills, size=2, replace=False))
+                story.append(Paragraph(f"Delivered projects using {picked}, improving team outcomes "
+                                       f"by {rng.integers(5, 60)}% across {rng.integers(2, 20)} releases.",
+                                       styles["Normal"]))
+            story.append(Spacer(1, 6))
+    SimpleDocTemplate(path, pagesize=letter).build(story)
+    return {"role": role, "skills": skills, "experience": f"{years} years",
+            "last_location": f"{location}, {country}"}
+
+
+def make_job_csvs(data_dir: str, rng, count: int):
+    """Writes the three LinkedIn CSVs ingest.py reads, with `count` generated postings."""
+    import pandas as pd
+
+    from ingest import POSTINGS_FILE, SKILLS_FILE, SUMMARY_FILE
+
+    postings, skills, summaries = [], [], []
+    for i in range(count):
+        title, role_skills = ROLES[rng.integers(len(ROLES))]
+        city, location, country = LOCATIONS[rng.integers(len(LOCATIONS))]
+        company = COMPANIES[rng.integers(len(COMPANIES))]
+        link = f"https://www.linkedin.com/jobs/view/bench-{i}"
+        postings.append({
+            "job_link": link, "last_processed_time": "2024-01-21", "got_summary": "t", "got_ner": "t",
+            "is_being_worked": "f", "job_title": title, "company": company, "job_location": location,
+            "first_seen": "2024-01-15", "search_city": city, "search_country": country,
+            "search_position": title, "job_level": ["Associate", "Mid senior"][i % 2],
+            "job_type": ["Onsite", "Hybrid", "Remote"][i % 3],
+        })
+        picked = list(rng.choice(role_skills, size=min(4, len(role_skills)), replace=False))
+        skills.append({"job_link": link, "job_skills": ", ".join(picked)})
+        summaries.append({"job_link": link, "job_summary": f"{company} is hiring a {title} in {location}. "
+                                                           f"You will work with {', '.join(picked)}."})
+    pd.DataFrame(postings).to_csv(os.path.join(data_dir, POSTINGS_FILE), index=False)
+    pd.DataFrame(skills).to_csv(os.path.join(data_dir, SKILLS_FILE), index=False)
+    pd.DataFrame(summaries).to_csv(os.path.join(data_dir, SUMMARY_FILE), index=False)
+
+
+def run_pipeline(resume: dict, process: str) -> dict:
+    """Runs every stage for one resume; returns {stage: seconds}."""
+    from crew import assemble_job_analysis, run_job_analysis_crew, run_job_analysis_dag
+    from pdf_render import render_pdf
+    from tools import job_searcher_tool, pdf_reader_tool
+
+    timings = {}
+    started = time.perf_counter()
+
+    stage_started = time.perf_counter()
+    pdf_reader_tool._run(resume["path"])
+    timings["pdf_extract"] = time.perf_counter() - stage_started
+
+    stage_started = time.perf_counter()
+    job_searcher_tool._run(json.dumps(resume["details"]))
+    timings["job_search"] = time.perf_counter() - stage_started
+
+    if process == "dag":
+        dag = run_job_analysis_dag(resume["path"])
+        result = assemble_job_analysis(dag.outputs)
+        for stage in dag.timings():
+            timings[f"task:{stage['stage']}"] = stage["duration"]
+    else:
+        # Sequential tasks: each one runs from the previous task's end to its own callback
+        marks = [time.perf_counter()]
+
+        def _on_task(output):
+            timings[f"task:{output.name}"] = time.perf_counter() - marks[-1]
+            marks.append(time.perf_counter())
+
+        result = run_job_analysis_crew(resume["path"], process="sequential", use_cache=False,
+                                       task_callback=_on_task)
+
+    stage_started = time.perf_counter()
+    render_pdf(result.enhanced_resume_markdown or "# Empty", use_cache=False)
+    timings["pdf_render"] = time.perf_counter() - stage_started
+
+    timings["end_to_end"] = time.perf_counter() - started
+    return timings
+
+
+def run_level(resumes: list, concurrency: int, rounds: int, process: str) -> dict:
+    work = [resume for _ in range(rounds) for resume in resumes]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(lambda resume: run_pipeline(resume, process), work))
+    wall = time.perf_counter() - started
+
+    stages = {}
+    for run in runs:
+        for stage, seconds in run.items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+    return {
+        "concurrency": concurrency,
+        "resumes": len(work),
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(len(work) / wall, 3) if wall else 0.0,
+        "stages": {stage: percentiles(samples) for stage, samples in sorted(stages.items())},
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """p50/p95 change per stage and concurrency level against a previous run."""
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    rows = []
+    for level in report["levels"]:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+        for stage, current in level["stages"].items():
+            old = before["stages"].get(stage)
+            if not old:
+                continue
+            rows.append({
+                "concurrency": level["concurrency"], "stage": stage,
+                "p50_change_pct": round(100 * (current["p50_ms"] - old["p50_ms"]) / (old["p50_ms"] or 1e-9), 1),
+                "p95_change_pct": round(100 * (current["p95_ms"] - old["p95_ms"]) / (old["p95_ms"] or 1e-9), 1),
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, default=8, help="Synthetic resume PDFs in the corpus")
+    parser.add_argument("--jobs", type=int, default=2000, help="Generated postings in the job index")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rounds", type=int, default=1, help="Passes over the corpus per concurrency level")
+    parser.add_argument("--process", choices=["sequential", "dag"], default="sequential")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency of each LLM call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    parser.add_argument("--baseline", help="Earlier --out file to compare against")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    # Must be set before the project modules are imported: they read their settings at import time
+    os.environ.update({
+        "LLM_BACKEND": "stub",
+        "STUB_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "CHROMA_PATH": os.path.join(workdir, "chroma"),
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+        "RESULT_CACHE": "0",
+        "WARM_UP_ON_START": "0",
+    })
+    rng = np.random.default_rng(args.seed)
+    try:
+        # Agent and ingest progress output goes to stderr so stdout stays valid JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            from ingest import ingest
+
+            data_dir = os.path.join(workdir, "data")
+            os.makedirs(data_dir)
+            make_job_csvs(data_dir, rng, args.jobs)
+            ingest(data_dir, os.environ["CHROMA_PATH"], chunk_size=1000)
+
+            resumes = []
+            for i in range(args.resumes):
+                path = os.path.join(workdir, f"resume_{i}.pdf")
+                pages = PAGE_COUNTS[i % len(PAGE_COUNTS)]
+                resumes.append({"path": path, "pages": pages, "details": make_resume_pdf(path, rng, pages)})
+
+            run_pipeline(resumes[0], args.process)  # warm up: encoder, index, imports
+            levels = [run_level(resumes, c, args.rounds, args.process) for c in args.concurrency]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "levels": levels,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["comparison"] = {"baseline_commit": baseline.get("meta", {}).get("commit", ""),
+                                "stages": compare(report, baseline)}
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
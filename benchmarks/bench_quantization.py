@@ -0,0 +1,147 @@
+"""
+int8 quantization benchmark for the flat embedding store.
+
+    # generated, clustered 384-dim vectors
+    python benchmarks/bench_quantization.py synthetic --docs 200000
+
+    # a store built with `ingest.py --flat-store float16 --quantize int8`
+    CHROMA_PATH=chroma_db python benchmarks/bench_quantization.py store
+
+For each setting it reports bytes per vector, query latency, and recall@k
+against exact float32 search (against the store's own float rows in `store`
+mode). The int8 settings vary how many candidates per result are rescored in
+float (rescore x1 is the int8 ranking alone). Results are printed as JSON (and
+written to --out when given).
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_hybrid import percentiles  # noqa: E402
+from flat_store import FlatIndex, FlatStoreBuilder, _normalize, store_dir  # noqa: E402
+
+RESCORE_FACTORS = [1, 2, 4, 8]
+
+
+def clustered_vectors(rng, count: int, dim: int, clusters: int) -> np.ndarray:
+    # Job embeddings bunch around a few thousand topics; uniform noise would make recall look better
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=count)] + 0.35 * rng.normal(size=(count, dim)).astype(np.float32)
+    return _normalize(vectors)
+
+
+def build_store(path: str, vectors: np.ndarray, dtype: str, chunk: int = 50000):
+    builder = FlatStoreBuilder(path, dtype=dtype, quantize="int8")
+    for index, start in enumerate(range(0, len(vectors), chunk)):
+        rows = vectors[start:start + chunk]
+        builder.add_chunk(index, [f"doc{start + i}" for i in range(len(rows))], rows, [{}] * len(rows))
+    builder.finish()
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def measure(index: FlatIndex, queries: np.ndarray, k: int, **search_args):
+    latencies, rows = [], []
+    for query in queries:
+        started = time.perf_counter()
+        found, _ = index.search(query, k, **search_args)
+        latencies.append((time.perf_counter() - started) * 1000)
+        rows.append(found[0])
+    return np.array(rows), percentiles(latencies)
+
+
+def evaluate(indexes: dict, queries: np.ndarray, k: int) -> list:
+    """`indexes` maps a float dtype name to a store of that dtype (all with int8 codes)."""
+    reference = indexes.get("float32") or next(iter(indexes.values()))
+    truth, latency = measure(reference, queries, k, use_int8=False)
+    report = [{"setting": f"{reference.embeddings.dtype.name} exact",
+               "bytes_per_vector": reference.bytes_per_vector()["float"],
+               "recall_at_k": 1.0, **latency}]
+
+    for name, index in indexes.items():
+        if index is reference:
+            continue
+        found, latency = measure(index, queries, k, use_int8=False)
+        report.append({"setting": f"{name} exact", "bytes_per_vector": index.bytes_per_vector()["float"],
+                       "recall_at_k": round(recall_at_k(found, truth), 4), **latency})
+
+    for factor in RESCORE_FACTORS:
+        found, latency = measure(reference, queries, k, use_int8=True, rescore_factor=factor)
+        report.append({"setting": f"int8 scan, rescore x{factor}",
+                       "bytes_per_vector": reference.bytes_per_vector()["scan"],
+                       "recall_at_k": round(recall_at_k(found, truth), 4), **latency})
+    return report
+
+
+def run_synthetic(args) -> dict:
+    rng = np.random.default_rng(args.seed)
+    vectors = clustered_vectors(rng, args.docs, args.dim, args.clusters)
+    picks = rng.integers(0, args.docs, size=args.queries)
+    queries = _normalize(vectors[picks] + 0.2 * rng.normal(size=(args.queries, args.dim)).astype(np.float32))
+
+    workdir = tempfile.mkdtemp(prefix="bench_quant_")
+    try:
+        indexes = {}
+        for dtype in ("float32", "float16"):
+            path = os.path.join(workdir, dtype)
+            build_store(path, vectors, dtype)
+            indexes[dtype] = FlatIndex(path)
+        return {"mode": "synthetic", "documents": args.docs, "dim": args.dim, "top_k": args.top_k,
+                "results": evaluate(indexes, queries, args.top_k)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_store(args) -> dict:
+    import resources
+
+    index = FlatIndex(store_dir(args.chroma_path or resources.CHROMA_PATH))
+    if index.codes is None:
+        raise SystemExit("The flat store has no int8 codes; rebuild it with --quantize int8.")
+    rng = np.random.default_rng(args.seed)
+    picks = rng.integers(0, index.count(), size=args.queries)
+    sample = np.asarray(index.embeddings[np.sort(picks)], dtype=np.float32)
+    queries = _normalize(sample + 0.2 * rng.normal(size=sample.shape).astype(np.float32))
+    return {"mode": "store", "documents": index.count(), "dim": int(index.embeddings.shape[1]),
+            "top_k": args.top_k, "results": evaluate({index.embeddings.dtype.name: index}, queries, args.top_k)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synthetic = sub.add_parser("synthetic", help="Recall and latency on generated vectors")
+    synthetic.add_argument("--docs", type=int, default=200000)
+    synthetic.add_argument("--dim", type=int, default=384)
+    synthetic.add_argument("--clusters", type=int, default=2000)
+
+    store = sub.add_parser("store", help="Recall and latency on the flat store under CHROMA_PATH")
+    store.add_argument("--chroma-path")
+
+    for command in (synthetic, store):
+        command.add_argument("--queries", type=int, default=200)
+        command.add_argument("--top-k", type=int, default=10)
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--out", help="Also write the JSON results to this file")
+
+    args = parser.parse_args(argv)
+    report = run_synthetic(args) if args.command == "synthetic" else run_store(args)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
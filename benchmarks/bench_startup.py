@@ -0,0 +1,148 @@
+"""
+Startup import-time profile of the app.
+
+    python benchmarks/bench_startup.py                      # profile `import app`
+    python benchmarks/bench_startup.py --budget-ms 1500     # fail (exit 1) when startup exceeds the budget
+    python benchmarks/bench_startup.py --out startup.json
+    python benchmarks/bench_startup.py --baseline startup.json
+
+Imports --module in fresh interpreters under `python -X importtime` (--runs
+times, keeping each module's fastest run) and reports the total, the import
+time per top-level package and the slowest individual modules.
+
+It also checks that none of the --forbid packages (crewAI, torch, chromadb,
+the encoder, pandas, PyPDF2, reportlab by default) is imported on the way to
+the first page render: those are loaded on first use or by the background
+warm-up (resources.warm_up). A forbidden import or a total over --budget-ms
+makes the command exit with status 1, so it can gate CI.
+
+Results are printed as JSON (and written to --out when given).
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pipeline import git_commit  # noqa: E402
+
+DEFAULT_FORBIDDEN = ["crewai", "torch", "chromadb", "sentence_transformers", "pandas", "PyPDF2", "reportlab"]
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def profile_imports(module: str) -> dict:
+    """
+    Imports `module` in a new interpreter under -X importtime.
+
+    Returns:
+        dict: Module name -> {"self_ms", "cumulative_ms", "depth"}, for every module imported.
+
+    Raises:
+        RuntimeError: When the import fails.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = {"self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000,
+                             "depth": len(indent) // 2}
+    return modules
+
+
+def fastest(runs: list) -> dict:
+    """Per module, the run with the smallest cumulative time (the least disturbed by noise)."""
+    best = {}
+    for modules in runs:
+        for name, timing in modules.items():
+            if name not in best or timing["cumulative_ms"] < best[name]["cumulative_ms"]:
+                best[name] = timing
+    return best
+
+
+def by_package(modules: dict) -> dict:
+    """Self time summed per top-level package, slowest first."""
+    totals = {}
+    for name, timing in modules.items():
+        package = name.split(".", 1)[0]
+        totals[package] = totals.get(package, 0.0) + timing["self_ms"]
+    return {package: round(ms, 2) for package, ms in sorted(totals.items(), key=lambda item: -item[1])}
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Total and per-package change against a previous run (packages that moved by 5 ms or more)."""
+    before = baseline.get("packages", {})
+    packages = {}
+    for package, ms in report["packages"].items():
+        change = ms - before.get(package, 0.0)
+        if abs(change) >= 5:
+            packages[package] = round(change, 2)
+    for package, ms in before.items():
+        if package not in report["packages"] and ms >= 5:
+            packages[package] = round(-ms, 2)
+    return {
+        "baseline_commit": baseline.get("meta", {}).get("commit", ""),
+        "total_change_ms": round(report["total_ms"] - baseline.get("total_ms", 0.0), 2),
+        "packages_change_ms": dict(sorted(packages.items(), key=lambda item: -abs(item[1]))),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module whose import is profiled")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to profile; the fastest run counts")
+    parser.add_argument("--top", type=int, default=25, help="Slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail when the total import time exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="Packages that must not be imported at startup")
+    parser.add_argument("--out", help="Write the JSON results to this file")
+    parser.add_argument("--baseline", help="Earlier --out file to compare against")
+    args = parser.parse_args(argv)
+
+    modules = fastest([profile_imports(args.module) for _ in range(max(1, args.runs))])
+    total_ms = modules[args.module]["cumulative_ms"]
+    slowest = sorted(modules.items(), key=lambda item: -item[1]["self_ms"])[:args.top]
+    imported_packages = {name.split(".", 1)[0] for name in modules}
+    forbidden = sorted(package for package in args.forbid if package in imported_packages)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "module": args.module,
+        "total_ms": round(total_ms, 2),
+        "modules_imported": len(modules),
+        "packages": by_package(modules),
+        "slowest_modules": [{"module": name, "self_ms": round(timing["self_ms"], 2),
+                             "cumulative_ms": round(timing["cumulative_ms"], 2)} for name, timing in slowest],
+        "forbidden_imports": forbidden,
+        "within_budget": args.budget_ms is None or total_ms <= args.budget_ms,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0 if report["within_budget"] and not forbidden else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Local fake of an OpenAI-compatible chat completions endpoint, with a provider-style quota.
+
+    python benchmarks/fake_llm_endpoint.py --port 8765 --max-requests 60 --latency-ms 300
+
+    LLM_MODEL=openai/fake-model LLM_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake streamlit run app.py
+
+Lets the LLM rate limiting and retries (execution.py) be exercised without a
+provider account. Past --max-requests requests or --max-tokens tokens within
+a sliding --window-seconds window it answers 429 with a Retry-After header, as
+a provider does when a quota is exhausted; --throttle-rate fails that fraction
+of the remaining requests with 429 at random. Every other request is answered
+after --latency-ms with a final answer quoting the start of the prompt, and
+with its token usage (about four characters per token).
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _content_text(content) -> str:
+    if isinstance(content, list):  # multimodal parts
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content or "")
+
+
+class FakeLLMEndpoint:
+    """The fake server; `start()` runs it on a daemon thread, `stats()` reports what it saw."""
+
+    def __init__(self, port: int = 0, max_requests: int = 0, max_tokens: int = 0, window_seconds: float = 60,
+                 latency_ms: float = 0, throttle_rate: float = 0, seed: int = 0):
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.window_seconds = window_seconds
+        self.latency_ms = latency_ms
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._window = deque()  # (timestamp, tokens) of the requests served in the current window
+        self._stats = {"requests": 0, "served": 0, "throttled": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-llm-endpoint", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _admit(self, tokens: int):
+        """None when the request may be served, else the Retry-After seconds of its 429."""
+        now = time.monotonic()
+        with self._lock:
+            self._stats["requests"] += 1
+            while self._window and self._window[0][0] <= now - self.window_seconds:
+                self._window.popleft()
+            over_requests = self.max_requests and len(self._window) >= self.max_requests
+            over_tokens = self.max_tokens and sum(t for _, t in self._window) + tokens > self.max_tokens
+            if over_requests or over_tokens:
+                self._stats["throttled"] += 1
+                oldest = self._window[0][0] if self._window else now
+                return max(1, math.ceil(oldest + self.window_seconds - now))
+            if self.throttle_rate and self._rng.random() < self.throttle_rate:
+                self._stats["throttled"] += 1
+                return 1
+            self._window.append((now, tokens))
+            self._stats["served"] += 1
+            return None
+
+    def _handler(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                messages = body.get("messages", [])
+                prompt = " ".join(_content_text(message.get("content")) for message in messages)
+                prompt_tokens = len(prompt) // 4 + 1
+
+                retry_after = endpoint._admit(prompt_tokens)
+                if retry_after is not None:
+                    self._send(429, {"error": {"message": "Rate limit exceeded; please retry later.",
+                                               "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                               {"Retry-After": str(retry_after)})
+                    return
+
+                if endpoint.latency_ms:
+                    time.sleep(endpoint.latency_ms / 1000)
+                last = _content_text(messages[-1].get("content")) if messages else ""
+                answer = f"Thought: I now know the final answer\nFinal Answer: {' '.join(last.split()[:12])}"
+                completion_tokens = len(answer) // 4 + 1
+                with endpoint._lock:
+                    endpoint._stats["prompt_tokens"] += prompt_tokens
+                    endpoint._stats["completion_tokens"] += completion_tokens
+                self._send(200, {
+                    "id": f"chatcmpl-fake-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake-model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+
+            def _send(self, status: int, payload: dict, headers: dict = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-requests", type=int, default=0, help="Requests served per window (0 = unlimited)")
+    parser.add_argument("--max-tokens", type=int, default=0, help="Prompt tokens served per window (0 = unlimited)")
+    parser.add_argument("--window-seconds", type=float, default=60)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0, help="Fraction of requests failed with 429 at random")
+    args = parser.parse_args(argv)
+
+    endpoint = FakeLLMEndpoint(port=args.port, max_requests=args.max_requests, max_tokens=args.max_tokens,
+                               window_seconds=args.window_seconds, latency_ms=args.latency_ms,
+                               throttle_rate=args.throttle_rate).start()
+    print(f"Serving on {endpoint.url} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(endpoint.stats()), file=sys.stderr)
+    except KeyboardInterrupt:
+        endpoint.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
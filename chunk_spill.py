@@ -0,0 +1,48 @@
+"""Staging directory for the on-disk indexes that ingest.py builds chunk by chunk."""
+import os
+import shutil
+
+
+class ChunkSpill:
+    """
+    Per-chunk spill files under `<path>.building`, swapped in for `path` by `commit`.
+
+    A chunk redone after a resumed ingestion overwrites its own spill.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.build_dir = path + ".building"
+        self.spill_dir = os.path.join(self.build_dir, "spill")
+        if not resume and os.path.exists(self.build_dir):
+            shutil.rmtree(self.build_dir)
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+    def chunk_path(self, chunk_index: int) -> str:
+        """Spill path of a chunk, without an extension."""
+        return os.path.join(self.spill_dir, f"chunk_{chunk_index:08d}")
+
+    def chunks(self) -> list:
+        """Spill paths of the chunks written so far (those with a .npz file), in chunk order."""
+        return [os.path.join(self.spill_dir, name[:-4])
+                for name in sorted(os.listdir(self.spill_dir)) if name.endswith(".npz")]
+
+    def output(self, name: str) -> str:
+        return os.path.join(self.build_dir, name)
+
+    def commit(self):
+        """Removes the spills and replaces the live directory with the finished build."""
+        shutil.rmtree(self.spill_dir)
+        swap_directory(self.build_dir, self.path)
+
+
+def swap_directory(new_dir: str, live_dir: str):
+    """Replaces `live_dir` with `new_dir`. Open memory maps of the old files stay valid."""
+    old_dir = live_dir + ".old"
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    if os.path.exists(live_dir):
+        os.rename(live_dir, old_dir)
+    os.rename(new_dir, live_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
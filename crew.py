@@ -1,33 +1,220 @@
+import json
 import os
-from crewai import Crew, Process
-from agents import reader_agent, summarize_agent, job_searcher_agent, resume_formatter_agent
-from tasks import read_pdf_task, summarize_text_task, job_searcher_task, resume_drafting_task, aggregation_task
+from dataclasses import dataclass
+from pydantic import ValidationError
+from schemas import EnhancedResume, JobAnalysisResult, JobSearchResults, task_output_as
+from disk_cache import CACHE_DIR, DiskCache, content_hash
+from resources import jobs_index_version, registry
+from llm import requires_api_key
+from tracing import record_result_size, span
 
+# "sequential" runs the tasks one after another through crewAI; "dag" runs independent
+# tasks (job search and resume drafting) concurrently, see scheduler.py.
+CREW_PROCESS = os.getenv("CREW_PROCESS", "sequential")
+CREW_MAX_PARALLEL = int(os.getenv("CREW_MAX_PARALLEL", "2"))
 
-def run_job_analysis_crew(pdf_path: str):
+# Whole-analysis result cache (repeat uploads of the same PDF skip the LLM pipeline)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1") == "1"
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+
+# Stage names reported to task callbacks (TaskOutput.name), in pipeline order. Spelled out
+# so that importing this module doesn't import crewAI or build the agents; see job_analysis_pipeline().
+JOB_ANALYSIS_STAGES = ["read_pdf_task", "summarize_text_task", "job_searcher_task", "resume_drafting_task"]
+
+
+def crew_config_fingerprint(tasks: list) -> str:
+    """Hash of everything about the tasks and their agents that shapes the crew's output."""
+    parts = []
+    for task in tasks:
+        agent = task.agent
+        parts += [
+            task.name, task.description, task.expected_output,
+            [dep.name for dep in task.context] if isinstance(task.context, list) else "",
+            [(tool.name, tool.result_as_answer) for tool in task.tools or []],
+            json.dumps(task.output_pydantic.model_json_schema()) if task.output_pydantic else "",
+            agent.role, agent.goal, agent.backstory,
+            getattr(agent.llm, "model", ""), getattr(agent.llm, "temperature", ""),
+        ]
+    return content_hash(*parts)
+
+
+@dataclass(frozen=True)
+class JobAnalysisPipeline:
+    """Builds fresh tasks (and their agents) for each run; `config_fingerprint` identifies their configuration."""
+
+    build_tasks: object
+    config_fingerprint: str
+
+
+def _load_job_analysis_pipeline() -> JobAnalysisPipeline:
+    # crewAI, the tools and the LLM are imported here rather than at import time
+    from tasks import build_job_analysis_tasks
+
+    tasks = build_job_analysis_tasks()
+    if [task.name for task in tasks] != JOB_ANALYSIS_STAGES:
+        raise RuntimeError("JOB_ANALYSIS_STAGES is out of sync with the tasks in tasks.py")
+    return JobAnalysisPipeline(
+        build_tasks=build_job_analysis_tasks,
+        # Taken before kickoff interpolates the per-upload pdf_path into the descriptions.
+        config_fingerprint=crew_config_fingerprint(tasks),
+    )
+
+
+# Loaded once per process on first use, or ahead of time by resources.warm_up()
+registry.register("job_analysis_pipeline", _load_job_analysis_pipeline, warm_up=True)
+
+
+def job_analysis_pipeline() -> JobAnalysisPipeline:
+    return registry.get("job_analysis_pipeline")
+
+
+_result_cache = None
+
+
+def get_result_cache() -> DiskCache:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = DiskCache(
+            os.path.join(CACHE_DIR, "analysis_results.sqlite"),
+            ttl_seconds=RESULT_CACHE_TTL,
+            max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024),
+        )
+    return _result_cache
+
+
+def analysis_cache_key(pdf_path: str) -> str:
     """
-    Sets up and executes the multi-agent Crew for job analysis.
+    Content address of an analysis: the PDF bytes, the crew configuration and the
+    job index version. Rebuilding the index changes the key, so stale job
+    recommendations are never served.
+    """
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+    return content_hash(pdf_bytes, job_analysis_pipeline().config_fingerprint, jobs_index_version())
+
+
+def assemble_job_analysis(task_outputs: dict) -> JobAnalysisResult:
+    """
+    Builds the final result from the job search and drafting task outputs.
 
     Args:
-        pdf_path (str): The path to the uploaded PDF resume.
+        task_outputs (dict): Task name -> TaskOutput.
 
-    Returns:
-        str: The final JSON output from the summarizer agent, or "API Key Error".
+    Raises:
+        ValidationError: When the job search output isn't `JobSearchResults` JSON.
+    """
+    jobs = task_output_as(JobSearchResults, task_outputs["job_searcher_task"]).jobs
+    resume = task_output_as(EnhancedResume, task_outputs["resume_drafting_task"])
+    return JobAnalysisResult(jobs=jobs, enhanced_resume_markdown=resume.markdown)
+
+
+def build_job_analysis_crew(task_callback=None):
     """
+    Builds the job analysis crew from fresh agents and tasks.
 
-    # Check for API Key validity before running the costly LLM process
-    if not os.environ.get("GEMINI_API_KEY"):
-        return "API Key Error"  # Propagate error for app.py to handle
+    Each run gets its own agent and task objects, because kickoff writes the
+    interpolated descriptions and task outputs onto them; that lets several
+    analyses run at once (e.g. from the app's job queue).
 
-    # Define Crew
-    job_analysis_crew = Crew(
-        agents=[reader_agent, summarize_agent, job_searcher_agent, resume_formatter_agent],
-        tasks=[read_pdf_task, summarize_text_task, job_searcher_task, resume_drafting_task, aggregation_task],
+    Args:
+        task_callback (callable): Called with each TaskOutput as its task finishes.
+
+    Returns:
+        crewai.Crew: The crew, ready for kickoff.
+    """
+    from crewai import Crew, Process
+
+    tasks = job_analysis_pipeline().build_tasks()
+    if task_callback is not None:
+        for task in tasks:
+            task.callback = task_callback
+    return Crew(
+        agents=[task.agent for task in tasks],
+        tasks=tasks,
         process=Process.sequential,
+        task_callback=task_callback,
         # verbose=True,  # Set verbose to 2 for detailed output in the console/logs
     )
 
-    # Kickoff the crew, passing the PDF path as input for the first task's description.
-    crew_output = job_analysis_crew.kickoff(inputs={'pdf_path': pdf_path})
 
-    return str(crew_output)
\ No newline at end of file
+def run_job_analysis_crew(pdf_path: str, process: str = None, use_cache: bool = True, task_callback=None):
+    """
+    Sets up and executes the multi-agent Crew for job analysis.
+
+    Args:
+        pdf_path (str): The path to the uploaded PDF resume.
+        process (str): "sequential" or "dag"; defaults to the CREW_PROCESS setting.
+        use_cache (bool): Return a cached result for an identical PDF/config/index if there is one.
+        task_callback (callable): Called with each TaskOutput as its task finishes (not
+            called when the result comes from the cache).
+
+    Returns:
+        JobAnalysisResult: The recommended jobs and the enhanced resume Markdown, or the
+        string "API Key Error" when the Gemini key is missing.
+    """
+    process = process or CREW_PROCESS
+    # Root span of the analysis trace: tasks, tools and LLM calls nest under it (see tracing.py)
+    with span("crew.run_job_analysis", process=process) as current:
+        cache_key = None
+        if use_cache and RESULT_CACHE_ENABLED:
+            cache_key = analysis_cache_key(pdf_path)
+            cached_result = get_result_cache().get(cache_key)
+            current.set("result_cache_hit", cached_result is not None)
+            if cached_result is not None:
+                try:
+                    result = JobAnalysisResult.model_validate_json(cached_result)
+                    record_result_size(current, "crew", cached_result)
+                    return result
+                except ValidationError:
+                    pass  # written by an older result format; recompute
+
+        # Check for API Key validity before running the costly LLM process
+        if requires_api_key() and not os.environ.get("GEMINI_API_KEY"):
+            current.set("error", "missing API key")
+            return "API Key Error"  # Propagate error for app.py to handle
+
+        if process == "dag":
+            dag_result = run_job_analysis_dag(pdf_path, task_callback=task_callback)
+            task_outputs = dag_result.outputs
+            # Next to the task.* spans: when each stage started and ended, and what it waited for
+            current.set("stage_timings", dag_result.timings())
+        else:
+            # Define Crew
+            job_analysis_crew = build_job_analysis_crew(task_callback)
+
+            # Kickoff the crew, passing the PDF path as input for the first task's description.
+            crew_output = job_analysis_crew.kickoff(inputs={'pdf_path': pdf_path})
+            task_outputs = {output.name: output for output in crew_output.tasks_output}
+
+        # The result is assembled here rather than by another LLM turn
+        result = assemble_job_analysis(task_outputs)
+        serialized = result.model_dump_json()
+        # Only complete results are replayed; a run that drafted no resume is recomputed next time
+        if cache_key is not None and result.enhanced_resume_markdown.strip():
+            get_result_cache().put(cache_key, serialized)
+
+        record_result_size(current, "crew", serialized)
+        return result
+
+
+def run_job_analysis_dag(pdf_path: str, max_parallel: int = None, task_callback=None):
+    """
+    Runs the job analysis tasks as a dependency graph instead of a fixed sequence.
+
+    Args:
+        pdf_path (str): The path to the uploaded PDF resume.
+        max_parallel (int): Cap on concurrently running tasks; defaults to CREW_MAX_PARALLEL.
+        task_callback (callable): Called with each TaskOutput as its task finishes.
+
+    Returns:
+        DagResult: `outputs` maps each task name to its TaskOutput and `timings()`
+        lists the start/end timestamps of every stage.
+    """
+    from scheduler import run_tasks_as_dag
+
+    return run_tasks_as_dag(
+        build_job_analysis_crew(task_callback).tasks,
+        inputs={'pdf_path': pdf_path},
+        max_parallel=max_parallel or CREW_MAX_PARALLEL,
+    )
@@ -0,0 +1,162 @@
+"""
+Near-duplicate clustering of job postings with MinHash/LSH over title and summary.
+
+A posting's `cluster_id` is the document id of its cluster's first posting;
+retrieval keeps the best-ranked posting per cluster (`collapse_clusters`).
+"""
+import os
+import sqlite3
+import zlib
+
+import numpy as np
+
+from lexical_index import tokenize
+
+DEDUP_FILE = "dedupe.sqlite"
+DEDUP_FIELDS = ["job_title", "job_summary"]
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# 16 bands of 4 rows: pairs at Jaccard 0.8 share a band with probability > 0.999
+NUM_PERM = 64
+NUM_BANDS = 16
+SHINGLE_SIZE = 3
+MAX_CANDIDATES = 32
+SQLITE_CACHE_MB = 64
+
+_PRIME = (1 << 31) - 1
+_BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def dedupe_path(chroma_path: str) -> str:
+    return os.path.join(chroma_path, DEDUP_FILE)
+
+
+def dedupe_text(row: dict) -> str:
+    return " ".join(str(row.get(field) or "") for field in DEDUP_FIELDS)
+
+
+class MinHasher:
+    """MinHash signatures with NUM_PERM universal hash functions, identical in every process for a given seed."""
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.shingle_size = shingle_size
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, text: str) -> np.ndarray:
+        """CRC32 of every run of `shingle_size` tokens (stable across processes, unlike hash())."""
+        tokens = tokenize(text)
+        size = min(self.shingle_size, len(tokens)) or 1
+        shingles = {" ".join(tokens[i:i + size]) for i in range(max(1, len(tokens) - size + 1))}
+        return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingle_hashes(text) % np.uint64(_PRIME)
+        # (a * h + b) mod p stays below 2**63 since a, b and h are below 2**31
+        return ((np.outer(hashes, self.a) + self.b) % np.uint64(_PRIME)).min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts: list) -> np.ndarray:
+        """One signature row per text, as a (len(texts), num_perm) uint32 array."""
+        if not texts:
+            return np.zeros((0, len(self.a)), dtype=np.uint32)
+        return np.stack([self.signature(text) for text in texts])
+
+
+def band_keys(signatures: np.ndarray, bands: int = NUM_BANDS) -> np.ndarray:
+    """A 64-bit key per LSH band of each signature, as an (n, bands) int64 array."""
+    rows = signatures.reshape(len(signatures), bands, -1).astype(np.uint64)
+    keys = np.zeros(rows.shape[:2], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for r in range(rows.shape[2]):
+            keys = (keys ^ rows[:, :, r]) * _BAND_MULTIPLIER
+    return keys.view(np.int64)
+
+
+def estimated_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """Assigns postings to clusters, backed by SQLite; a posting assigned again joins its own cluster."""
+
+    def __init__(self, path: str, threshold: float = DEDUP_THRESHOLD, resume: bool = False):
+        self.path = path
+        self.threshold = threshold
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self._db = sqlite3.connect(path)
+        self._db.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_MB * 1024}")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS clusters "
+                         "(cluster INTEGER PRIMARY KEY, representative TEXT NOT NULL, signature BLOB NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, key INTEGER NOT NULL, "
+                         "cluster INTEGER NOT NULL, PRIMARY KEY (band, key)) WITHOUT ROWID")
+        self._db.commit()
+        self._candidates_sql = ("SELECT DISTINCT cluster FROM bands WHERE "
+                                + " OR ".join(["(band = ? AND key = ?)"] * NUM_BANDS)
+                                + f" LIMIT {MAX_CANDIDATES}")
+
+    def _best_cluster(self, signature: np.ndarray, keys: list):
+        params = [value for band, key in enumerate(keys) for value in (band, key)]
+        candidates = [row[0] for row in self._db.execute(self._candidates_sql, params)]
+        if not candidates:
+            return None
+        best, best_similarity = None, self.threshold
+        placeholders = ",".join("?" * len(candidates))
+        for cluster, representative, blob in self._db.execute(
+                f"SELECT cluster, representative, signature FROM clusters WHERE cluster IN ({placeholders})",
+                candidates):
+            similarity = estimated_jaccard(signature, np.frombuffer(blob, dtype=np.uint32))
+            if similarity >= best_similarity:
+                best, best_similarity = (cluster, representative), similarity
+        return best
+
+    def assign(self, ids: list, signatures: np.ndarray) -> list:
+        """
+        Clusters a chunk of postings, in order (so duplicates within the chunk are found too).
+
+        Args:
+            ids (list): Document ids of the postings.
+            signatures (np.ndarray): Their MinHash signatures (MinHasher.signatures).
+
+        Returns:
+            list: The cluster id (representative's document id) of each posting.
+        """
+        cluster_ids = []
+        for doc_id, signature, keys in zip(ids, signatures, band_keys(signatures).tolist()):
+            match = self._best_cluster(signature, keys)
+            if match is None:
+                cursor = self._db.execute("INSERT INTO clusters (representative, signature) VALUES (?, ?)",
+                                          (doc_id, signature.astype(np.uint32).tobytes()))
+                match = (cursor.lastrowid, doc_id)
+            # Members' bands too, so reposts that drifted a little still find the cluster
+            self._db.executemany("INSERT OR IGNORE INTO bands (band, key, cluster) VALUES (?, ?, ?)",
+                                 [(band, key, match[0]) for band, key in enumerate(keys)])
+            cluster_ids.append(match[1])
+        self._db.commit()
+        return cluster_ids
+
+    def cluster_count(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM clusters").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+def collapse_clusters(jobs: list, top_k: int) -> list:
+    """
+    Keeps the first (best-ranked) job of each near-duplicate cluster, up to `top_k` jobs.
+
+    Jobs without a `cluster_id` (an index built before deduplication) are all kept.
+    """
+    seen, kept = set(), []
+    for job in jobs:
+        cluster = job.get("cluster_id")
+        if cluster:
+            if cluster in seen:
+                continue
+            seen.add(cluster)
+        kept.append(job)
+        if len(kept) == top_k:
+            break
+    return kept
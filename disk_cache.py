@@ -0,0 +1,112 @@
+"""
+Small on-disk key/value cache backed by SQLite, with TTL and size-bounded LRU eviction.
+
+Safe to share between threads and processes: every operation opens its own
+short-lived connection and the database runs in WAL mode.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from tracing import record_cache
+
+CACHE_DIR = os.getenv("CACHE_DIR", "./.cache")
+
+
+def content_hash(*parts) -> str:
+    """SHA-256 over the given parts (bytes or str), length-prefixed so boundaries can't collide."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Persistent cache of text values.
+
+    Args:
+        path (str): SQLite file to store entries in (parent directory is created).
+        ttl_seconds (float): Entries older than this are treated as missing; None keeps them forever.
+        max_bytes (int): Least recently used entries are evicted once the total value size exceeds this.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = None, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]  # `cache` label of the hit/miss metric
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str):
+        """Returns the cached value for `key`, or None on a miss or an expired entry."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._expired(row[1], now):
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+
+        with self._counter_lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_cache(self.name, row is not None)
+        return None if row is None else row[0]
+
+    def put(self, key: str, value: str):
+        """Stores `value` under `key`, then evicts expired and least recently used entries."""
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,304 @@
+"""
+Sentence embedding backends for the job index and the resume queries.
+
+EMBEDDING_BACKEND picks how EMBEDDING_MODEL_NAME runs:
+
+- "torch" (default): the stock SentenceTransformer in float32.
+- "torch-int8": the same model on the CPU with its Linear layers dynamically
+  quantized to int8 (int8 weights, activations quantized on the fly). No extra
+  dependency.
+- "onnx" / "onnx-int8": the model exported once to ONNX (cached under
+  CACHE_DIR/embeddings) and run by onnxruntime with full graph optimizations,
+  optionally with int8 weights. Needs the optional `onnx` and `onnxruntime` packages.
+
+Every backend shares one front end: texts are tokenized once, sorted by token
+length and cut into batches of at most EMBEDDING_BATCH_SIZE texts and
+EMBEDDING_BATCH_TOKENS padded tokens, so short queries aren't padded to the
+longest job text. Intra-op threads are set explicitly (EMBEDDING_THREADS):
+ONNX sessions take them at load, torch takes them from `set_thread_count`,
+which the process entry points call. How closely the int8 backends agree with
+float32 depends on the checkpoint; measure it with benchmarks/bench_embeddings.py.
+
+`encode_queries` goes through a persistent LRU cache of query embeddings keyed
+on the model, the backend and the text hash.
+"""
+import abc
+import base64
+import os
+import re
+import warnings
+
+import numpy as np
+
+from disk_cache import CACHE_DIR, DiskCache, content_hash
+from execution import CPU_STAGE_LIMITS, cpu_stage
+from tracing import current_span
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Intra-op threads per process; 0 = CPUs / EMBEDDING_CONCURRENCY (encoder passes allowed at once)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "16384"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "1") == "1"
+EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64"))
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+MODEL_INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+ONNX_DIR = os.path.join(CACHE_DIR, "embeddings")
+ONNX_OPSET = 17
+
+_threads = None
+_query_cache = None
+
+
+def thread_count() -> int:
+    if _threads:
+        return _threads
+    if EMBEDDING_THREADS > 0:
+        return EMBEDDING_THREADS
+    return max(1, (os.cpu_count() or 1) // max(1, CPU_STAGE_LIMITS.get("embedding", 1)))
+
+
+def set_thread_count(threads: int):
+    """Sets the process's intra-op thread count (e.g. per ingestion worker): torch's now, ONNX sessions' at load."""
+    global _threads
+    _threads = max(1, threads)
+    import torch
+    torch.set_num_threads(_threads)
+
+
+class EmbeddingBackend(abc.ABC):
+    """
+    Tokenizes and batches texts by length; subclasses embed one padded batch (`_embed`).
+
+    Args:
+        model: The loaded SentenceTransformer (tokenizer, sequence length, dimension).
+        model_name (str): Its name or path, part of the query cache key.
+    """
+
+    name = ""
+
+    def __init__(self, model, model_name: str):
+        self.model_name = model_name
+        self.tokenizer = model.tokenizer
+        self.max_length = model.max_seq_length
+        # get_sentence_embedding_dimension was renamed in sentence-transformers 6
+        dimension = getattr(model, "get_embedding_dimension", None) or model.get_sentence_embedding_dimension
+        self.dimension = dimension()
+        self.pad_id = self.tokenizer.pad_token_id or 0
+        self.input_names = [name for name in MODEL_INPUTS if name in self.tokenizer.model_input_names]
+
+    def _pad(self, sequences: list) -> dict:
+        ids = np.full((len(sequences), max(map(len, sequences))), self.pad_id, dtype=np.int64)
+        mask = np.zeros_like(ids)
+        for row, sequence in enumerate(sequences):
+            ids[row, :len(sequence)] = sequence
+            mask[row, :len(sequence)] = 1
+        features = {"input_ids": ids, "attention_mask": mask, "token_type_ids": np.zeros_like(ids)}
+        return {name: features[name] for name in self.input_names}
+
+    def _batches(self, texts: list, batch_size: int, max_batch_tokens: int):
+        """(rows, padded features) per batch, longest texts first."""
+        token_ids = self.tokenizer(texts, truncation=True, max_length=self.max_length)["input_ids"]
+        order = sorted(range(len(texts)), key=lambda i: -len(token_ids[i]))
+        rows = []
+        for i in order:
+            # The first row of a batch is its longest, so it sets the padded width
+            if rows and (len(rows) == batch_size or (len(rows) + 1) * len(token_ids[rows[0]]) > max_batch_tokens):
+                yield rows, self._pad([token_ids[j] for j in rows])
+                rows = []
+            rows.append(i)
+        if rows:
+            yield rows, self._pad([token_ids[j] for j in rows])
+
+    def encode(self, texts: list, batch_size: int = EMBEDDING_BATCH_SIZE,
+               max_batch_tokens: int = EMBEDDING_BATCH_TOKENS) -> np.ndarray:
+        """
+        Embeds `texts` (same vectors as SentenceTransformer.encode, up to the backend's precision).
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dimension), in input order.
+        """
+        texts = [str(text) for text in texts]
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if texts:
+            for rows, features in self._batches(texts, batch_size, max_batch_tokens):
+                embeddings[rows] = self._embed(features)
+        return embeddings
+
+    @abc.abstractmethod
+    def _embed(self, features: dict) -> np.ndarray:
+        """Sentence embeddings of one padded batch, as a float32 (rows, dimension) array."""
+
+
+class TorchBackend(EmbeddingBackend):
+    """The SentenceTransformer itself, optionally with dynamically quantized int8 Linear layers."""
+
+    def __init__(self, model, model_name: str, quantize: bool = False):
+        import torch
+
+        super().__init__(model, model_name)
+        if quantize:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # torch.ao.quantization deprecation notices
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model.eval()
+        self.name = "torch-int8" if quantize else "torch"
+
+    def _embed(self, features: dict) -> np.ndarray:
+        import torch
+
+        with torch.inference_mode():
+            inputs = {name: torch.from_numpy(value).to(self.model.device) for name, value in features.items()}
+            return self.model(inputs)["sentence_embedding"].float().cpu().numpy()
+
+
+class OnnxBackend(EmbeddingBackend):
+    """The model exported to ONNX (see `export_onnx`) and run by onnxruntime on the CPU."""
+
+    def __init__(self, model, model_name: str, quantize: bool = False):
+        import onnxruntime as ort
+
+        super().__init__(model, model_name)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = thread_count()
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        path = export_onnx(model, model_name, self._pad, quantize=quantize)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.name = "onnx-int8" if quantize else "onnx"
+
+    def _embed(self, features: dict) -> np.ndarray:
+        return self.session.run(None, features)[0].astype(np.float32, copy=False)
+
+
+def onnx_path(model, model_name: str, quantize: bool = False) -> str:
+    """Where the export of `model_name` is cached (keyed on the model and its input settings)."""
+    import torch
+
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.basename(os.path.normpath(model_name)))
+    key = content_hash(os.path.abspath(model_name) if os.path.exists(model_name) else model_name,
+                       model.max_seq_length, ",".join(model.tokenizer.model_input_names), torch.__version__)
+    return os.path.join(ONNX_DIR, f"{stem}-{key[:16]}{'-int8' if quantize else ''}.onnx")
+
+
+def export_onnx(model, model_name: str, pad, quantize: bool = False) -> str:
+    """
+    Exports the whole SentenceTransformer pipeline (transformer, pooling, normalization)
+    to ONNX once, and with `quantize` an int8-weight copy of it.
+
+    Args:
+        model: The SentenceTransformer.
+        model_name (str): Its name or path (part of the file name and key).
+        pad (callable): Builds padded model inputs from token id lists (EmbeddingBackend._pad).
+
+    Returns:
+        str: Path of the .onnx file.
+    """
+    import torch
+
+    path = onnx_path(model, model_name, quantize)
+    if os.path.exists(path):
+        return path
+    os.makedirs(ONNX_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(export_onnx(model, model_name, pad), tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, path)
+        return path
+
+    input_names = [name for name in MODEL_INPUTS if name in model.tokenizer.model_input_names]
+
+    class SentenceEmbeddingGraph(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(dict(zip(input_names, inputs)))["sentence_embedding"]
+
+    example = pad(model.tokenizer(["an example sentence to trace", "short"])["input_ids"])
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["sentence_embedding"] = {0: "batch"}
+    with warnings.catch_warnings(), torch.inference_mode():
+        warnings.simplefilter("ignore")  # tracer warnings about data-dependent branches
+        torch.onnx.export(SentenceEmbeddingGraph().eval(), tuple(torch.from_numpy(example[name]) for name in input_names),
+                          tmp_path, input_names=input_names, output_names=["sentence_embedding"],
+                          dynamic_axes=dynamic_axes, opset_version=ONNX_OPSET, dynamo=False)
+    os.replace(tmp_path, path)  # concurrent exporters each write their own file; the last one wins
+    return path
+
+
+def load_embedding_backend(model_name: str, backend: str = EMBEDDING_BACKEND) -> EmbeddingBackend:
+    """
+    Loads `model_name` behind the requested backend.
+
+    Raises:
+        ValueError: For an unknown backend.
+        ImportError: When an ONNX backend is requested without `onnx`/`onnxruntime` installed.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    from sentence_transformers import SentenceTransformer
+
+    # The stock backend keeps SentenceTransformer's device choice; the others are CPU implementations
+    model = SentenceTransformer(model_name, device=None if backend == "torch" else "cpu")
+    if backend.startswith("onnx"):
+        try:
+            import onnx  # noqa: F401  (needed by the exporter)
+            import onnxruntime  # noqa: F401
+        except ImportError as e:
+            raise ImportError(f"EMBEDDING_BACKEND={backend} needs the onnx and onnxruntime packages "
+                              "(pip install onnx onnxruntime)") from e
+        return OnnxBackend(model, model_name, quantize=backend == "onnx-int8")
+    return TorchBackend(model, model_name, quantize=backend == "torch-int8")
+
+
+def get_query_embedding_cache() -> DiskCache:
+    global _query_cache
+    if _query_cache is None:
+        _query_cache = DiskCache(os.path.join(CACHE_DIR, "query_embeddings.sqlite"),
+                                 max_bytes=int(EMBEDDING_CACHE_MAX_MB * 1024 * 1024))
+    return _query_cache
+
+
+def encode_queries(backend: EmbeddingBackend, texts: list, batch_size: int = EMBEDDING_BATCH_SIZE,
+                   cache: DiskCache = None, use_cache: bool = None) -> np.ndarray:
+    """
+    Embeds query texts, reusing cached vectors for texts seen before.
+
+    Only the misses are encoded, under the "embedding" CPU stage limit.
+
+    Args:
+        backend (EmbeddingBackend): The encoder (resources.get_embedding_model()).
+        texts (list): Query texts.
+        cache (DiskCache): Defaults to the shared query embedding cache.
+        use_cache (bool): Defaults to EMBEDDING_CACHE.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(texts), dimension).
+    """
+    if not (EMBEDDING_CACHE_ENABLED if use_cache is None else use_cache):
+        with cpu_stage("embedding"):
+            return backend.encode(texts, batch_size=batch_size)
+
+    cache = cache or get_query_embedding_cache()
+    keys = [content_hash(backend.model_name, backend.name, text) for text in texts]
+    embeddings = np.zeros((len(texts), backend.dimension), dtype=np.float32)
+    missing = []
+    for row, key in enumerate(keys):
+        value = cache.get(key)
+        vector = np.frombuffer(base64.b64decode(value), dtype=np.float32) if value is not None else None
+        if vector is None or len(vector) != backend.dimension:
+            missing.append(row)
+        else:
+            embeddings[row] = vector
+    current_span().add("embedding_cache_hits", len(texts) - len(missing))
+    if missing:
+        with cpu_stage("embedding"):
+            encoded = backend.encode([texts[row] for row in missing], batch_size=batch_size)
+        for row, vector in zip(missing, encoded):
+            embeddings[row] = vector
+            cache.put(keys[row], base64.b64encode(vector.astype(np.float32).tobytes()).decode("ascii"))
+    return embeddings
@@ -0,0 +1,274 @@
+"""
+Process-wide execution limits shared by every analysis.
+
+- LLM rate limiting: one token bucket for requests (LLM_REQUESTS_PER_MINUTE)
+  and one for tokens (LLM_TOKENS_PER_MINUTE), shared by all LLM calls in the
+  process (response cache hits are free). Each call reserves an estimate of its
+  tokens up front and settles it against the reported usage afterwards, so a
+  burst of submissions is metered out instead of exceeding the Gemini quota.
+- Retries: throttled calls (HTTP 429, a Retry-After header or a rate-limit
+  exception type) are retried up to LLM_MAX_ATTEMPTS times with exponential
+  backoff and full jitter, waiting at least the provider's Retry-After. A
+  throttle also pauses the shared limiter briefly, so concurrent analyses back
+  off together instead of each spending its own retries against an exhausted
+  quota.
+- CPU stages: `cpu_stage(name)` caps how many embedding, PDF extraction and PDF
+  rendering steps run at once, however many analyses are in flight.
+
+The bounded analysis queue (rejection, queue positions) is job_queue.py. Waits
+for the limiter and for CPU slots are recorded in the `stage_wait_seconds`
+histogram, retries in `llm_retries_total` (see tracing.py).
+"""
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from tracing import current_span, inc, observe
+
+# Defaults are meant to sit just under a paid Gemini Flash quota; set them to your project's limits (0 = unlimited)
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "900"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "900000"))
+# How much unused allowance may pile up for a burst, in seconds of the rates above
+LLM_RATE_LIMIT_BURST_SECONDS = float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "60"))
+# Tokens reserved for the response on top of the prompt estimate, until the real usage is known
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1000"))
+
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "1"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+
+CPU_STAGE_LIMITS = {
+    "embedding": int(os.getenv("EMBEDDING_CONCURRENCY", "2")),
+    "pdf_extract": int(os.getenv("PDF_EXTRACT_CONCURRENCY", str(os.cpu_count() or 1))),
+    "pdf_render": int(os.getenv("PDF_RENDER_CONCURRENCY", "2")),
+}
+
+# Gemini reports the delay in the error body ('retryDelay': '7s'), OpenAI-style APIs in a header
+_RETRY_DELAY_RE = re.compile(r"retry[_ ]?(?:delay|after)\W+(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+# Exception class names of throttles in the provider SDKs (openai.RateLimitError, google ResourceExhausted, ...)
+_THROTTLING_ERROR_NAMES = ("ratelimit", "resourceexhausted", "toomanyrequests")
+
+
+class RateLimiter:
+    """
+    Thread-safe request and token buckets, each refilled continuously and
+    holding at most `burst_seconds` of allowance. A rate of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+                 burst_seconds: float = LLM_RATE_LIMIT_BURST_SECONDS, clock=time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # At least one request's worth, so a bucket can always be satisfied
+        self.max_requests = max(1.0, requests_per_minute * burst_seconds / 60)
+        self.max_tokens = tokens_per_minute * burst_seconds / 60
+        self._clock = clock
+        self._requests = self.max_requests
+        self._tokens = self.max_tokens
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.max_requests, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.max_tokens, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _wait_time(self, now: float, tokens: float) -> float:
+        wait = max(0.0, self._paused_until - now)
+        if self.requests_per_minute and self._requests < 1:
+            wait = max(wait, (1 - self._requests) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Blocks until one request and `tokens` tokens are available, then takes them.
+
+        Args:
+            tokens (int): Estimated tokens of the call; capped at the bucket size.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.max_tokens)
+        started = self._clock()
+        with self._condition:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    break
+                self._condition.wait(wait)
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+        return self._clock() - started
+
+    def settle(self, reserved: int, used: int):
+        """Corrects a reservation with the tokens the call really used (the balance may go negative)."""
+        if not self.tokens_per_minute or used == reserved:
+            return
+        with self._condition:
+            self._tokens -= used - reserved
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        """Holds every caller back for `seconds` (after the provider throttled a call)."""
+        with self._condition:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+_llm_limiter = RateLimiter()
+
+
+def get_llm_limiter() -> RateLimiter:
+    return _llm_limiter
+
+
+def set_llm_limiter(limiter: RateLimiter):
+    """Replaces the process-wide LLM limiter (e.g. with other rates in a benchmark)."""
+    global _llm_limiter
+    _llm_limiter = limiter
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class RetriesExhaustedError(RuntimeError):
+    """
+    A call was still throttled after all its attempts; `last_error` is the final throttle.
+
+    Raised without chaining the throttle, so retry layers further out (crewAI
+    retries every LLM call it sees fail with a throttle) give up as well.
+    """
+
+    def __init__(self, label: str, attempts: int, last_error: BaseException):
+        super().__init__(f"{label}: gave up after {attempts} attempts against the provider's quota")
+        self.last_error = last_error
+
+
+def _error_chain(error: BaseException):
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _retry_after_header(error: BaseException):
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    return headers.get("retry-after") if headers is not None and hasattr(headers, "get") else None
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Whether `error`, or an error it was raised from, is a provider throttle (HTTP 429, Retry-After, rate-limit type)."""
+    for candidate in _error_chain(error):
+        if isinstance(candidate, RetriesExhaustedError):
+            return False
+        # status_code on httpx/openai errors, code on google-genai ones
+        status = getattr(candidate, "status_code", None) or getattr(getattr(candidate, "response", None),
+                                                                    "status_code", None)
+        if status == 429 or getattr(candidate, "code", None) == 429 or _retry_after_header(candidate):
+            return True
+        name = type(candidate).__name__.lower()
+        if any(marker in name for marker in _THROTTLING_ERROR_NAMES):
+            return True
+    return False
+
+
+def retry_after_seconds(error: BaseException):
+    """The delay the provider asked for, from a Retry-After header or a Gemini retryDelay, or None."""
+    for candidate in _error_chain(error):
+        value = _retry_after_header(candidate)
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                pass  # an HTTP date; fall back to the body or to backoff
+        match = _RETRY_DELAY_RE.search(str(candidate))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: float = None, rng=random.random) -> float:
+    """Exponential backoff with full jitter for the one-based `attempt`, but never below `retry_after`."""
+    ceiling = min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return max(retry_after or 0.0, rng() * ceiling)
+
+
+def call_with_retry(operation, is_throttling_error=is_throttling_error, max_attempts: int = None,
+                    limiter: RateLimiter = None, sleep=time.sleep, label: str = "llm"):
+    """
+    Runs `operation()`, retrying it while it fails with a throttling error.
+
+    Args:
+        operation (callable): The call; it should acquire from the limiter itself so retries are metered too.
+        is_throttling_error (callable): Tells throttles (retried) from other errors (raised at once).
+        max_attempts (int): Attempts in total; defaults to LLM_MAX_ATTEMPTS.
+        limiter (RateLimiter): Paused on each throttle; defaults to the process-wide LLM limiter.
+        label (str): `model` label of the llm_retries_total metric.
+
+    Raises:
+        RetriesExhaustedError: The call was throttled on every attempt.
+        Any non-throttling error of the call, as is.
+    """
+    max_attempts = max_attempts or LLM_MAX_ATTEMPTS
+    limiter = limiter or get_llm_limiter()
+    last_error = None
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return operation()
+        except Exception as e:
+            if not is_throttling_error(e):
+                raise
+            if attempt == max_attempts:
+                last_error = e
+                break
+            retry_after = retry_after_seconds(e)
+            # A short shared cooldown for everyone, plus this caller's own jittered wait
+            limiter.pause(retry_after if retry_after is not None else LLM_RETRY_BASE_SECONDS)
+            delay = backoff_delay(attempt, retry_after)
+            inc("llm_retries_total", model=label)
+            current_span().add("retries")
+            sleep(delay)
+    raise RetriesExhaustedError(label, max_attempts, last_error)
+
+
+_stage_semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in CPU_STAGE_LIMITS.items() if limit > 0}
+
+
+@contextmanager
+def cpu_stage(name: str):
+    """
+    Holds one of the CPU_STAGE_LIMITS[name] slots for the block (no limit for other names).
+
+    Yields:
+        float: Seconds spent waiting for the slot.
+    """
+    semaphore = _stage_semaphores.get(name)
+    if semaphore is None:
+        yield 0.0
+        return
+    started = time.perf_counter()
+    semaphore.acquire()
+    waited = time.perf_counter() - started
+    observe("stage_wait_seconds", waited, stage=name)
+    try:
+        yield waited
+    finally:
+        semaphore.release()
@@ -0,0 +1,195 @@
+"""
+Facet index for the job collection and metadata filters derived from a resume.
+
+Ingestion counts the values of the filterable metadata fields into
+`facets.json` next to the Chroma store, so the UI can list them without
+scanning the collection. Filters built here are passed to Chroma's `where`,
+which resolves the matching ids from its metadata index before the vector
+search, so a filtered query only scores the matching subset.
+"""
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+import resources
+
+FACET_FIELDS = ["search_country", "job_level", "job_type", "search_city"]
+FACETS_FILE = "facets.json"
+
+# Summarizer experience categories -> job_level values used in the dataset
+EXPERIENCE_LEVELS = {
+    "junior": "Associate",
+    "juinor": "Associate",  # spelling used in the summarizer prompt
+    "entry": "Associate",
+    "associate": "Associate",
+    "mid": "Mid senior",
+    "senior": "Mid senior",
+    "mid-senior": "Mid senior",
+    "mid senior": "Mid senior",
+}
+
+COUNTRY_ALIASES = {
+    "usa": "United States",
+    "us": "United States",
+    "u.s.": "United States",
+    "united states of america": "United States",
+    "uk": "United Kingdom",
+    "u.k.": "United Kingdom",
+    "england": "United Kingdom",
+    "scotland": "United Kingdom",
+    "wales": "United Kingdom",
+}
+
+_cache = {"mtime": None, "facets": {}}
+_cache_lock = threading.Lock()
+
+
+def facets_path(chroma_path: str = None) -> str:
+    return os.path.join(chroma_path or resources.CHROMA_PATH, FACETS_FILE)
+
+
+def count_facets(metadatas: list) -> dict:
+    """Counts facet values over a list of job metadata dicts."""
+    counts = {field: Counter() for field in FACET_FIELDS}
+    for metadata in metadatas:
+        for field in FACET_FIELDS:
+            value = metadata.get(field)
+            if value:
+                counts[field][value] += 1
+    return {field: dict(counter) for field, counter in counts.items()}
+
+
+def merge_facet_counts(parts: list) -> dict:
+    merged = {field: Counter() for field in FACET_FIELDS}
+    for part in parts:
+        for field, values in part.items():
+            merged.setdefault(field, Counter()).update(values)
+    return {field: dict(counter.most_common()) for field, counter in merged.items()}
+
+
+def list_facets(chroma_path: str = None) -> dict:
+    """
+    Returns {field: {value: job count}} for the filterable fields, most common first.
+
+    Reads the precomputed facet file (re-read only when it changes); empty if the
+    index was built without one.
+    """
+    path = facets_path(chroma_path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    with _cache_lock:
+        if _cache["mtime"] != (path, mtime):
+            with open(path) as f:
+                _cache["facets"] = json.load(f)
+            _cache["mtime"] = (path, mtime)
+        return _cache["facets"]
+
+
+def build_where(filters: dict):
+    """
+    Turns {field: value or [values]} into a Chroma `where` clause (None when empty).
+    """
+    clauses = []
+    for field, value in (filters or {}).items():
+        if value in (None, "", []):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            clauses.append({field: {"$in": list(value)}})
+        else:
+            clauses.append({field: value})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def where_mask(where: dict, facet_codes: dict, facet_values: dict, count: int, strict: bool = True) -> np.ndarray:
+    """
+    Row mask for a Chroma-style where clause, evaluated over per-row facet codes.
+
+    Args:
+        where (dict): Clause built by `build_where` ($and / $or of equality and $in conditions).
+        facet_codes (dict): {field: array of each row's value code, -1 for none}.
+        facet_values (dict): {field: {value: code}}.
+        count (int): Number of rows.
+        strict (bool): Raise for a field without codes; otherwise that condition matches every row.
+
+    Raises:
+        ValueError: For a field without codes, when `strict`.
+    """
+    if "$and" in where or "$or" in where:
+        masks = [where_mask(clause, facet_codes, facet_values, count, strict)
+                 for clause in where.get("$and") or where["$or"]]
+        combine = np.logical_and if "$and" in where else np.logical_or
+        return combine.reduce(masks) if masks else np.ones(count, dtype=bool)
+
+    (field, condition), = where.items()
+    if field not in facet_codes:
+        if strict:
+            raise ValueError(f"Only {FACET_FIELDS} can be filtered on here, not '{field}'.")
+        return np.ones(count, dtype=bool)
+    values = condition["$in"] if isinstance(condition, dict) and "$in" in condition else \
+        [condition["$eq"] if isinstance(condition, dict) else condition]
+    known = facet_values[field]
+    return np.isin(facet_codes[field], [known[value] for value in values if value in known])
+
+
+def facet_value_codes(facet_values: dict, metadatas) -> dict:
+    """Codes each metadata dict's facet values, adding new values to `facet_values` ({field: {value: code}})."""
+    metadatas = list(metadatas)
+    codes = {field: np.full(len(metadatas), -1, dtype=np.int32) for field in FACET_FIELDS}
+    for row, metadata in enumerate(metadatas):
+        for field in FACET_FIELDS:
+            value = metadata.get(field)
+            if value:
+                values = facet_values.setdefault(field, {})
+                codes[field][row] = values.setdefault(value, len(values))
+    return codes
+
+
+def _match_facet_value(text: str, values) -> str:
+    """Returns the facet value named in `text` (whole-word, case-insensitive), longest match first."""
+    lowered = text.lower()
+    for value in sorted(values, key=len, reverse=True):
+        if re.search(r"\b" + re.escape(value.lower()) + r"\b", lowered):
+            return value
+    return None
+
+
+def filters_from_resume(resume: dict, facets: dict = None) -> dict:
+    """
+    Derives structured filters from the summarized `last_location` and `experience`.
+
+    Only values that exist in the facet index are used, so an unknown location or
+    level never filters the results down to nothing.
+    """
+    facets = list_facets() if facets is None else facets
+    filters = {}
+
+    location = str(resume.get("last_location") or "")
+    countries = facets.get("search_country", {})
+    if location and countries:
+        country = _match_facet_value(location, countries)
+        if country is None:
+            for alias, name in COUNTRY_ALIASES.items():
+                if name in countries and re.search(r"(^|[\s,])" + re.escape(alias) + r"($|[\s,])", location.lower()):
+                    country = name
+                    break
+        if country:
+            filters["search_country"] = country
+
+    experience = str(resume.get("experience") or "").lower()
+    levels = facets.get("job_level", {})
+    if experience and levels:
+        # check the most specific wording first ("mid-senior" before "senior")
+        for keyword in sorted(EXPERIENCE_LEVELS, key=len, reverse=True):
+            if keyword in experience and EXPERIENCE_LEVELS[keyword] in levels:
+                filters["job_level"] = EXPERIENCE_LEVELS[keyword]
+                break
+
+    return filters
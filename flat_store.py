@@ -0,0 +1,310 @@
+"""
+Memory-mapped embedding store with exact top-k search (JOB_INDEX_BACKEND=flat).
+
+Built by `ingest.py --flat-store float16` or from an existing collection:
+
+    python flat_store.py export --chroma-path chroma_db --dtype float16
+"""
+import argparse
+import json
+import os
+import sys
+import uuid
+
+import numpy as np
+
+from chunk_spill import ChunkSpill
+from facets import FACET_FIELDS, facet_value_codes, where_mask
+
+FLAT_DIR = "flat"
+BLOCK_ROWS = int(os.getenv("FLAT_BLOCK_ROWS", "65536"))
+# Rows per block when float16/int8 blocks are cast to float32
+CAST_BLOCK_ROWS = int(os.getenv("FLAT_CAST_BLOCK_ROWS", "4096"))
+# Use the int8 codes when the store has them; candidates kept per result for the float rescore
+FLAT_INT8_SEARCH = os.getenv("FLAT_INT8_SEARCH", "1") == "1"
+FLAT_RESCORE_FACTOR = int(os.getenv("FLAT_RESCORE_FACTOR", "4"))
+
+
+def store_dir(chroma_path: str) -> str:
+    return os.path.join(chroma_path, FLAT_DIR)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def int8_scale(max_abs: np.ndarray) -> np.ndarray:
+    """Per-dimension scale mapping [-max_abs, max_abs] onto [-127, 127]."""
+    max_abs = np.asarray(max_abs, dtype=np.float32)
+    return np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+
+
+def quantize_int8(vectors: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+
+def _blocked_top_k(matrix, queries: np.ndarray, k: int, rows: np.ndarray = None):
+    """Top-k rows of `matrix` by dot product with each query, scanning one block of rows at a time."""
+    m = len(queries)
+    total = len(matrix) if rows is None else len(rows)
+    k = min(k, total)
+    best_rows = np.zeros((m, 0), dtype=np.int64)
+    best_sims = np.zeros((m, 0), dtype=np.float32)
+    if k == 0:
+        return best_rows, best_sims
+
+    block_size = BLOCK_ROWS if matrix.dtype == np.float32 else min(BLOCK_ROWS, CAST_BLOCK_ROWS)
+    for start in range(0, total, block_size):
+        stop = min(start + block_size, total)
+        block_rows = np.arange(start, stop) if rows is None else rows[start:stop]
+        block = matrix[start:stop] if rows is None else matrix[block_rows]
+        sims = queries @ np.asarray(block, dtype=np.float32).T
+
+        # Merge this block's candidates into the running top-k
+        take = min(k, stop - start)
+        top = np.argpartition(-sims, take - 1, axis=1)[:, :take]
+        cand_rows = np.concatenate([best_rows, block_rows[top]], axis=1)
+        cand_sims = np.concatenate([best_sims, np.take_along_axis(sims, top, axis=1)], axis=1)
+        keep = np.argpartition(-cand_sims, k - 1, axis=1)[:, :k] if cand_sims.shape[1] > k else \
+            np.broadcast_to(np.arange(cand_sims.shape[1]), cand_sims.shape)
+        best_rows = np.take_along_axis(cand_rows, keep, axis=1)
+        best_sims = np.take_along_axis(cand_sims, keep, axis=1)
+
+    order = np.argsort(-best_sims, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_sims, order, axis=1)
+
+
+class FlatStoreBuilder:
+    """Builds the store chunk by chunk (see ChunkSpill); `quantize="int8"` adds int8 codes for the scan."""
+
+    def __init__(self, path: str, dtype: str = "float32", resume: bool = False, quantize: str = None):
+        if quantize not in (None, "int8"):
+            raise ValueError(f"Unsupported quantization: {quantize}")
+        self.dtype = np.dtype(dtype)
+        self.quantize = quantize
+        self.spill = ChunkSpill(path, resume=resume)
+
+    def add_chunk(self, chunk_index: int, ids: list, embeddings: np.ndarray, metadatas: list):
+        base = self.spill.chunk_path(chunk_index)
+        np.savez(base + ".npz", ids=np.array(ids, dtype="S64"),
+                 embeddings=_normalize(embeddings) if len(ids) else np.zeros((0, 0), np.float32))
+        with open(base + ".jsonl", "w") as f:
+            for metadata in metadatas:
+                f.write(json.dumps(metadata) + "\n")
+
+    def _chunks(self):
+        for base in self.spill.chunks():
+            with np.load(base + ".npz") as spill:
+                yield spill["ids"], spill["embeddings"], base + ".jsonl"
+
+    def finish(self):
+        """Concatenates the spills into the final memory-mappable files and swaps them in."""
+        rows, dim, max_abs = 0, 0, None
+        for ids, embeddings, _ in self._chunks():
+            rows += len(ids)
+            dim = dim or (embeddings.shape[1] if len(ids) else 0)
+            if self.quantize and len(ids):
+                chunk_max = np.abs(embeddings).max(axis=0)
+                max_abs = chunk_max if max_abs is None else np.maximum(max_abs, chunk_max)
+
+        out = self.spill.output
+        matrix = np.lib.format.open_memmap(out("embeddings.npy"), mode="w+", dtype=self.dtype, shape=(rows, dim))
+        codes, scale = None, None
+        if self.quantize:
+            scale = int8_scale(max_abs if max_abs is not None else np.zeros(dim))
+            codes = np.lib.format.open_memmap(out("embeddings_int8.npy"), mode="w+", dtype=np.int8, shape=(rows, dim))
+        all_ids = np.zeros(rows, dtype="S64")
+        offsets = np.zeros(rows + 1, dtype=np.int64)
+        facet_values = {field: {} for field in FACET_FIELDS}
+        facet_codes = {field: np.full(rows, -1, dtype=np.int32) for field in FACET_FIELDS}
+
+        row = 0
+        with open(out("metadata.jsonl"), "wb") as table:
+            for ids, embeddings, metadata_path in self._chunks():
+                count = len(ids)
+                if count:
+                    matrix[row:row + count] = embeddings.astype(self.dtype)
+                    if codes is not None:
+                        codes[row:row + count] = quantize_int8(embeddings, scale)
+                all_ids[row:row + count] = ids
+                with open(metadata_path, "rb") as f:
+                    lines = f.readlines()
+                for field, chunk_codes in facet_value_codes(facet_values, map(json.loads, lines)).items():
+                    facet_codes[field][row:row + count] = chunk_codes
+                for i, line in enumerate(lines):
+                    table.write(line)
+                    offsets[row + i + 1] = table.tell()
+                row += count
+
+        matrix.flush()
+        del matrix
+        if codes is not None:
+            codes.flush()
+            del codes
+            np.save(out("int8_scale.npy"), scale)
+        order = np.argsort(all_ids, kind="stable")
+        np.save(out("ids.npy"), all_ids)
+        np.save(out("ids_sorted.npy"), all_ids[order])
+        np.save(out("ids_order.npy"), order.astype(np.int64))
+        np.save(out("metadata_offsets.npy"), offsets)
+        for field in FACET_FIELDS:
+            np.save(out(f"facet_{field}.npy"), facet_codes[field])
+        with open(out("meta.json"), "w") as f:
+            json.dump({"id": uuid.uuid4().hex, "rows": rows, "dim": dim, "dtype": self.dtype.name,
+                       "quantize": self.quantize, "facet_values": facet_values}, f)
+        self.spill.commit()
+
+
+class FlatIndex:
+    """Read-only exact-search index over a flat store."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.ids_sorted = np.load(os.path.join(path, "ids_sorted.npy"), mmap_mode="r")
+        self.ids_order = np.load(os.path.join(path, "ids_order.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "metadata_offsets.npy"), mmap_mode="r")
+        self.facet_codes = {field: np.load(os.path.join(path, f"facet_{field}.npy"), mmap_mode="r")
+                            for field in FACET_FIELDS}
+        self._table_fd = os.open(os.path.join(path, "metadata.jsonl"), os.O_RDONLY)
+        self.codes, self.scale = None, None
+        if self.meta.get("quantize") == "int8":
+            self.codes = np.load(os.path.join(path, "embeddings_int8.npy"), mmap_mode="r")
+            self.scale = np.load(os.path.join(path, "int8_scale.npy"))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "meta.json"))
+
+    @property
+    def id(self) -> str:
+        return self.meta["id"]
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def metadata(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(os.pread(self._table_fd, end - start, start))
+
+    def rows_for_ids(self, ids: list) -> np.ndarray:
+        keys = np.array(ids, dtype="S64")
+        positions = np.searchsorted(self.ids_sorted, keys)
+        found = positions < len(self.ids_sorted)
+        found[found] = self.ids_sorted[positions[found]] == keys[found]
+        return np.asarray(self.ids_order[positions[found]])
+
+    def _where_mask(self, where: dict) -> np.ndarray:
+        return where_mask(where, self.facet_codes, self.meta["facet_values"], self.count())
+
+    def bytes_per_vector(self) -> dict:
+        """Storage per job vector: the scanned representation and the float copy."""
+        dim = self.embeddings.shape[1] if self.embeddings.ndim == 2 else 0
+        scanned = self.codes.dtype.itemsize * dim if self.codes is not None else self.embeddings.dtype.itemsize * dim
+        return {"scan": scanned, "float": self.embeddings.dtype.itemsize * dim}
+
+    def search(self, queries: np.ndarray, k: int, rows: np.ndarray = None, use_int8: bool = None,
+               rescore_factor: int = None):
+        """
+        Top-k by cosine similarity.
+
+        Args:
+            queries (np.ndarray): (m, dim) query embeddings.
+            k (int): Results per query.
+            rows (np.ndarray): Restrict the search to these row numbers.
+            use_int8 (bool): Scan the int8 codes and rescore the candidates exactly
+                (default: FLAT_INT8_SEARCH, when the store is quantized).
+            rescore_factor (int): Candidates kept per result for the rescore
+                (default: FLAT_RESCORE_FACTOR).
+
+        Returns:
+            (np.ndarray, np.ndarray): (m, k') row numbers and similarities, best first.
+        """
+        queries = _normalize(np.atleast_2d(queries))
+        use_int8 = (FLAT_INT8_SEARCH if use_int8 is None else use_int8) and self.codes is not None
+        if not use_int8:
+            return _blocked_top_k(self.embeddings, queries, k, rows)
+
+        # Float query against the int8 codes, with the scale folded into the query
+        depth = k * (rescore_factor or FLAT_RESCORE_FACTOR)
+        candidates, _ = _blocked_top_k(self.codes, queries * self.scale, depth, rows)
+        k = min(k, candidates.shape[1])
+        best_rows = np.zeros((len(queries), k), dtype=np.int64)
+        best_sims = np.zeros((len(queries), k), dtype=np.float32)
+        for q, query_rows in enumerate(candidates):
+            query_rows = np.sort(query_rows)  # read the float rows in file order
+            sims = np.asarray(self.embeddings[query_rows], dtype=np.float32) @ queries[q]
+            order = np.argsort(-sims, kind="stable")[:k]
+            best_rows[q], best_sims[q] = query_rows[order], sims[order]
+        return best_rows, best_sims
+
+    def query(self, query_embeddings, n_results: int = 10, where: dict = None, **_) -> dict:
+        """Chroma-compatible query: cosine distances (1 - similarity), closest first."""
+        rows = np.flatnonzero(self._where_mask(where)) if where else None
+        top_rows, top_sims = self.search(np.asarray(query_embeddings, dtype=np.float32), n_results, rows)
+        return {
+            "ids": [[self.ids[r].decode("ascii") for r in query_rows] for query_rows in top_rows],
+            "distances": [[float(1.0 - s) for s in query_sims] for query_sims in top_sims],
+            "metadatas": [[self.metadata(r) for r in query_rows] for query_rows in top_rows],
+        }
+
+    def get(self, ids: list = None, where: dict = None, include: list = None, **_) -> dict:
+        """Chroma-compatible get by ids (optionally filtered by `where`)."""
+        rows = self.rows_for_ids(ids or [])
+        if where and len(rows):
+            rows = rows[self._where_mask(where)[rows]]
+        include = include or ["metadatas"]
+        result = {"ids": [self.ids[r].decode("ascii") for r in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [self.metadata(r) for r in rows]
+        if "embeddings" in include:
+            result["embeddings"] = np.asarray(self.embeddings[rows], dtype=np.float32)
+        return result
+
+
+def load_flat_index(chroma_path: str):
+    """Opens the flat store under `chroma_path`, or returns None if it hasn't been built."""
+    path = store_dir(chroma_path)
+    return FlatIndex(path) if FlatIndex.exists(path) else None
+
+
+def export_collection(chroma_path: str, collection_name: str, dtype: str = "float32", quantize: str = None,
+                      page_size: int = 5000) -> int:
+    """Builds the flat store from an existing Chroma collection. Returns the number of rows."""
+    import chromadb
+
+    collection = chromadb.PersistentClient(path=chroma_path).get_collection(collection_name)
+    builder = FlatStoreBuilder(store_dir(chroma_path), dtype=dtype, quantize=quantize)
+    total = collection.count()
+    for index, offset in enumerate(range(0, total, page_size)):
+        page = collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+        builder.add_chunk(index, page["ids"], np.asarray(page["embeddings"], dtype=np.float32), page["metadatas"])
+    builder.finish()
+    return total
+
+
+def main(argv=None):
+    import resources
+
+    parser = argparse.ArgumentParser(description="Manage the flat, memory-mapped job embedding store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Build the flat store from the existing Chroma collection")
+    export.add_argument("--chroma-path", default=resources.CHROMA_PATH)
+    export.add_argument("--collection", default=resources.COLLECTION_NAME)
+    export.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    export.add_argument("--quantize", choices=["int8"], help="Also store scalar-quantized codes for the scan")
+    args = parser.parse_args(argv)
+
+    rows = export_collection(args.chroma_path, args.collection, dtype=args.dtype, quantize=args.quantize)
+    print(f"Exported {rows} embeddings to {store_dir(args.chroma_path)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,416 @@
+"""
+Builds the Chroma job index from the LinkedIn job CSVs.
+
+Replaces the hand-run loader cells in Notebook/GenAI_Project.ipynb:
+
+    python ingest.py --data-dir data/ --chroma-path chroma_db
+
+Summaries are streamed in chunks, encoded on worker processes and upserted with
+stable ids; progress is checkpointed after every chunk so an interrupted load
+resumes where it stopped. Use `data/fixtures/` for a small local run.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+import multiprocessing
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import facets
+import resources
+from dedupe import DEDUP_THRESHOLD, MinHasher, NearDuplicateIndex, dedupe_path, dedupe_text
+from embeddings import set_thread_count
+from flat_store import FlatStoreBuilder, store_dir
+from lexical_index import LexicalIndexBuilder, index_dir, lexical_text
+
+POSTINGS_FILE = "linkedin_job_postings.csv"
+SKILLS_FILE = "job_skills.csv"
+SUMMARY_FILE = "job_summary.csv"
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+
+# Bookkeeping columns of the scrape, dropped before indexing (as in the notebook)
+DROPPED_COLUMNS = ["last_processed_time", "got_summary", "got_ner", "is_being_worked"]
+DEFAULT_COUNTRIES = ["United States", "Canada", "Australia", "United Kingdom"]
+DEFAULT_LEVELS = ["Associate", "Mid senior"]
+
+
+@dataclass
+class EncodedChunk:
+    index: int
+    ids: list
+    texts: list
+    embeddings: np.ndarray
+    metadatas: list
+    signatures: np.ndarray = None  # MinHash signatures, when deduplicating
+
+
+def job_id(job_link: str) -> str:
+    """Stable document id for a posting (the dataset has no id column)."""
+    return hashlib.sha1(job_link.encode("utf-8")).hexdigest()
+
+
+# Function to build weighted embedding text
+def build_embedding_text(row):
+    text = (
+        ("job title: " + row["job_title"] + " ") * 3 +  # weight 3
+        ("skills: " + row["job_skills"] + " ") * 3 +    # weight 3
+        ("summary: " + row["job_summary"] + " ") * 2 +  # weight 2
+        ("level: " + str(row["job_level"]) + " ") * 1 + # weight 1
+        ("location: " + str(row["job_location"]) + " ") * 1  # weight 0.5 ~ 1
+    )
+    return text.strip()
+
+
+def clean_metadata(row_dict):
+    clean = {}
+    for k, v in row_dict.items():
+        if k == "job_text":   # don't include job_text in metadata
+            continue
+        if v is None:
+            clean[k] = ""   # default to empty string
+        elif isinstance(v, (bool, int, float, str)):
+            clean[k] = v
+        else:
+            clean[k] = str(v)   # fallback: convert to string
+    return clean
+
+
+def iter_job_chunks(data_dir: str, chunk_size: int, countries: list = None, levels: list = None):
+    """
+    Yields lists of joined job rows (dicts), one list per `chunk_size` summary rows.
+
+    Postings and skills are filtered and held in memory; the much larger summary
+    file is streamed. Empty chunks are still yielded so chunk numbers stay stable
+    for checkpointing.
+    """
+    postings = pd.read_csv(os.path.join(data_dir, POSTINGS_FILE), dtype=str,
+                           usecols=lambda column: column not in DROPPED_COLUMNS)
+    postings = postings.dropna()
+    if countries:
+        postings = postings[postings["search_country"].isin(countries)]
+    if levels:
+        postings = postings[postings["job_level"].isin(levels)]
+    postings = postings.drop_duplicates("job_link").set_index("job_link")
+
+    skills = []
+    for chunk in pd.read_csv(os.path.join(data_dir, SKILLS_FILE), dtype=str, chunksize=chunk_size):
+        skills.append(chunk[chunk["job_link"].isin(postings.index)].dropna())
+    skills = pd.concat(skills).drop_duplicates("job_link").set_index("job_link")
+    jobs = skills.join(postings, how="inner")
+
+    for chunk in pd.read_csv(os.path.join(data_dir, SUMMARY_FILE), dtype=str, chunksize=chunk_size):
+        chunk = chunk.dropna().drop_duplicates("job_link")
+        joined = chunk.join(jobs, on="job_link", how="inner")
+        yield joined.to_dict("records")
+
+
+def _init_worker(threads: int):
+    set_thread_count(threads)
+
+
+def encode_chunk(index: int, rows: list, dedupe: bool = False) -> EncodedChunk:
+    texts = [build_embedding_text(row) for row in rows]
+    if texts:
+        embeddings = np.asarray(resources.get_embedding_model().encode(texts), dtype=np.float32)
+    else:
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+    signatures = MinHasher().signatures([dedupe_text(row) for row in rows]) if dedupe else None
+    return EncodedChunk(index, [job_id(row["job_link"]) for row in rows], texts, embeddings,
+                        [clean_metadata(row) for row in rows], signatures)
+
+
+class DedupeSink:
+    """
+    Sets each posting's `cluster_id` metadata from the near-duplicate index.
+
+    Has to come before the sinks that store metadata.
+    """
+
+    def __init__(self, chroma_path: str, threshold: float, resume: bool):
+        self.index = NearDuplicateIndex(dedupe_path(chroma_path), threshold=threshold, resume=resume)
+
+    def write(self, chunk: EncodedChunk):
+        for metadata, cluster_id in zip(chunk.metadatas, self.index.assign(chunk.ids, chunk.signatures)):
+            metadata["cluster_id"] = cluster_id
+
+    def close(self, completed: bool):
+        self.index.close()
+
+
+class ChromaSink:
+    """Upserts encoded chunks into the Chroma collection in bulk."""
+
+    def __init__(self, collection, batch_size: int):
+        self.collection = collection
+        self.batch_size = batch_size
+
+    def write(self, chunk: EncodedChunk):
+        for start in range(0, len(chunk.ids), self.batch_size):
+            end = start + self.batch_size
+            self.collection.upsert(
+                ids=chunk.ids[start:end],
+                embeddings=chunk.embeddings[start:end].tolist(),
+                documents=chunk.texts[start:end],
+                metadatas=chunk.metadatas[start:end],
+            )
+
+    def close(self, completed: bool):
+        pass
+
+
+class FacetSink:
+    """Counts facet values per chunk (persisted, so a redone chunk replaces its counts) and merges them at the end."""
+
+    def __init__(self, chroma_path: str, resume: bool):
+        self.final_path = facets.facets_path(chroma_path)
+        self.partial_path = self.final_path + ".partial"
+        self.chunks = {}
+        if resume and os.path.exists(self.partial_path):
+            with open(self.partial_path) as f:
+                self.chunks = json.load(f)
+
+    def write(self, chunk: EncodedChunk):
+        self.chunks[str(chunk.index)] = facets.count_facets(chunk.metadatas)
+        _save_json(self.partial_path, self.chunks)
+
+    def close(self, completed: bool):
+        if completed:
+            _save_json(self.final_path, facets.merge_facet_counts(self.chunks.values()))
+            if os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+
+
+class BuilderSink:
+    """
+    Feeds each chunk to an index builder's `add_chunk`; the index is finished when the load completes.
+
+    Args:
+        builder: LexicalIndexBuilder or FlatStoreBuilder.
+        chunk_args (callable): The builder's `add_chunk` arguments after the chunk index.
+    """
+
+    def __init__(self, builder, chunk_args):
+        self.builder = builder
+        self.chunk_args = chunk_args
+
+    def write(self, chunk: EncodedChunk):
+        self.builder.add_chunk(chunk.index, *self.chunk_args(chunk))
+
+    def close(self, completed: bool):
+        if completed:
+            self.builder.finish()
+
+
+def _source_fingerprint(data_dir: str, chunk_size: int, countries: list, levels: list,
+                        flat_store: str = None, quantize: str = None, dedupe_threshold: float = None) -> str:
+    parts = [chunk_size, sorted(countries or []), sorted(levels or [])]
+    if flat_store:
+        parts.append(["flat_store", flat_store, quantize])
+    if dedupe_threshold is not None:
+        parts.append(["dedupe", dedupe_threshold])
+    for name in (POSTINGS_FILE, SKILLS_FILE, SUMMARY_FILE):
+        stat = os.stat(os.path.join(data_dir, name))
+        parts.append([name, stat.st_size, int(stat.st_mtime)])
+    return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def _load_checkpoint(path: str, fingerprint: str) -> dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") == fingerprint:
+            return checkpoint
+        print("Source data or options changed since the last run; starting from the beginning.")
+    return {"source": fingerprint, "chunks_done": 0, "rows": 0, "completed": False}
+
+
+def _save_json(path: str, data: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _ingest_stats(chroma_path: str, checkpoint: dict, collection, dedupe: bool, rows_this_run: int,
+                  elapsed: float) -> dict:
+    stats = {
+        "rows": checkpoint["rows"],
+        "rows_this_run": rows_this_run,
+        "chunks": checkpoint["chunks_done"],
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows_this_run / elapsed, 1) if elapsed else 0.0,
+        "collection_count": collection.count(),
+    }
+    if dedupe and os.path.exists(dedupe_path(chroma_path)):
+        with closing(NearDuplicateIndex(dedupe_path(chroma_path), resume=True)) as index:
+            stats["near_duplicate_clusters"] = index.cluster_count()
+    return stats
+
+
+def ingest(data_dir: str, chroma_path: str = resources.CHROMA_PATH, chunk_size: int = 20000,
+           workers: int = 0, countries: list = None, levels: list = None, restart: bool = False,
+           flat_store: str = None, quantize: str = None, dedupe: bool = True,
+           dedupe_threshold: float = DEDUP_THRESHOLD) -> dict:
+    """
+    Loads the job CSVs into the Chroma index, resuming from the last checkpoint.
+
+    Args:
+        data_dir (str): Directory holding the three LinkedIn CSVs.
+        chroma_path (str): Persistent Chroma directory to write to.
+        chunk_size (int): Summary rows per chunk (the unit of work and of checkpointing).
+        workers (int): Encoder processes; 0 encodes in this process.
+        countries (list): Keep only these `search_country` values (None/empty keeps all).
+        levels (list): Keep only these `job_level` values (None/empty keeps all).
+        restart (bool): Ignore an existing checkpoint.
+        flat_store (str): Also build the memory-mapped flat store with this dtype
+            ("float32" or "float16"); None skips it.
+        quantize (str): "int8" adds scalar-quantized codes to the flat store.
+        dedupe (bool): Cluster near-duplicate postings (MinHash/LSH over title and summary)
+            and store each posting's `cluster_id`.
+        dedupe_threshold (float): Estimated Jaccard similarity at which postings are near duplicates.
+
+    Returns:
+        dict: Rows written, chunks processed, elapsed seconds and rows/sec (and
+        near-duplicate clusters when deduplicating).
+    """
+    import chromadb
+    from chromadb.errors import NotFoundError
+
+    os.makedirs(chroma_path, exist_ok=True)
+    checkpoint_path = os.path.join(chroma_path, CHECKPOINT_FILE)
+    fingerprint = _source_fingerprint(data_dir, chunk_size, countries, levels, flat_store, quantize,
+                                      dedupe_threshold if dedupe else None)
+    checkpoint = {"source": fingerprint, "chunks_done": 0, "rows": 0, "completed": False}
+    if not restart:
+        checkpoint = _load_checkpoint(checkpoint_path, fingerprint)
+
+    client = chromadb.PersistentClient(path=chroma_path)
+    resume = checkpoint["chunks_done"] > 0
+    if not resume and not checkpoint["completed"]:
+        # Starting over: postings this load doesn't write must not stay searchable
+        try:
+            client.delete_collection(resources.COLLECTION_NAME)
+        except NotFoundError:
+            pass
+    collection = client.get_or_create_collection(
+        name=resources.COLLECTION_NAME,
+        metadata={"hnsw:space": "cosine"}  # use cosine similarity
+    )
+    if checkpoint["completed"]:
+        # Nothing to redo; the sinks would only overwrite the finished index files
+        print("The index is already up to date with these files; use --restart to rebuild it.")
+        return _ingest_stats(chroma_path, checkpoint, collection, dedupe, 0, 0.0)
+    if checkpoint["chunks_done"]:
+        print(f"Resuming after chunk {checkpoint['chunks_done']} ({checkpoint['rows']} rows already indexed).")
+
+    sinks = [DedupeSink(chroma_path, dedupe_threshold, resume)] if dedupe else []
+    sinks += [
+        ChromaSink(collection, batch_size=client.get_max_batch_size()),
+        FacetSink(chroma_path, resume),
+        BuilderSink(LexicalIndexBuilder(index_dir(chroma_path), resume=resume),
+                    lambda chunk: (chunk.ids, [lexical_text(m) for m in chunk.metadatas], chunk.metadatas)),
+    ]
+    if flat_store:
+        builder = FlatStoreBuilder(store_dir(chroma_path), dtype=flat_store, resume=resume, quantize=quantize)
+        sinks.append(BuilderSink(builder, lambda chunk: (chunk.ids, chunk.embeddings, chunk.metadatas)))
+
+    started = time.perf_counter()
+    rows_this_run = 0
+    done = {}  # finished chunks beyond the contiguous checkpoint watermark -> row count
+
+    def _finish(chunk: EncodedChunk):
+        nonlocal rows_this_run
+        for sink in sinks:
+            sink.write(chunk)
+        rows_this_run += len(chunk.ids)
+        done[chunk.index] = len(chunk.ids)
+        while checkpoint["chunks_done"] in done:
+            checkpoint["rows"] += done.pop(checkpoint["chunks_done"])
+            checkpoint["chunks_done"] += 1
+        _save_json(checkpoint_path, checkpoint)
+        elapsed = time.perf_counter() - started
+        print(f"chunk {chunk.index}: {rows_this_run} rows this run ({checkpoint['rows']} checkpointed), "
+              f"{rows_this_run / elapsed if elapsed else 0:.0f} rows/s")
+
+    chunks = (
+        (index, rows)
+        for index, rows in enumerate(iter_job_chunks(data_dir, chunk_size, countries, levels))
+        if index >= checkpoint["chunks_done"]
+    )
+
+    completed = False
+    try:
+        if workers <= 0:
+            set_thread_count(os.cpu_count() or 1)
+            for index, rows in chunks:
+                _finish(encode_chunk(index, rows, dedupe))
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(threads,)) as pool:
+                in_flight = set()
+                for index, rows in chunks:
+                    in_flight.add(pool.submit(encode_chunk, index, rows, dedupe))
+                    if len(in_flight) >= workers * 2:  # bound the rows held in memory
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            _finish(future.result())
+                for future in in_flight:
+                    _finish(future.result())
+        completed = True
+    finally:
+        for sink in sinks:
+            sink.close(completed)
+
+    checkpoint["completed"] = True
+    _save_json(checkpoint_path, checkpoint)
+    # New version marker: cached analyses keyed on the old index are no longer served
+    with open(os.path.join(chroma_path, resources.INDEX_VERSION_FILE), "w") as f:
+        f.write(f"{uuid.uuid4().hex} {time.strftime('%Y-%m-%dT%H:%M:%S')}\n")
+
+    stats = _ingest_stats(chroma_path, checkpoint, collection, dedupe, rows_this_run, time.perf_counter() - started)
+    print(json.dumps(stats))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Chroma job index from the LinkedIn job CSVs.")
+    parser.add_argument("--data-dir", default="data", help="Directory with the three LinkedIn CSVs")
+    parser.add_argument("--chroma-path", default=resources.CHROMA_PATH)
+    parser.add_argument("--chunk-size", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="Encoder processes (0 = encode in the main process)")
+    parser.add_argument("--countries", nargs="*", default=DEFAULT_COUNTRIES,
+                        help="search_country values to keep; pass the flag with no values to keep all")
+    parser.add_argument("--levels", nargs="*", default=DEFAULT_LEVELS,
+                        help="job_level values to keep; pass the flag with no values to keep all")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--flat-store", choices=["float32", "float16"],
+                        help="Also build the flat embedding store (JOB_INDEX_BACKEND=flat) with this dtype")
+    parser.add_argument("--quantize", choices=["int8"],
+                        help="Add int8 codes to the flat store; queries scan them and rescore in float")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="Skip near-duplicate clustering (no cluster_id, so queries can't collapse reposts)")
+    parser.add_argument("--dedupe-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Estimated Jaccard similarity of title + summary at which postings are near duplicates")
+    args = parser.parse_args(argv)
+    if args.quantize and not args.flat_store:
+        parser.error("--quantize needs --flat-store")
+
+    ingest(args.data_dir, args.chroma_path, chunk_size=args.chunk_size, workers=args.workers,
+           countries=args.countries, levels=args.levels, restart=args.restart,
+           flat_store=args.flat_store, quantize=args.quantize, dedupe=not args.no_dedupe,
+           dedupe_threshold=args.dedupe_threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+In-process background job queue for the Streamlit app.
+
+Analyses run on a bounded thread pool instead of the Streamlit script thread.
+`submit` returns a job id right away; the page keeps the id in session state
+and polls `get(job_id)` for the status and per-stage progress, which the crew
+reports through its task callbacks. Finished jobs are kept for
+JOB_RETENTION_SECONDS so a rerun or a reconnect can still pick up the result.
+
+The queue is bounded: past JOB_QUEUE_MAX_PENDING queued plus running jobs,
+`submit` rejects new work with QueueFullError instead of letting the wait grow,
+and a queued job's snapshot carries its position in line.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "2"))
+JOB_QUEUE_MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", "16"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised by `submit` when JOB_QUEUE_MAX_PENDING jobs are already waiting or running."""
+
+
+@dataclass
+class Job:
+    id: str
+    label: str
+    stages: list
+    status: str = QUEUED
+    completed_stages: list = field(default_factory=list)
+    result: object = None
+    error: str = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    queue_position: int = None  # 1 for the next job to start, while queued (set on snapshots)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the stages finished (1.0 once the job is done)."""
+        if self.status == DONE:
+            return 1.0
+        return len(self.completed_stages) / len(self.stages) if self.stages else 0.0
+
+    @property
+    def current_stage(self):
+        """The first stage not reported finished yet, while the job is running."""
+        if self.status != RUNNING:
+            return None
+        remaining = [stage for stage in self.stages if stage not in self.completed_stages]
+        return remaining[0] if remaining else None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+class JobQueue:
+    """Bounded worker pool that tracks jobs by id."""
+
+    def __init__(self, max_workers: int = JOB_QUEUE_WORKERS, max_pending: int = JOB_QUEUE_MAX_PENDING,
+                 retention_seconds: float = JOB_RETENTION_SECONDS):
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, label: str = "", stages: list = None, **kwargs) -> str:
+        """
+        Queues `fn(*args, progress=callback, **kwargs)` and returns the job id.
+
+        `fn` reports progress by calling `callback(stage_name)` as each stage
+        finishes; its return value becomes the job's result.
+
+        Raises:
+            QueueFullError: When max_pending jobs are already queued or running.
+        """
+        job = Job(id=uuid.uuid4().hex, label=label, stages=list(stages or []))
+        with self._lock:
+            self._prune()
+            if sum(not j.finished for j in self._jobs.values()) >= self.max_pending:
+                raise QueueFullError(f"{self.max_pending} analyses are already in progress; try again shortly.")
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str):
+        """Returns a snapshot of the job (safe to read from another thread), or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            position = None
+            if job.status == QUEUED:
+                # Jobs are kept in submission order, which is the order the pool starts them in
+                position = 1
+                for other in self._jobs.values():
+                    if other is job:
+                        break
+                    position += other.status == QUEUED
+            return Job(**{**job.__dict__, "completed_stages": list(job.completed_stages), "queue_position": position})
+
+    def jobs(self) -> list:
+        with self._lock:
+            job_ids = list(self._jobs)
+        return [job for job in (self.get(job_id) for job_id in job_ids) if job is not None]
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn, args, kwargs):
+        def _progress(stage):
+            with self._lock:
+                if stage not in job.completed_stages:
+                    job.completed_stages.append(stage)
+
+        with self._lock:
+            job.status, job.started_at = RUNNING, time.time()
+        try:
+            result = fn(*args, progress=_progress, **kwargs)
+        except Exception:
+            with self._lock:
+                job.status, job.error, job.finished_at = FAILED, traceback.format_exc(), time.time()
+            return
+        with self._lock:
+            job.status, job.result, job.finished_at = DONE, result, time.time()
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """The process-wide queue (one per Streamlit server)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
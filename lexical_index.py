@@ -0,0 +1,215 @@
+"""
+BM25 inverted index over job_title / job_skills / job_summary, stored as memory-mapped CSR arrays
+next to per-document facet codes, so searches can apply the same filters as the vector query.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from chunk_spill import ChunkSpill
+from facets import FACET_FIELDS, facet_value_codes, where_mask
+
+LEXICAL_DIR = "lexical"
+LEXICAL_FIELDS = ["job_title", "job_skills", "job_summary"]
+MAX_TOKEN_LENGTH = 32
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to "
+    "we will with you your".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word tokens; keeps skill spellings like c++ / c# intact."""
+    return [t[:MAX_TOKEN_LENGTH] for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def lexical_text(metadata: dict) -> str:
+    return " ".join(str(metadata.get(field) or "") for field in LEXICAL_FIELDS)
+
+
+def index_dir(chroma_path: str) -> str:
+    return os.path.join(chroma_path, LEXICAL_DIR)
+
+
+class LexicalIndexBuilder:
+    """Builds the index chunk by chunk; each chunk is spilled with a chunk-local vocabulary."""
+
+    def __init__(self, path: str, resume: bool = False):
+        self.spill = ChunkSpill(path, resume=resume)
+
+    def add_chunk(self, chunk_index: int, doc_ids: list, texts: list, metadatas: list = None):
+        terms, term_rows, doc_rows, tfs, lengths = {}, [], [], [], []
+        for doc, text in enumerate(texts):
+            counts = {}
+            tokens = tokenize(text)
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            lengths.append(len(tokens))
+            for token, tf in counts.items():
+                term_rows.append(terms.setdefault(token, len(terms)))
+                doc_rows.append(doc)
+                tfs.append(min(tf, 65535))
+
+        np.savez(
+            self.spill.chunk_path(chunk_index) + ".npz",
+            terms=np.array(list(terms), dtype=f"U{MAX_TOKEN_LENGTH}"),
+            term_rows=np.array(term_rows, dtype=np.int32),
+            doc_rows=np.array(doc_rows, dtype=np.int32),
+            tfs=np.array(tfs, dtype=np.uint16),
+            lengths=np.array(lengths, dtype=np.int32),
+            doc_ids=np.array(doc_ids, dtype="S64"),
+            **{f"facet_{field}": np.array([str(m.get(field) or "") for m in metadatas or [{}] * len(texts)])
+               for field in FACET_FIELDS},
+        )
+
+    def _spills(self):
+        for path in self.spill.chunks():
+            with np.load(path + ".npz") as spill:
+                yield {key: spill[key] for key in spill.files}
+
+    def finish(self):
+        """Merges the spills with a two-pass counting sort and swaps the index in."""
+        vocab = np.array([], dtype=f"U{MAX_TOKEN_LENGTH}")
+        for spill in self._spills():
+            vocab = np.union1d(vocab, spill["terms"])
+        df = np.zeros(len(vocab), dtype=np.int64)
+        lengths, doc_ids, facet_codes, facet_values = [], [], [], {field: {} for field in FACET_FIELDS}
+        for spill in self._spills():
+            global_terms = np.searchsorted(vocab, spill["terms"])[spill["term_rows"]]
+            df += np.bincount(global_terms, minlength=len(vocab))
+            lengths.append(spill["lengths"])
+            columns = {field: spill.get(f"facet_{field}", ()) for field in FACET_FIELDS}
+            facet_codes.append(facet_value_codes(facet_values, (
+                {field: str(values[row]) for field, values in columns.items() if len(values)}
+                for row in range(len(spill["lengths"])))))
+            doc_ids.append(spill["doc_ids"])
+        lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int32)
+        doc_ids = np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype="S64")
+        n_docs = len(lengths)
+        avgdl = float(lengths.mean()) if n_docs else 0.0
+
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        total = int(offsets[-1])
+        docs_out = np.lib.format.open_memmap(self.spill.output("docs.npy"), mode="w+", dtype=np.int32, shape=(total,))
+        weights_out = np.lib.format.open_memmap(self.spill.output("weights.npy"), mode="w+",
+                                                dtype=np.float32, shape=(total,))
+
+        cursor = offsets[:-1].copy()
+        doc_base = 0
+        for spill in self._spills():
+            global_terms = np.searchsorted(vocab, spill["terms"])[spill["term_rows"]]
+            docs = spill["doc_rows"] + doc_base
+            tf = spill["tfs"].astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / (avgdl or 1.0))
+            weight = idf[global_terms] * tf * (BM25_K1 + 1) / (tf + norm)
+
+            # Each posting goes to its term's next free slot
+            order = np.argsort(global_terms, kind="stable")
+            sorted_terms = global_terms[order]
+            group_start = np.searchsorted(sorted_terms, sorted_terms, side="left")
+            rank = np.arange(len(sorted_terms)) - group_start
+            positions = cursor[sorted_terms] + rank
+            docs_out[positions] = docs[order]
+            weights_out[positions] = weight[order]
+            cursor += np.bincount(global_terms, minlength=len(vocab))
+            doc_base += len(spill["lengths"])
+
+        docs_out.flush()
+        weights_out.flush()
+        del docs_out, weights_out
+        np.save(self.spill.output("vocab.npy"), vocab)
+        np.save(self.spill.output("offsets.npy"), offsets)
+        np.save(self.spill.output("doc_ids.npy"), doc_ids)
+        for field in FACET_FIELDS:
+            codes = [chunk[field] for chunk in facet_codes]
+            np.save(self.spill.output(f"facet_{field}.npy"), np.concatenate(codes) if codes else np.zeros(0, np.int32))
+        with open(self.spill.output("meta.json"), "w") as f:
+            json.dump({"documents": n_docs, "terms": len(vocab), "postings": total,
+                       "avgdl": avgdl, "k1": BM25_K1, "b": BM25_B, "facet_values": facet_values}, f)
+        self.spill.commit()
+
+
+class LexicalIndex:
+    """Read-only, memory-mapped BM25 index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vocab = np.load(os.path.join(path, "vocab.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.docs = np.load(os.path.join(path, "docs.npy"), mmap_mode="r")
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r")
+        self.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode="r")
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        # Indexes built before facet codes were stored can't be filtered
+        self.facet_codes = {field: np.load(os.path.join(path, f"facet_{field}.npy"), mmap_mode="r")
+                            for field in FACET_FIELDS} if "facet_values" in self.meta else None
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "meta.json"))
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def term_ids(self, text: str, max_terms: int = 64, max_df_ratio: float = 0.5) -> np.ndarray:
+        """Ids of the query's `max_terms` rarest terms, skipping those in over `max_df_ratio` of the documents."""
+        tokens = np.array(sorted(set(tokenize(text))), dtype=f"U{MAX_TOKEN_LENGTH}")
+        if not len(tokens) or not len(self.vocab):
+            return np.zeros(0, dtype=np.int64)
+        ids = np.searchsorted(self.vocab, tokens)
+        found = ids < len(self.vocab)
+        found[found] = self.vocab[ids[found]] == tokens[found]
+        ids = ids[found]
+        df = self.offsets[ids + 1] - self.offsets[ids]
+        keep = df <= max_df_ratio * max(len(self), 1)
+        ids, df = ids[keep], df[keep]
+        return ids[np.argsort(df, kind="stable")[:max_terms]]
+
+    def search(self, text: str, top_n: int = 50, where: dict = None) -> list:
+        """
+        Returns up to `top_n` (job id, BM25 score) pairs, best first.
+
+        `where` (a Chroma-style filter over the facet fields) is applied before ranking;
+        conditions on other fields are left to the caller.
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in self.term_ids(text):
+            start, end = self.offsets[term], self.offsets[term + 1]
+            # doc numbers are unique within a posting list, so fancy-index += is exact
+            scores[self.docs[start:end]] += self.weights[start:end]
+        if where and self.facet_codes is not None:
+            scores[~where_mask(where, self.facet_codes, self.meta["facet_values"], len(self), strict=False)] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_n:
+            candidates = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[i].decode("ascii"), float(scores[i])) for i in candidates]
+
+
+def load_lexical_index(chroma_path: str):
+    """Opens the index stored under `chroma_path`, or returns None if it hasn't been built."""
+    path = index_dir(chroma_path)
+    return LexicalIndex(path) if LexicalIndex.exists(path) else None
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60) -> list:
+    """
+    Fuses several ranked id lists: score(id) = sum over lists of 1 / (k + rank).
+
+    Returns (id, fused score) pairs, best first.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,88 @@
+"""
+LLM layer shared by the agents.
+
+`build_llm()` returns the model the agents talk to, chosen by LLM_BACKEND:
+
+- "gemini" (default): crewAI's LLM for LLM_MODEL, wrapped in `CachedLLM`. The
+  cache (off with LLM_CACHE=0) stores responses on disk keyed on model,
+  temperature and the normalized prompt, so a repeated or near-identical run
+  (same resume, same job results) costs no API calls. The wrapper also records
+  an `llm.call` span per call with its token counts (see tracing.py).
+- "stub": `StubLLM`, a deterministic local model that drives the crew through
+  its tool calls and returns outputs in each task's expected format. Lets the
+  whole pipeline run offline, e.g. in CI and in benchmarks.
+
+Both classes live in llm_backends.py, which (like crewAI) is only imported by
+`build_llm()`, so reading these settings stays cheap at app startup.
+"""
+import json
+import os
+import re
+
+from disk_cache import CACHE_DIR, DiskCache, content_hash
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini/gemini-2.5-flash")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+# OpenAI-compatible server to send LLM_MODEL ("openai/<name>") requests to instead, e.g. a proxy or
+# benchmarks/fake_llm_endpoint.py; its key is read from OPENAI_API_KEY
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+# Simulated response time of the stub model (benchmarks)
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+
+_WHITESPACE_RE = re.compile(r"\s+")
+TOKEN_TYPES = ("prompt_tokens", "completion_tokens", "cached_prompt_tokens")
+_llm_cache = None
+
+
+def get_llm_cache() -> DiskCache:
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = DiskCache(
+            os.path.join(CACHE_DIR, "llm_responses.sqlite"),
+            ttl_seconds=LLM_CACHE_TTL,
+            max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+        )
+    return _llm_cache
+
+
+def _message_text(content) -> str:
+    if isinstance(content, list):  # multimodal parts
+        content = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return _WHITESPACE_RE.sub(" ", str(content or "")).strip()
+
+
+def normalize_messages(messages) -> list:
+    """[(role, text with whitespace collapsed)] for a prompt string or a list of chat messages."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    return [(message.get("role", ""), _message_text(message.get("content"))) for message in messages]
+
+
+def llm_cache_key(model: str, temperature, messages, tools: list = None, response_model=None) -> str:
+    tool_names = sorted(str(tool.get("function", tool).get("name", "")) if isinstance(tool, dict) else str(tool)
+                        for tool in tools or [])
+    schema = getattr(response_model, "__name__", "") if response_model is not None else ""
+    return content_hash(model, temperature, json.dumps(normalize_messages(messages)), tool_names, schema)
+
+
+def build_llm():
+    """The crewAI LLM configured by LLM_BACKEND / LLM_MODEL / LLM_TEMPERATURE / LLM_BASE_URL / LLM_CACHE."""
+    from llm_backends import CachedLLM, StubLLM
+
+    if LLM_BACKEND == "stub":
+        return StubLLM()
+    from crewai import LLM
+
+    # Throttled calls are retried by CachedLLM (execution.py), not by the OpenAI SDK as well
+    endpoint = {"base_url": LLM_BASE_URL, "max_retries": 0} if LLM_BASE_URL else {}
+    return CachedLLM(LLM(model=LLM_MODEL, temperature=LLM_TEMPERATURE, **endpoint), use_cache=LLM_CACHE_ENABLED)
+
+
+def requires_api_key() -> bool:
+    """Whether the configured backend calls the Gemini API (the stub and LLM_BASE_URL endpoints run without its key)."""
+    return LLM_BACKEND != "stub" and not LLM_BASE_URL
@@ -0,0 +1,301 @@
+"""
+The crewAI LLM classes behind `llm.build_llm()`.
+
+Kept apart from llm.py so that the backend settings (e.g. `requires_api_key()`)
+can be read without importing crewAI; this module is only imported once an LLM
+is actually built.
+"""
+import json
+import re
+import threading
+import time
+from typing import Any
+
+from crewai import BaseLLM
+from crewai.llms.base_llm import call_stop_override
+from pydantic import BaseModel, PrivateAttr, ValidationError
+
+from disk_cache import DiskCache
+from execution import (LLM_EXPECTED_OUTPUT_TOKENS, call_with_retry, estimate_tokens, get_llm_limiter,
+                       is_throttling_error)
+from llm import (_WHITESPACE_RE, STUB_LLM_LATENCY_MS, TOKEN_TYPES, get_llm_cache, llm_cache_key,
+                 normalize_messages)
+from tracing import inc, observe, record_result_size, span
+
+
+def _token_counts(llm) -> dict:
+    usage = llm.get_token_usage_summary()
+    return {name: getattr(usage, name, 0) or 0 for name in TOKEN_TYPES}
+
+
+class CachedLLM(BaseLLM):
+    """
+    Wraps another crewAI LLM with the persistent response cache and tracing.
+
+    Plain-text and structured (`response_model`) responses are cached; tool-call
+    responses and calls that let the model execute tools itself
+    (`available_functions`) always go to the wrapped model. `use_cache=False`
+    keeps the tracing only.
+
+    Calls that reach the model go through the process-wide rate limiter and are
+    retried on throttling errors with jittered backoff (see execution.py).
+    crewAI's own retry of throttled calls only applies to the outermost LLM,
+    i.e. this wrapper, and gives up on the RetriesExhaustedError it ends with.
+    """
+
+    llm_type: str = "cached"
+    inner: Any = None
+    cache: Any = None
+    use_cache: bool = True
+    _reported_tokens: dict = PrivateAttr(default_factory=dict)
+    _tokens_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, inner, cache: DiskCache = None, use_cache: bool = True, **kwargs):
+        super().__init__(
+            inner=inner,
+            cache=cache,
+            use_cache=use_cache,
+            model=inner.model,
+            temperature=inner.temperature,
+            provider=getattr(inner, "provider", None) or "openai",
+            **kwargs,
+        )
+
+    def _cache(self) -> DiskCache:
+        return self.cache if self.cache is not None else get_llm_cache()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+             from_agent=None, response_model=None):
+        with span("llm.call", model=self.model, task=getattr(from_task, "name", None)) as current:
+            key = None
+            if self.use_cache and available_functions is None:
+                key = llm_cache_key(self.model, self.temperature, messages, tools, response_model)
+                cached = self._decode(self._cache().get(key), response_model)
+                current.set("cache_hit", cached is not None)
+                if cached is not None:
+                    record_result_size(current, "llm", cached)
+                    return cached
+
+            prompt = " ".join(text for _, text in normalize_messages(messages))
+            reserved = estimate_tokens(prompt) + LLM_EXPECTED_OUTPUT_TOKENS
+
+            def _attempt():
+                limiter = get_llm_limiter()
+                waited = limiter.acquire(reserved)
+                observe("stage_wait_seconds", waited, stage="llm")
+                current.add("rate_limit_wait_ms", round(waited * 1000, 1))
+                before = _token_counts(self.inner)
+                try:
+                    # The executor sets its stop words on this wrapper; pass them on to the real model
+                    with call_stop_override(self.inner, self.stop_sequences):
+                        return self.inner.call(messages, tools=tools, callbacks=callbacks,
+                                               available_functions=available_functions, from_task=from_task,
+                                               from_agent=from_agent, response_model=response_model)
+                except Exception as e:
+                    if is_throttling_error(e):
+                        inc("llm_rate_limited_total", model=self.model)
+                    raise
+                finally:
+                    # Without reported usage (e.g. a failed call) the reservation stands
+                    limiter.settle(reserved, self._record_tokens(current, before) or reserved)
+
+            result = call_with_retry(_attempt, label=self.model)
+
+            text = result.model_dump_json() if isinstance(result, BaseModel) else result
+            if isinstance(text, str):
+                record_result_size(current, "llm", text)
+                if key is not None and text.strip():
+                    self._cache().put(key, text)
+            return result
+
+    @staticmethod
+    def _decode(cached: str, response_model):
+        """A cached response as the caller expects it: the `response_model` instance, or the text."""
+        if cached is None or response_model is None:
+            return cached
+        try:
+            return response_model.model_validate_json(cached)
+        except ValidationError:
+            return None  # treat as a miss and ask the model again
+
+    def _record_tokens(self, current, before: dict) -> int:
+        """Records the call's token usage; returns its prompt plus completion tokens."""
+        # The inner LLM's counters are cumulative and shared by concurrent calls, so the span gets
+        # this call's delta (approximate when calls overlap) while the metrics get the exact growth.
+        after = _token_counts(self.inner)
+        for name in TOKEN_TYPES:
+            current.set(name, after[name] - before[name])
+        with self._tokens_lock:
+            for name in TOKEN_TYPES:
+                growth = after[name] - self._reported_tokens.get(name, 0)
+                if growth > 0:
+                    self._reported_tokens[name] = after[name]
+                    inc("llm_tokens_total", growth, model=self.model, type=name.replace("_tokens", ""))
+        return sum(after[name] - before[name] for name in ("prompt_tokens", "completion_tokens"))
+
+    def supports_function_calling(self) -> bool:
+        return bool(getattr(self.inner, "supports_function_calling", lambda: False)())
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.inner.get_token_usage_summary()
+
+
+# --- Deterministic stub -------------------------------------------------------
+
+STUB_SKILLS = [
+    "python", "sql", "java", "javascript", "typescript", "react", "aws", "azure", "gcp", "docker",
+    "kubernetes", "spark", "pandas", "machine learning", "deep learning", "tableau", "excel",
+    "communication", "leadership", "project management", "patient care", "accounting",
+]
+STUB_ROLES = [
+    "data scientist", "data engineer", "data analyst", "software engineer", "product manager",
+    "registered nurse", "accountant", "marketing manager", "project manager",
+]
+CONTEXT_SEPARATOR = "\n\n----------\n\n"  # how crewAI joins the outputs of context tasks
+
+
+def _last_observation(messages) -> str:
+    """The latest tool result fed back to the model, or None before any tool ran."""
+    roles = [m.get("role") for m in messages]
+    if "user" not in roles:
+        return None
+    # The system prompt explains the format with a sample "Observation:" line; skip it
+    for message in reversed(messages[roles.index("user") + 1:]):
+        text = str(message.get("content") or "")
+        if "Observation:" in text:
+            return text.rsplit("Observation:", 1)[1].strip()
+    return None
+
+
+def _tool_name(prompt: str, name: str) -> str:
+    """The name crewAI lists the tool under in the ReAct prompt (e.g. "PDF Reader" -> "pdf_reader")."""
+    listed = re.search(r"only one name of \[([^\]]*)\]", prompt)
+    sanitized = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+    if listed and name not in [n.strip() for n in listed.group(1).split(",")]:
+        return sanitized
+    return name
+
+
+def _task_context(prompt: str) -> list:
+    """The outputs of the task's context tasks, in order."""
+    marker = "This is the context you're working with:"
+    if marker not in prompt:
+        return []
+    context = prompt.split(marker, 1)[1]
+    # crewAI closes the prompt with "Begin! ..." (agents with tools) or "Provide your complete response:"
+    context = re.split(r"\n\s*(?:Begin! This is VERY important|Provide your complete response:)", context)[0]
+    return [part.strip() for part in context.split(CONTEXT_SEPARATOR) if part.strip()]
+
+
+def _summarize(text: str) -> dict:
+    lowered = text.lower()
+    years = [int(y) for y in re.findall(r"(\d{1,2})\+?\s*years", lowered)]
+    total = max(years) if years else 3
+    level = "juinor" if total < 3 else "mid" if total < 6 else "mid-senior" if total < 10 else "senior"
+    location = re.search(r"\b(united states|canada|australia|united kingdom)\b", lowered)
+    return {
+        "role": next((role.title() for role in STUB_ROLES if role in lowered), "Software Engineer"),
+        "skills": [skill for skill in STUB_SKILLS if skill in lowered] or ["communication"],
+        "summary": _WHITESPACE_RE.sub(" ", text)[:300],
+        "experience": f"{total} years ({level})",
+        "last_location": location.group(1).title() if location else "United States",
+    }
+
+
+def _resume_markdown(details: dict) -> str:
+    skills = "\n".join(f"- {skill}" for skill in details.get("skills", []))
+    return (
+        f"# {details.get('role', 'Professional')}\n\n"
+        f"**Experience:** {details.get('experience', '')}  \n**Location:** {details.get('last_location', '')}\n\n"
+        f"## Summary\n\n{details.get('summary', '')}\n\n## Skills\n\n{skills}\n"
+    )
+
+
+class StubLLM(BaseLLM):
+    """
+    Deterministic offline model for the job analysis crew.
+
+    Recognizes the crew's tasks by name, calls their tools in crewAI's ReAct
+    format, and builds each final answer from the task context with simple
+    rules, so identical inputs always give identical outputs. Structured-output
+    calls (`response_model`) get the model's JSON instead of a ReAct answer.
+    Unknown tasks get a fixed final answer. `latency_ms` makes every call sleep
+    like a remote model.
+    """
+
+    llm_type: str = "stub"
+    latency_ms: float = 0.0
+
+    def __init__(self, model: str = "stub/job-analysis", latency_ms: float = STUB_LLM_LATENCY_MS, **kwargs):
+        super().__init__(model=model, temperature=0.0, provider="stub", latency_ms=latency_ms, **kwargs)
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
+
+    @staticmethod
+    def _final(answer: str) -> str:
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    @staticmethod
+    def _action(tool: str, arguments: dict) -> str:
+        return f"Thought: I should use the {tool} tool.\nAction: {tool}\nAction Input: {json.dumps(arguments)}"
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+             from_agent=None, response_model=None):
+        with span("llm.call", model=self.model, task=getattr(from_task, "name", None)) as current:
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            response = self._respond(messages, from_task, response_model)
+            record_result_size(current, "llm", response)
+            return response
+
+    def _respond(self, messages, from_task, response_model=None) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        prompt = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") != "assistant")
+        observation = _last_observation(messages)
+        context = _task_context(prompt)
+        task = getattr(from_task, "name", None) or ""
+
+        if not task and "extract discrete, reusable memory statements" in prompt:
+            # The reader agent's memory; one statement per non-empty line of the content
+            content = prompt.split("Content:", 1)[-1].rsplit("Extract memory statements", 1)[0]
+            lines = [line.strip() for line in content.splitlines() if line.strip()]
+            return json.dumps({"memories": lines[:5]})
+
+        if task == "read_pdf_task":
+            if observation is not None:
+                return self._final(observation)
+            path = re.search(r"located at (\S+?\.pdf)", prompt, re.IGNORECASE)
+            return self._action(_tool_name(prompt, "PDF Reader"), {"pdf_path": path.group(1) if path else ""})
+
+        if task == "summarize_text_task":
+            details = _summarize(context[0] if context else prompt)
+            return self._final(json.dumps(details)[1:-1])  # the bare '"role": ...' form the task asks for
+
+        if task == "job_searcher_task":
+            if observation is not None:
+                return self._final(observation)
+            return self._action(_tool_name(prompt, "Job Searcher"), {"resume_details": context[0] if context else ""})
+
+        if task == "resume_drafting_task":
+            summary = context[-1] if context else ""
+            try:
+                details = json.loads("{" + summary + "}")
+            except json.JSONDecodeError:
+                details = _summarize(summary)
+            markdown = _resume_markdown(details)
+            if response_model is not None:
+                return json.dumps({"markdown": markdown})  # the EnhancedResume schema
+            return self._final(markdown)
+
+        return self._final("Done.")
@@ -0,0 +1,228 @@
+"""
+Streaming PDF text extraction.
+
+Pages are yielded one at a time, long documents are split into page ranges
+and extracted on a process pool, and the text is joined once at the end.
+Per-document limits (file size, page count, extracted characters) and a
+per-page time limit (skipped pages are reported) keep a pathological upload
+from pinning a worker.
+
+Can be used without the agent:
+
+    python pdf_extract.py resume.pdf
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from tracing import current_span, inc
+
+MAX_PDF_BYTES = int(float(os.getenv("MAX_PDF_MB", "20")) * 1024 * 1024)
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "50"))
+MAX_PDF_CHARS = int(os.getenv("MAX_PDF_CHARS", "200000"))
+# Documents with more pages than this are spread over the process pool
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "16"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages taking longer than this to extract are skipped (0 = no limit)
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "10"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PDFTooLargeError(ValueError):
+    """Raised when an upload exceeds the per-document size limit."""
+
+
+class _PageTimeout(Exception):
+    pass
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already holds torch/chroma threads is not safe
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def check_pdf_size(pdf_path: str, max_bytes: int = MAX_PDF_BYTES):
+    size = os.path.getsize(pdf_path)
+    if size > max_bytes:
+        raise PDFTooLargeError(f"PDF is {size / 1024 / 1024:.1f} MB; the limit is {max_bytes / 1024 / 1024:.1f} MB.")
+
+
+def _page_limit(page_count: int, max_pages: int) -> int:
+    return min(page_count, max_pages) if max_pages else page_count
+
+
+def _raise_page_timeout(signum, frame):
+    raise _PageTimeout()
+
+
+@contextmanager
+def _alarm(seconds: float):
+    previous = signal.signal(signal.SIGALRM, _raise_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _can_alarm() -> bool:
+    """SIGALRM only interrupts the main thread (and doesn't exist on Windows)."""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def _page_text(reader, index: int, timeout: float):
+    """The page's text, or None when extracting it takes longer than `timeout` seconds."""
+    def extract():
+        # extract_text() returns None for pages without a text layer
+        return reader.pages[index].extract_text() or ""
+
+    if not timeout or not _can_alarm():
+        return extract()
+    try:
+        with _alarm(timeout):
+            return extract()
+    except _PageTimeout:
+        return None
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int, page_timeout: float) -> list:
+    from PyPDF2 import PdfReader
+    reader = PdfReader(pdf_path)
+    return [_page_text(reader, index, page_timeout) for index in range(start, stop)]
+
+
+def _report_skipped(page_number: int, skipped: list):
+    inc("pdf_pages_skipped_total")
+    current_span().add("pages_skipped")
+    if skipped is not None:
+        skipped.append(page_number)
+
+
+def iter_pages(pdf_path: str, max_pages: int = MAX_PDF_PAGES, workers: int = PDF_WORKERS,
+               page_timeout: float = PDF_PAGE_TIMEOUT, skipped: list = None):
+    """
+    Yields the text of each page in order, up to `max_pages` pages.
+
+    Short documents are read in-process, long ones across the process pool (one
+    page range per worker, yielded as each range completes in order). Off the main
+    thread, where the page time limit can't interrupt a page, every document goes
+    to the pool.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        max_pages (int): Only the first `max_pages` pages are read.
+        workers (int): Process pool size for long documents (1 disables the pool).
+        page_timeout (float): Pages taking longer than this many seconds are skipped (0 = no limit).
+        skipped (list): If given, the 1-based numbers of skipped pages are appended to it.
+
+    Raises:
+        PDFTooLargeError: If the file exceeds MAX_PDF_MB.
+    """
+    from PyPDF2 import PdfReader
+
+    check_pdf_size(pdf_path)
+    reader = PdfReader(pdf_path)
+    page_count = _page_limit(len(reader.pages), max_pages)
+
+    in_process = workers <= 1 or page_count <= PARALLEL_PAGE_THRESHOLD
+    if in_process and page_timeout and hasattr(signal, "setitimer") and not _can_alarm():
+        in_process, workers = False, max(1, workers)
+    if in_process:
+        ranges = None
+        texts = (_page_text(reader, index, page_timeout) for index in range(page_count))
+    else:
+        chunk = -(-page_count // workers)  # ceil division
+        pool = _get_pool()
+        ranges = [pool.submit(_extract_page_range, pdf_path, start, min(start + chunk, page_count), page_timeout)
+                  for start in range(0, page_count, chunk)]
+        texts = (text for future in ranges for text in future.result())
+    try:
+        for page_number, text in enumerate(texts, start=1):
+            if text is None:
+                _report_skipped(page_number, skipped)
+                continue
+            yield text
+    finally:
+        for future in ranges or ():
+            future.cancel()  # the caller stopped early
+
+
+def extract_text(pdf_path: str, max_pages: int = MAX_PDF_PAGES, max_chars: int = MAX_PDF_CHARS,
+                 workers: int = PDF_WORKERS, page_timeout: float = PDF_PAGE_TIMEOUT, skipped: list = None) -> str:
+    """
+    Extracts the text of a PDF, reading no further pages once `max_chars` characters are in.
+
+    Args:
+        pdf_path (str): Path to the PDF file.
+        max_pages (int): Only the first `max_pages` pages are read.
+        max_chars (int): The joined text is truncated to this many characters.
+        workers (int): Process pool size for long documents (1 disables the pool).
+        page_timeout (float): Pages taking longer than this many seconds are skipped (0 = no limit).
+        skipped (list): If given, the 1-based numbers of skipped pages are appended to it.
+
+    Returns:
+        str: The page texts joined by newlines.
+
+    Raises:
+        PDFTooLargeError: If the file exceeds MAX_PDF_MB.
+    """
+    pages, length = [], 0
+    for page in iter_pages(pdf_path, max_pages=max_pages, workers=workers, page_timeout=page_timeout,
+                           skipped=skipped):
+        pages.append(page)
+        length += len(page) + 1
+        if max_chars and length > max_chars:
+            break
+    text = "\n".join(pages)
+    return text[:max_chars] if max_chars else text
+
+
+def extract_texts(pdf_paths: list, max_pages: int = MAX_PDF_PAGES, max_chars: int = MAX_PDF_CHARS):
+    """
+    Extracts many PDFs, one document per pool worker, yielding (path, text or exception) in input order.
+    """
+    pool = _get_pool()
+    futures = [pool.submit(extract_text, path, max_pages, max_chars, 1) for path in pdf_paths]
+    for path, future in zip(pdf_paths, futures):
+        try:
+            yield path, future.result()
+        except Exception as e:  # a broken PDF shouldn't stop the rest of the batch
+            yield path, e
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the text of a PDF without going through the agents.")
+    parser.add_argument("pdf_path")
+    parser.add_argument("--max-pages", type=int, default=MAX_PDF_PAGES)
+    parser.add_argument("--max-chars", type=int, default=MAX_PDF_CHARS)
+    parser.add_argument("--workers", type=int, default=PDF_WORKERS)
+    parser.add_argument("--page-timeout", type=float, default=PDF_PAGE_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    skipped = []
+    try:
+        text = extract_text(args.pdf_path, max_pages=args.max_pages, max_chars=args.max_chars, workers=args.workers,
+                            page_timeout=args.page_timeout, skipped=skipped)
+    except PDFTooLargeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if skipped:
+        print(f"Skipped pages that took longer than {args.page_timeout}s: {skipped}", file=sys.stderr)
+    sys.stdout.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
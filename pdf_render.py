@@ -0,0 +1,346 @@
+"""
+Markdown-to-PDF rendering for the enhanced resume.
+
+The Markdown is converted to HTML once and walked in a single pass by an
+HTMLParser that emits reportlab flowables directly: headings, paragraphs,
+nested bullet and numbered lists (paragraphs with hanging bullets, which lay
+out in one pass unlike ListFlowable), code blocks, quotes and rules, with
+bold/italic/code/link markup kept inline. Paragraph styles are
+built once at import. Rendered PDFs are kept in an in-process LRU keyed by the
+hash of the Markdown, so Streamlit reruns and repeat downloads cost nothing;
+`render_pdfs` renders a batch on a process pool.
+
+Can be used without the app:
+
+    python pdf_render.py resume.md another.md --out-dir pdfs/
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from html.parser import HTMLParser
+
+import markdown
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import HRFlowable, Paragraph, Preformatted, SimpleDocTemplate
+
+from disk_cache import content_hash
+from execution import cpu_stage
+from tracing import record_cache, span
+
+PDF_RENDER_CACHE_MB = float(os.getenv("PDF_RENDER_CACHE_MB", "64"))
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+PAGE_MARGIN = 0.8 * inch
+LIST_INDENT = 14  # points per nesting level
+MAX_LIST_DEPTH = 4
+
+
+def _build_styles() -> dict:
+    body = ParagraphStyle("Body", fontName="Helvetica", fontSize=11, leading=14, spaceAfter=8)
+    return {
+        "h1": ParagraphStyle("Heading1", parent=body, fontName="Helvetica-Bold", fontSize=16, leading=20,
+                             spaceBefore=8, spaceAfter=10),
+        "h2": ParagraphStyle("Heading2", parent=body, fontName="Helvetica-Bold", fontSize=13, leading=16,
+                             spaceBefore=8, spaceAfter=10),
+        "h3": ParagraphStyle("Heading3", parent=body, fontName="Helvetica-Bold", fontSize=12, leading=15,
+                             spaceBefore=6, spaceAfter=8),
+        "body": body,
+        **{f"list{depth}": ParagraphStyle(f"ListItem{depth}", parent=body, spaceAfter=2,
+                                         leftIndent=LIST_INDENT * depth, bulletIndent=LIST_INDENT * (depth - 1) + 2)
+           for depth in range(1, MAX_LIST_DEPTH + 1)},
+        "quote": ParagraphStyle("Quote", parent=body, leftIndent=18, textColor=colors.HexColor("#444444")),
+        "code": ParagraphStyle("Code", parent=body, fontName="Courier", fontSize=9, leading=11, leftIndent=12),
+    }
+
+
+STYLES = _build_styles()
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADING_TAGS | {"p", "li", "blockquote", "pre", "ul", "ol", "hr", "div"}
+# HTML inline tags -> reportlab paragraph markup
+INLINE_TAGS = {"strong": "b", "b": "b", "em": "i", "i": "i", "u": "u", "s": "strike", "del": "strike",
+               "sup": "super", "sub": "sub"}
+
+
+class _FlowableBuilder(HTMLParser):
+    """Turns the HTML of a Markdown document into a list of reportlab flowables."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.flowables = []
+        self._markup = []  # inline markup of the block being read
+        self._open_inline = []  # reportlab tags to close, innermost last
+        self._lists = []  # next number of each open list (None for bullet lists), outermost first
+        self._bullet = None  # bullet of the list item whose first paragraph hasn't been emitted yet
+        self._quote_depth = 0
+        self._pre = None  # raw text of an open <pre> block
+
+    def _flush(self, style_name: str = None):
+        markup = "".join(self._markup).strip()
+        self._markup = []
+        if not markup:
+            return
+        markup += "".join(f"</{tag}>" for tag in reversed(self._open_inline))  # never leave a tag open
+        if style_name is None and self._lists:
+            style_name = f"list{min(len(self._lists), MAX_LIST_DEPTH)}"
+        elif style_name is None:
+            style_name = "quote" if self._quote_depth else "body"
+        # Only the first paragraph of a list item carries its bullet; later ones hang under it
+        bullet, self._bullet = self._bullet, None
+        try:
+            paragraph = Paragraph(markup, STYLES[style_name], bulletText=bullet)
+        except ValueError:  # markup reportlab can't parse; keep the text
+            paragraph = Paragraph(escape(_strip_markup(markup)), STYLES[style_name], bulletText=bullet)
+        self.flowables.append(paragraph)
+
+    def handle_starttag(self, tag, attrs):
+        if self._pre is not None:
+            return
+        if tag in BLOCK_TAGS:
+            self._flush()
+            self._open_inline = []
+        if tag == "ul":
+            self._lists.append(None)
+        elif tag == "ol":
+            start = dict(attrs).get("start")
+            self._lists.append(int(start) if start and start.isdigit() else 1)
+        elif tag == "li" and self._lists:
+            number = self._lists[-1]
+            if number is None:
+                self._bullet = "\u2022" if len(self._lists) % 2 else "\u2013"
+            else:
+                self._bullet, self._lists[-1] = f"{number}.", number + 1
+        elif tag == "blockquote":
+            self._quote_depth += 1
+        elif tag == "pre":
+            self._pre = []
+        elif tag == "hr":
+            self.flowables.append(HRFlowable(width="100%", thickness=0.5, color=colors.grey,
+                                                spaceBefore=4, spaceAfter=8))
+        elif tag == "br":
+            self._markup.append("<br/>")
+        elif tag in INLINE_TAGS:
+            self._open_inline.append(INLINE_TAGS[tag])
+            self._markup.append(f"<{INLINE_TAGS[tag]}>")
+        elif tag == "code":
+            self._open_inline.append("font")
+            self._markup.append('<font face="Courier">')
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self._open_inline.append("a")
+                self._markup.append(f'<a href="{escape(href)}" color="blue">')
+
+    def handle_endtag(self, tag):
+        if self._pre is not None:
+            if tag == "pre":
+                text = "".join(self._pre).rstrip("\n")
+                self._pre = None
+                if text:
+                    self.flowables.append(Preformatted(text, STYLES["code"]))
+            return
+        if tag in HEADING_TAGS:
+            self._flush(tag if tag in STYLES else "h3")
+        elif tag in ("p", "li", "div"):
+            self._flush()
+        elif tag == "blockquote":
+            self._flush()
+            self._quote_depth = max(0, self._quote_depth - 1)
+        elif tag in ("ul", "ol") and self._lists:
+            self._flush()
+            self._lists.pop()
+        elif (tag in INLINE_TAGS or tag in ("code", "a")) and self._open_inline:
+            reportlab_tag = INLINE_TAGS.get(tag, "font" if tag == "code" else "a")
+            if reportlab_tag in self._open_inline:
+                # close (and drop) everything opened after it as well
+                while self._open_inline:
+                    closing = self._open_inline.pop()
+                    self._markup.append(f"</{closing}>")
+                    if closing == reportlab_tag:
+                        break
+
+    def handle_data(self, data):
+        if self._pre is not None:
+            self._pre.append(data)
+        elif data.strip() or self._markup:  # whitespace between blocks is dropped
+            self._markup.append(escape(_collapse(data), quote=False))
+
+    def close(self) -> list:
+        super().close()
+        self._flush()
+        return self.flowables
+
+
+def _collapse(text: str) -> str:
+    """Collapses whitespace runs to single spaces, keeping a space at either end if there was one."""
+    words = " ".join(text.split())
+    if not words:
+        return " "
+    return (" " if text[:1].isspace() else "") + words + (" " if text[-1:].isspace() else "")
+
+
+def _strip_markup(markup: str) -> str:
+    parser = HTMLParser(convert_charrefs=True)
+    chunks = []
+    parser.handle_data = chunks.append
+    parser.feed(markup)
+    parser.close()
+    return "".join(chunks)
+
+
+def markdown_to_flowables(markdown_text: str) -> list:
+    """Converts Markdown into reportlab flowables in one pass over its HTML."""
+    builder = _FlowableBuilder()
+    builder.feed(markdown.markdown(markdown_text or ""))
+    return builder.close()
+
+
+def _render(markdown_text: str) -> bytes:
+    pdf_io = io.BytesIO()
+    doc = SimpleDocTemplate(pdf_io, pagesize=letter, leftMargin=PAGE_MARGIN, rightMargin=PAGE_MARGIN,
+                            topMargin=PAGE_MARGIN, bottomMargin=PAGE_MARGIN)
+    # reportlab can't build an empty story
+    doc.build(markdown_to_flowables(markdown_text) or [Paragraph("", STYLES["body"])])
+    return pdf_io.getvalue()
+
+
+class _RenderCache:
+    """Thread-safe LRU of rendered PDF bytes, bounded by total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        record_cache("pdf_render", value is not None)
+        return value
+
+    def put(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self._size += len(value) - (len(previous) if previous is not None else 0)
+            self._entries[key] = value
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_cache = _RenderCache(int(PDF_RENDER_CACHE_MB * 1024 * 1024))
+
+
+def render_pdf(markdown_text: str, use_cache: bool = True) -> bytes:
+    """
+    Renders Markdown into PDF bytes (letter size, 0.8in margins).
+
+    Args:
+        markdown_text (str): The document, e.g. the enhanced resume.
+        use_cache (bool): Serve and store the result in the render cache.
+
+    Returns:
+        bytes: The PDF document.
+    """
+    key = content_hash(markdown_text or "")
+    if use_cache:
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+    with span("pdf.render", markdown_chars=len(markdown_text or "")) as current, cpu_stage("pdf_render"):
+        pdf_bytes = _render(markdown_text)
+        current.set("pdf_bytes", len(pdf_bytes))
+    if use_cache:
+        _cache.put(key, pdf_bytes)
+    return pdf_bytes
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already holds torch/chroma threads is not safe
+            _pool = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def render_pdfs(markdown_texts: list, use_cache: bool = True):
+    """
+    Renders many documents, cache misses on the process pool (PDF_RENDER_WORKERS).
+
+    Yields:
+        (index, PDF bytes or the exception raised while rendering), in input order.
+    """
+    keys = [content_hash(text or "") for text in markdown_texts]
+    pool = _get_pool()
+    futures = {}
+    for index, (key, text) in enumerate(zip(keys, markdown_texts)):
+        cached = _cache.get(key) if use_cache else None
+        futures[index] = cached if cached is not None else pool.submit(_render, text)
+
+    for index, key in enumerate(keys):
+        result = futures[index]
+        if isinstance(result, bytes):
+            yield index, result
+            continue
+        try:
+            pdf_bytes = result.result()
+        except Exception as e:  # one bad document shouldn't stop the rest of the batch
+            yield index, e
+            continue
+        if use_cache:
+            _cache.put(key, pdf_bytes)
+        yield index, pdf_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Markdown files to PDF without going through the app.")
+    parser.add_argument("markdown_paths", nargs="+")
+    parser.add_argument("--out-dir", default=".", help="Directory for the PDFs (named after the inputs)")
+    args = parser.parse_args(argv)
+
+    texts = []
+    for path in args.markdown_paths:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    failed = 0
+    for index, result in render_pdfs(texts, use_cache=False):
+        source = args.markdown_paths[index]
+        if isinstance(result, Exception):
+            print(f"{source}: {result}", file=sys.stderr)
+            failed += 1
+            continue
+        out_path = os.path.join(args.out_dir, os.path.splitext(os.path.basename(source))[0] + ".pdf")
+        with open(out_path, "wb") as f:
+            f.write(result)
+        print(out_path)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Process-wide registry for the heavy resources used by the tools.
+
+The sentence encoder (behind the EMBEDDING_BACKEND of embeddings.py) and the job index (the Chroma collection, or
+the flat memory-mapped store when JOB_INDEX_BACKEND=flat) are loaded once per
+process and shared by every tool call and every thread. Each resource
+keeps load-time and hit/miss counters so steady-state reuse can be verified.
+"""
+import os
+import threading
+import time
+
+from tracing import span
+
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
+COLLECTION_NAME = os.getenv("CHROMA_COLLECTION", "jobs")
+# "chroma" (HNSW, approximate) or "flat" (memory-mapped store, exact top-k; see flat_store.py)
+JOB_INDEX_BACKEND = os.getenv("JOB_INDEX_BACKEND", "chroma")
+_MISSING = object()
+# Written into CHROMA_PATH by the index build; any rebuild changes its contents.
+INDEX_VERSION_FILE = "INDEX_VERSION"
+
+
+class ResourceRegistry:
+    """Thread-safe, lazily populated registry of named shared resources."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._versions = {}
+        self._resources = {}
+        self._loaded_versions = {}
+        self._locks = {}
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self.warm_up_names = []
+
+    def register(self, name: str, loader, warm_up: bool = False, version=None):
+        """
+        Registers a zero-argument loader for `name`. Nothing is loaded yet.
+
+        Args:
+            name (str): Resource name passed to `get`.
+            loader (callable): Builds the resource; a None result (nothing to load yet) is not cached.
+            warm_up (bool): Also load it in `warm_up()`, ahead of first use.
+            version (callable): Returns a token for what the resource is loaded from; a loaded
+                resource is reloaded once the token changes.
+        """
+        self._loaders[name] = loader
+        self._versions[name] = version
+        if warm_up and name not in self.warm_up_names:
+            self.warm_up_names.append(name)
+        self._locks.setdefault(name, threading.Lock())
+        self._stats.setdefault(name, {"hits": 0, "misses": 0, "loads": 0, "load_seconds": 0.0})
+
+    def _current(self, name: str, version):
+        resource = self._resources.get(name, _MISSING)
+        if resource is not _MISSING and self._loaded_versions.get(name) != version:
+            return _MISSING
+        return resource
+
+    def get(self, name: str):
+        """Returns the resource, loading it on first use or when its version changed (double-checked per name)."""
+        version = self._versions[name]() if self._versions[name] else None
+        resource = self._current(name, version)
+        if resource is not _MISSING:
+            self._count(name, "hits")
+            return resource
+
+        with self._locks[name]:
+            resource = self._current(name, version)
+            if resource is not _MISSING:
+                # Another thread finished loading while we waited on the lock.
+                self._count(name, "hits")
+                return resource
+
+            self._count(name, "misses")
+            started = time.perf_counter()
+            with span("resource.load", resource=name):
+                resource = self._loaders[name]()
+            elapsed = time.perf_counter() - started
+            if resource is not None:
+                self._resources[name] = resource
+                self._loaded_versions[name] = version
+            with self._stats_lock:
+                self._stats[name]["loads"] += 1
+                self._stats[name]["load_seconds"] += elapsed
+            return resource
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resources
+
+    def invalidate(self, name: str):
+        """Drops a loaded resource so the next `get` reloads it (e.g. after an index rebuild)."""
+        with self._locks[name]:
+            self._resources.pop(name, None)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the per-resource counters."""
+        with self._stats_lock:
+            return {name: dict(counters, loaded=name in self._resources)
+                    for name, counters in self._stats.items()}
+
+    def _count(self, name: str, key: str):
+        with self._stats_lock:
+            self._stats[name][key] += 1
+
+
+def _load_embedding_model():
+    from embeddings import load_embedding_backend, set_thread_count, thread_count
+
+    set_thread_count(thread_count())
+    return load_embedding_backend(EMBEDDING_MODEL_NAME)
+
+
+def _load_chroma_client():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+
+def _load_jobs_collection():
+    return registry.get("chroma_client").get_or_create_collection(
+        name=COLLECTION_NAME,
+        metadata={"hnsw:space": "cosine"}  # use cosine similarity
+    )
+
+
+def _load_flat_index():
+    from flat_store import load_flat_index, store_dir
+    index = load_flat_index(CHROMA_PATH)
+    if index is None:
+        raise FileNotFoundError(
+            f"JOB_INDEX_BACKEND=flat but no flat store was found at {store_dir(CHROMA_PATH)}; "
+            "build it with `python ingest.py --flat-store float16` or `python flat_store.py export`."
+        )
+    return index
+
+
+def _load_lexical_index():
+    from lexical_index import load_lexical_index
+    return load_lexical_index(CHROMA_PATH)  # None when the index was built without one
+
+
+def index_version_stamp() -> str:
+    """Contents of the INDEX_VERSION marker the index build writes ("" before the first build)."""
+    try:
+        with open(os.path.join(CHROMA_PATH, INDEX_VERSION_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+registry = ResourceRegistry()
+registry.register("embedding_model", _load_embedding_model)
+registry.register("chroma_client", _load_chroma_client)
+# Reopened after a rebuild, which recreates the collection and rewrites the files next to it
+registry.register("jobs_collection", _load_jobs_collection, version=index_version_stamp)
+registry.register("flat_index", _load_flat_index, version=index_version_stamp)
+registry.register("lexical_index", _load_lexical_index, version=index_version_stamp)
+
+
+def get_embedding_model():
+    return registry.get("embedding_model")
+
+
+def get_chroma_client():
+    return registry.get("chroma_client")
+
+
+def get_jobs_collection():
+    return registry.get("jobs_collection")
+
+
+def get_job_index():
+    """The index searched for jobs: the Chroma collection or the flat store, per JOB_INDEX_BACKEND."""
+    if JOB_INDEX_BACKEND == "flat":
+        return registry.get("flat_index")
+    return get_jobs_collection()
+
+
+def get_lexical_index():
+    return registry.get("lexical_index")
+
+
+def jobs_index_version() -> str:
+    """Identifies the current contents of the job index; changes whenever the index is rebuilt."""
+    collection = get_job_index()
+    return f"{collection.id}:{collection.count()}:{index_version_stamp()}"
+
+
+def resource_stats() -> dict:
+    return registry.stats()
+
+
+def warm_up(background: bool = False):
+    """
+    Loads the resources registered with `warm_up=True` (e.g. the job analysis
+    crew, see crew.py), then the encoder and the job index, ahead of first use.
+
+    Args:
+        background (bool): Load on a daemon thread and return it instead of blocking.
+
+    Returns:
+        threading.Thread | None: The warm-up thread when `background` is set.
+    """
+    def _load_all():
+        # In registration order; the crew comes first since an analysis needs it before the first search
+        for name in registry.warm_up_names:
+            registry.get(name)
+        get_embedding_model()
+        get_job_index()
+
+    if not background:
+        _load_all()
+        return None
+
+    thread = threading.Thread(target=_load_all, name="resource-warm-up", daemon=True)
+    thread.start()
+    return thread
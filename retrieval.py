@@ -0,0 +1,183 @@
+"""
+Job retrieval shared by JobSearcherTool and the batch matcher.
+
+Resumes are encoded together in one batch (resume texts seen before come from
+the query embedding cache, see embeddings.py) and sent to the job index (Chroma,
+or the flat store with JOB_INDEX_BACKEND=flat) as a single multi-query, so
+matching many resumes costs one encoder pass and one query. Both backends
+report cosine distances; results carry `similarity_score = 1 - distance`,
+best match first.
+When the index has a BM25 companion (lexical_index.py), vector hits are fused
+with exact keyword hits by reciprocal rank fusion.
+Reposts of one job (postings sharing a `cluster_id`, see dedupe.py) are
+collapsed to their best-ranked posting; the index is over-fetched so that
+top_k distinct jobs remain.
+"""
+import json
+import os
+
+import numpy as np
+
+from dedupe import collapse_clusters
+from embeddings import encode_queries
+from facets import build_where, filters_from_resume
+from lexical_index import reciprocal_rank_fusion
+from resources import JOB_INDEX_BACKEND, get_embedding_model, get_job_index, get_lexical_index
+from tracing import span
+
+ENCODE_BATCH_SIZE = 64
+# Hybrid retrieval: vector and BM25 candidate lists of FUSION_DEPTH each, fused by reciprocal rank
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+FUSION_DEPTH = int(os.getenv("FUSION_DEPTH", "50"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Near-duplicate collapse: DEDUP_OVERFETCH times top_k candidates, then one job per cluster
+DEDUP_COLLAPSE = os.getenv("DEDUP_COLLAPSE", "1") == "1"
+DEDUP_OVERFETCH = int(os.getenv("DEDUP_OVERFETCH", "3"))
+
+
+def parse_resume_details(resume_details) -> dict:
+    """
+    Parses the summarizer's resume details into a dict.
+
+    Accepts a dict, a JSON object, the bare '"role": ..., "skills": ...' form the
+    summarizer is asked for, or free text (returned as {"text": ...}).
+    """
+    if isinstance(resume_details, dict):
+        return resume_details
+    text = str(resume_details).strip()
+    for candidate in (text, "{" + text.strip("'") + "}"):
+        try:
+            parsed = json.loads(candidate)
+        except (TypeError, json.JSONDecodeError):
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+    return {"text": text}
+
+
+def resume_to_text(resume_details) -> str:
+    """Flattens the summarizer's resume details (JSON string, dict or free text) into embedding text."""
+    resume_dict = parse_resume_details(resume_details)
+
+    # Convert dict to text for embedding
+    return " ".join([f"{k}: {v}" for k, v in resume_dict.items() if v])
+
+
+def _job(similarity: float, metadata: dict) -> dict:
+    # Chroma doesn't keep metadata keys in a fixed order; sort them so identical searches
+    # serialize identically (and repeated runs can reuse cached LLM responses).
+    return {"similarity_score": similarity, **dict(sorted(metadata.items()))}
+
+
+def _fuse_with_lexical(collection, query_text: str, query_embedding, ids: list, distances: list,
+                       metadatas: list, lexical, candidates: int, where: dict) -> list:
+    """Reciprocal rank fusion of one query's vector hits with its BM25 hits, best `candidates` first."""
+    jobs = {doc_id: _job(1.0 - distances[i], metadatas[i]) for i, doc_id in enumerate(ids)}
+    with span("retrieval.lexical", top_n=FUSION_DEPTH):
+        lexical_ids = [doc_id for doc_id, _ in lexical.search(query_text, top_n=FUSION_DEPTH, where=where)]
+    fused = reciprocal_rank_fusion([ids, lexical_ids], k=RRF_K)
+
+    # Lexical-only hits: fetch their metadata (applying the same filter) and score them
+    # with the same cosine similarity as the vector hits.
+    missing = [doc_id for doc_id, _ in fused[:2 * candidates] if doc_id not in jobs]
+    if missing:
+        with span("retrieval.fetch", ids=len(missing)):
+            fetched = collection.get(ids=missing, where=where, include=["metadatas", "embeddings"])
+        query = np.asarray(query_embedding, dtype=np.float32)
+        for doc_id, metadata, embedding in zip(fetched["ids"], fetched["metadatas"], fetched["embeddings"]):
+            embedding = np.asarray(embedding, dtype=np.float32)
+            cosine = float(query @ embedding / (np.linalg.norm(query) * np.linalg.norm(embedding) or 1.0))
+            jobs[doc_id] = _job(cosine, metadata)
+
+    results = []
+    for doc_id, score in fused:
+        if doc_id in jobs:
+            results.append({**jobs[doc_id], "rrf_score": score})
+            if len(results) == candidates:
+                break
+    return results
+
+
+def search_jobs(resume_texts: list, top_k: int = 5, where: dict = None, hybrid: bool = None,
+                collapse: bool = None) -> list:
+    """
+    Finds the closest jobs for each resume text.
+
+    Args:
+        resume_texts (list): One text per resume.
+        top_k (int): Jobs returned per resume.
+        where (dict): Optional Chroma-style metadata filter.
+        hybrid (bool): Fuse vector hits with BM25 keyword hits (default: HYBRID_SEARCH,
+            and only when the index was built with a lexical index).
+        collapse (bool): Keep only the best-ranked posting of each near-duplicate
+            cluster (default: DEDUP_COLLAPSE).
+
+    Returns:
+        list: For each resume, a list of job metadata dicts with a `similarity_score`
+        (cosine similarity, highest first; plus an `rrf_score` in hybrid mode, where
+        results come in fused order).
+    """
+    if not resume_texts:
+        return []
+
+    lexical = get_lexical_index() if (HYBRID_SEARCH if hybrid is None else hybrid) else None
+    collection = get_job_index()
+    # Cache misses are encoded under the process-wide cap on encoder passes (EMBEDDING_CONCURRENCY)
+    with span("retrieval.encode", texts=len(resume_texts)):
+        embeddings = encode_queries(get_embedding_model(), resume_texts, batch_size=ENCODE_BATCH_SIZE)
+    candidates = top_k * DEDUP_OVERFETCH if (DEDUP_COLLAPSE if collapse is None else collapse) else top_k
+    n_results = max(candidates, FUSION_DEPTH) if lexical is not None else candidates
+    with span("retrieval.vector_query", backend=JOB_INDEX_BACKEND, n_results=n_results, filtered=where is not None):
+        results = collection.query(query_embeddings=embeddings.tolist(), n_results=n_results, where=where)
+
+    matches = []
+    for q, (ids, distances, metadatas) in enumerate(zip(results["ids"], results["distances"], results["metadatas"])):
+        if lexical is not None:
+            matches.append(_fuse_with_lexical(collection, resume_texts[q], embeddings[q], ids, distances,
+                                              metadatas, lexical, candidates, where))
+        else:
+            jobs = [_job(1.0 - distances[i], metadatas[i]) for i in range(len(ids))]
+            jobs.sort(key=lambda job: job["similarity_score"], reverse=True)
+            matches.append(jobs)
+        if candidates > top_k:
+            matches[-1] = collapse_clusters(matches[-1], top_k)
+    return matches
+
+
+def search_resumes(resume_details: list, top_k: int = 5, filters: list = None) -> list:
+    """
+    Finds jobs for summarized resumes the way the job searcher tool does.
+
+    Each resume's details are flattened with `resume_to_text`. Without explicit
+    filters, filters are derived from its last_location / experience
+    (`facets.filters_from_resume`). Resumes whose filters match nothing are
+    searched again over the whole index.
+
+    Args:
+        resume_details (list): Summarizer output per resume (JSON string, dict or free text).
+        top_k (int): Jobs returned per resume.
+        filters (list): Optional {field: value} filters per resume; None entries are derived.
+
+    Returns:
+        list: Per resume, a dict with its `jobs`, the `filters` applied and `filter_fallback`.
+    """
+    resumes = [parse_resume_details(details) for details in resume_details]
+    texts = [resume_to_text(resume) for resume in resumes]
+    filters = filters or [None] * len(resumes)
+    results = [{"jobs": [], "filters": filters_from_resume(resume) if given is None else given,
+                "filter_fallback": False}
+               for resume, given in zip(resumes, filters)]
+
+    # One multi-query per distinct filter
+    groups = {}
+    for i, result in enumerate(results):
+        groups.setdefault(json.dumps(build_where(result["filters"]), sort_keys=True), []).append(i)
+    for key, rows in groups.items():
+        for i, jobs in zip(rows, search_jobs([texts[i] for i in rows], top_k=top_k, where=json.loads(key))):
+            results[i]["jobs"] = jobs
+
+    unmatched = [i for i, result in enumerate(results) if not result["jobs"] and result["filters"]]
+    if unmatched:
+        for i, jobs in zip(unmatched, search_jobs([texts[i] for i in unmatched], top_k=top_k)):
+            results[i].update(jobs=jobs, filter_fallback=True)
+    return results
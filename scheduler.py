@@ -0,0 +1,173 @@
+"""
+Dependency-graph scheduler for running crew tasks concurrently.
+
+`Process.sequential` runs every task one after another. Here the tasks' `context`
+lists are read as a DAG and each task is dispatched to a thread pool as soon as
+all of its dependencies have finished, so end-to-end latency follows the
+critical path instead of the sum of all LLM round-trips.
+"""
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from crewai.utilities.formatter import aggregate_raw_outputs_from_task_outputs
+
+
+@dataclass
+class StageTiming:
+    name: str
+    started_at: float  # epoch seconds
+    ended_at: float
+    dependencies: list = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.ended_at - self.started_at
+
+
+@dataclass
+class DagResult:
+    outputs: dict  # stage name -> stage return value
+    stages: list  # StageTiming, in completion order
+    started_at: float
+    ended_at: float
+    final_stage: str = ""
+
+    @property
+    def output(self):
+        """Output of the final stage (the last task in the declared order)."""
+        return self.outputs.get(self.final_stage)
+
+    @property
+    def duration(self) -> float:
+        return self.ended_at - self.started_at
+
+    def timings(self) -> list:
+        """Per-stage timings as plain dicts, ready for JSON."""
+        return [
+            {"stage": s.name, "started_at": s.started_at, "ended_at": s.ended_at,
+             "duration": s.duration, "dependencies": s.dependencies}
+            for s in self.stages
+        ]
+
+
+def _check_graph(graph: dict):
+    for name, deps in graph.items():
+        unknown = [d for d in deps if d not in graph]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {unknown}")
+
+    # Kahn's algorithm: anything left over after peeling off ready nodes is on a cycle.
+    remaining = {name: set(deps) for name, deps in graph.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+def run_dag(stages: dict, max_parallel: int = None, final_stage: str = None) -> DagResult:
+    """
+    Runs a graph of stages, dispatching each one as soon as its dependencies are done.
+
+    Args:
+        stages (dict): name -> (callable, [dependency names]). The callable receives a
+            dict mapping each dependency name to that stage's return value.
+        max_parallel (int): Maximum number of stages running at once (default: all ready ones).
+        final_stage (str): Stage whose output `DagResult.output` returns (default: last declared).
+
+    Returns:
+        DagResult: Stage outputs plus per-stage start/end timestamps.
+    """
+    graph = {name: list(deps) for name, (_, deps) in stages.items()}
+    _check_graph(graph)
+
+    outputs, timings = {}, []
+    pending = dict(graph)
+    running = {}
+    started_at = time.time()
+
+    def _run_stage(name):
+        fn, deps = stages[name]
+        stage_start = time.time()
+        result = fn({dep: outputs[dep] for dep in deps})
+        return result, StageTiming(name, stage_start, time.time(), list(deps))
+
+    with ThreadPoolExecutor(max_workers=max_parallel or len(stages) or 1,
+                            thread_name_prefix="dag-stage") as pool:
+        try:
+            while pending or running:
+                ready = [name for name, deps in pending.items() if all(d in outputs for d in deps)]
+                for name in ready:
+                    del pending[name]
+                    # Run in a copy of the caller's context so stage spans nest under the caller's (tracing.py)
+                    running[pool.submit(contextvars.copy_context().run, _run_stage, name)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result, timing = future.result()  # re-raises the stage's exception
+                    outputs[name] = result
+                    timings.append(timing)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+    return DagResult(outputs, timings, started_at, time.time(),
+                     final_stage or (list(stages)[-1] if stages else ""))
+
+
+def task_dependencies(tasks: list) -> dict:
+    """
+    Reads the dependency graph of crewAI tasks from their `context`.
+
+    Tasks without an explicit context keep sequential semantics and depend on
+    every task declared before them.
+    """
+    graph = {}
+    for index, task in enumerate(tasks):
+        context = task.context if isinstance(task.context, list) else tasks[:index]
+        graph[task.name] = [dep.name for dep in context]
+    return graph
+
+
+def run_tasks_as_dag(tasks: list, inputs: dict = None, max_parallel: int = None) -> DagResult:
+    """
+    Executes crewAI tasks concurrently according to their context dependencies.
+
+    Tasks that can run at the same time need distinct agents: a crewAI agent runs one
+    task at a time.
+
+    Args:
+        tasks (list): crewAI Task objects; each must have a unique `name`.
+        inputs (dict): Values interpolated into the task descriptions, as for `Crew.kickoff`.
+        max_parallel (int): Maximum number of tasks talking to the LLM at once.
+
+    Returns:
+        DagResult: `outputs` maps task name -> TaskOutput; `output` is the last task's.
+    """
+    names = [task.name for task in tasks]
+    if None in names or len(set(names)) != len(names):
+        raise ValueError("Every task needs a unique name to be scheduled as a DAG.")
+
+    by_name = dict(zip(names, tasks))
+    for task in tasks:
+        task.interpolate_inputs_and_add_conversation_history(inputs or {})
+
+    def _stage(task):
+        def _execute(dep_outputs):
+            context = aggregate_raw_outputs_from_task_outputs(list(dep_outputs.values()))
+            return task.execute_sync(agent=task.agent, context=context, tools=task.tools)
+        return _execute
+
+    graph = task_dependencies(tasks)
+    return run_dag(
+        {name: (_stage(by_name[name]), deps) for name, deps in graph.items()},
+        max_parallel=max_parallel,
+        final_stage=names[-1],
+    )
@@ -0,0 +1,53 @@
+"""
+Typed outputs of the job analysis crew.
+
+`JobSearcherTool` returns `JobSearchResults` JSON and is the job search task's
+answer as-is (`result_as_answer`), so the listings never pass back through the
+LLM. The drafting task declares `EnhancedResume` as its `output_pydantic`, and
+crew.py assembles the final `JobAnalysisResult` from the two task outputs.
+"""
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+
+class JobListing(BaseModel):
+    """One job from the index: its metadata columns (job_title, company, job_link, ...) plus its scores."""
+
+    model_config = ConfigDict(extra="allow")
+
+    similarity_score: float = Field(description="Cosine similarity between the resume and the job")
+    rrf_score: float | None = Field(default=None, description="Reciprocal rank fusion score (hybrid search only)")
+
+
+class JobSearchResults(BaseModel):
+    jobs: list[JobListing] = Field(default_factory=list, description="Best matches first")
+
+
+class EnhancedResume(BaseModel):
+    markdown: str = Field(description="The complete enhanced resume as a single Markdown document")
+
+
+class JobAnalysisResult(BaseModel):
+    jobs: list[JobListing] = Field(default_factory=list)
+    enhanced_resume_markdown: str = ""
+
+
+def task_output_as(model: type, task_output):
+    """
+    The task's output as `model`: its `pydantic` output when crewAI produced one,
+    otherwise its raw text validated as `model` JSON.
+
+    For `EnhancedResume`, raw text that isn't the JSON object is taken as the
+    Markdown itself (models sometimes answer with the document directly).
+
+    Raises:
+        ValidationError: When the raw output doesn't match `model`.
+    """
+    if isinstance(task_output.pydantic, model):
+        return task_output.pydantic
+    raw = (task_output.raw or "").strip()
+    try:
+        return model.model_validate_json(raw)
+    except ValidationError:
+        if model is EnhancedResume and raw:
+            return EnhancedResume(markdown=raw)
+        raise
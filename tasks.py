@@ -1,70 +1,101 @@
 from crewai import Task
 from tools import pdf_reader_tool, job_searcher_tool
-from agents import reader_agent, summarize_agent, job_searcher_agent, resume_formatter_agent, aggregator_agent
+from agents import build_job_searcher_agent, build_reader_agent, build_resume_formatter_agent, build_summarize_agent
+from schemas import EnhancedResume, JobSearchResults
+from tracing import record_result_size, span
 
-read_pdf_task = Task(
-    description="Read the content of the PDF document located at {pdf_path}.",
-    expected_output="Text extracted from the PDF document.",
-    tools=[pdf_reader_tool],
-    agent=reader_agent,
-)
 
-summarize_text_task = Task(
-    description=("""extract the following details from the text using the specified groq model:
+class TracedTask(Task):
+    """Task that records a `task.<name>` span around each run, both under Crew.kickoff and the DAG scheduler."""
+
+    def execute_sync(self, agent=None, context=None, tools=None):
+        with span(f"task.{self.name}", agent=getattr(agent or self.agent, "role", None)) as current:
+            output = super().execute_sync(agent=agent, context=context, tools=tools)
+            record_result_size(current, "task", output.raw or "")
+            return output
+
+
+# Each task declares its upstream tasks via `context`; scheduler.py reads these
+# as a dependency graph so job search and resume drafting can run side by side.
+def build_read_pdf_task(agent):
+    return TracedTask(
+        name="read_pdf_task",
+        description="Read the content of the PDF document located at {pdf_path}.",
+        expected_output="Text extracted from the PDF document.",
+        tools=[pdf_reader_tool],
+        agent=agent,
+    )
+
+
+def build_summarize_text_task(agent, context: list = None):
+    return TracedTask(
+        name="summarize_text_task",
+        description=("""extract the following details from the text using the specified groq model:
         - Role they are looking for
         - Skills
         - summary (summary of the roles he contributed)
         - Experience (in years, sum it up across companies and categorise it as juinor, mid, senior, mid-senior based on the years of experience)
         - Last worked location"
         """),
-    expected_output=("""
+        expected_output=("""
     summarize the extracted information as a string in the following manner:
         '"role": "...", "skills": ["...", "..."], "summary":"....", "experience": "...", "last_location": "..."'
     """),
-    agent=summarize_agent,
-    # model="gemini/gemini-2.0-flash"
-    # model="huggingface/meta-llama/Llama-3.3-70B-Instruct"
-)
+        agent=agent,
+        context=context,
+        # model="gemini/gemini-2.0-flash"
+        # model="huggingface/meta-llama/Llama-3.3-70B-Instruct"
+    )
 
 
-job_searcher_task = Task(
-    description=(
-        "**YOU MUST USE THE PROVIDED TOOL** with the resume details to search the chromadb. "
-        "The tool returns the job listings as a single JSON string. "
-        "Your final output MUST be the **RAW, UNMODIFIED JSON STRING** returned by the tool."
-    ),
-    expected_output=(
-        """
-        A single JSON string containing the job results in the following structure (must match the tool's output format exactly, do not add any wrapping text or markdown fences):
-        [
-            {
-                "Job Title - Company": "...",
-                "Location": "...",
-                "Similarity Score": "..."
-                // ... all fields returned by the tool
-            },
-            // ...
-        ]
+def build_job_searcher_task(agent, context: list):
+    return TracedTask(
+        name="job_searcher_task",
+        description=(
+            "**YOU MUST USE THE PROVIDED TOOL** with the resume details to search the chromadb. "
+            "The tool's JSON result is returned to the user directly as the task's answer."
+        ),
+        expected_output=(
+            """
+        The Job Searcher tool's result: a JSON object {"jobs": [...]} with the matching job listings, best match first.
         """
-    ),
-    tools=[job_searcher_tool],
-    agent=job_searcher_agent
-)
+        ),
+        tools=[job_searcher_tool],
+        agent=agent,
+        context=context,
+        output_pydantic=JobSearchResults,
+    )
 
-resume_drafting_task = Task(
-    description=(
-        "Take the structured resume draft from the previous task and generate a final output document "
-        "using clean, professional **Markdown** formatting. Ensure proper headings, bolding, and bullet points "
-        "are used to create a visually clean, single-page resume layout."
-        "The output must ONLY be the Markdown content of the enhanced resume."
-    ),
-    expected_output=(
-        """
+
+def build_resume_drafting_task(agent, context: list):
+    return TracedTask(
+        name="resume_drafting_task",
+        description=(
+            "Take the resume text and its structured summary from the previous tasks and generate a final output document "
+            "using clean, professional **Markdown** formatting. Ensure proper headings, bolding, and bullet points "
+            "are used to create a visually clean, single-page resume layout."
+            "The output must ONLY be the Markdown content of the enhanced resume."
+        ),
+        expected_output=(
+            """
         The complete, enhanced resume formatted as a single Markdown string, ready for display or PDF conversion.
         """
-    ),
-    agent=resume_formatter_agent,
-)
+        ),
+        agent=agent,
+        context=context,
+        # Requested as structured output, so the Markdown arrives without fences or commentary
+        output_pydantic=EnhancedResume,
+    )
+
+
+def build_job_analysis_tasks() -> list:
+    """Fresh agents and tasks for one analysis run, in pipeline order."""
+    read_pdf_task = build_read_pdf_task(build_reader_agent())
+    summarize_text_task = build_summarize_text_task(build_summarize_agent(), [read_pdf_task])
+    job_searcher_task = build_job_searcher_task(build_job_searcher_agent(), [summarize_text_task])
+    resume_drafting_task = build_resume_drafting_task(build_resume_formatter_agent(),
+                                                      [read_pdf_task, summarize_text_task])
+    return [read_pdf_task, summarize_text_task, job_searcher_task, resume_drafting_task]
 
 # # Format the Resume (Final step)
 # resume_formatting_task = Task(
@@ -82,29 +113,3 @@ resume_drafting_task = Task(
 #     agent=resume_formatter_agent,
 #     output_file="enhanced_resume.md"
 # )
-
-aggregation_task = Task(
-    description=(
-        "Collect the Markdown-formatted enhanced resume from the previous task and the "
-        "Job Recommendation JSON (from the Job Searcher Task, available in context). "
-        "Combine them into a single JSON object with two top-level keys: 'jobs' and 'enhanced_resume_markdown'."
-    ),
-    expected_output=(
-        """
-        A single JSON object strictly in the following format:
-        {
-            "jobs":{
-                "job1": {
-                "Job Title - Company": "...",
-                "Location": "...",
-                "Summary": "...",
-                "Skills": "...",
-                "Link": "...",
-                "Similarity Score": "..."
-            },
-"enhanced_resume_markdown": "### [User Name]... (Markdown content here)"
-        }
-        """
-    ),
-    agent=aggregator_agent
-)
\ No newline at end of file
@@ -0,0 +1,56 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+FIXTURES_DIR = os.path.join(ROOT, "data", "fixtures")
+
+
+class FakeEncoder:
+    """Deterministic stand-in for the sentence encoder: normalized hashed bag of words."""
+
+    name = "fake"
+    model_name = "fake-encoder"
+    dimension = 64
+
+    def encode(self, texts, batch_size: int = 64, **_):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in str(text).lower().split():
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+
+@pytest.fixture
+def fake_encoder(monkeypatch):
+    import embeddings
+    import resources
+    import retrieval
+
+    encoder = FakeEncoder()
+    monkeypatch.setattr(embeddings, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(resources, "get_embedding_model", lambda: encoder)
+    monkeypatch.setattr(retrieval, "get_embedding_model", lambda: encoder)
+    return encoder
+
+
+@pytest.fixture
+def chroma_path(tmp_path, monkeypatch):
+    """An empty index directory that the shared resources point at."""
+    import resources
+
+    path = str(tmp_path / "chroma_db")
+    names = ["chroma_client", "jobs_collection", "flat_index", "lexical_index"]
+    monkeypatch.setattr(resources, "CHROMA_PATH", path)
+    for name in names:
+        resources.registry.invalidate(name)
+    yield path
+    for name in names:
+        resources.registry.invalidate(name)
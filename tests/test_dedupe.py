@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from dedupe import MinHasher, NearDuplicateIndex, NUM_BANDS, band_keys, collapse_clusters, estimated_jaccard
+
+POSTING = ("Senior Data Engineer. Build and maintain batch and streaming pipelines in Python and Spark, "
+           "own the warehouse models in dbt and Snowflake, and mentor two junior engineers on the team.")
+REPOST = POSTING.replace("on the team.", "on the squad.")
+OTHER = ("Registered Nurse, night shift. Provide patient care on a busy surgical ward, administer "
+         "medication, and coordinate with physicians and families on discharge plans.")
+
+
+def test_signatures_are_deterministic():
+    first, second = MinHasher(), MinHasher()
+    np.testing.assert_array_equal(first.signature(POSTING), second.signature(POSTING))
+    assert not np.array_equal(MinHasher(seed=2).signature(POSTING), first.signature(POSTING))
+    assert first.signatures([]).shape == (0, len(first.a))
+
+
+def test_estimated_jaccard_separates_reposts():
+    hasher = MinHasher()
+    posting, repost, other = hasher.signatures([POSTING, REPOST, OTHER])
+    assert estimated_jaccard(posting, posting) == 1.0
+    assert estimated_jaccard(posting, repost) >= 0.8
+    assert estimated_jaccard(posting, other) < 0.2
+
+
+def test_band_keys():
+    signatures = MinHasher().signatures([POSTING, POSTING, OTHER])
+    keys = band_keys(signatures)
+    assert keys.shape == (3, NUM_BANDS) and keys.dtype == np.int64
+    np.testing.assert_array_equal(keys[0], keys[1])
+    assert not np.any(keys[0] == keys[2])
+
+
+@pytest.fixture
+def near_duplicates(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedupe.sqlite"))
+    yield index
+    index.close()
+
+
+def test_reposts_share_a_cluster(near_duplicates):
+    signatures = MinHasher().signatures([POSTING, OTHER, REPOST])
+    assert near_duplicates.assign(["a", "b", "c"], signatures) == ["a", "b", "a"]
+    assert near_duplicates.cluster_count() == 2
+
+
+def test_assign_is_idempotent_on_resume(tmp_path):
+    path = str(tmp_path / "dedupe.sqlite")
+    signatures = MinHasher().signatures([POSTING, OTHER, REPOST])
+    index = NearDuplicateIndex(path)
+    index.assign(["a", "b"], signatures[:2])
+    index.close()
+
+    index = NearDuplicateIndex(path, resume=True)
+    # The chunk with "b" is redone after the interruption
+    assert index.assign(["b", "c"], signatures[1:]) == ["b", "a"]
+    assert index.cluster_count() == 2
+    index.close()
+
+    rebuilt = NearDuplicateIndex(path)
+    assert rebuilt.cluster_count() == 0
+    rebuilt.close()
+
+
+def test_collapse_clusters():
+    jobs = [
+        {"job_link": "1", "cluster_id": "a"},
+        {"job_link": "2", "cluster_id": "a"},
+        {"job_link": "3"},
+        {"job_link": "4", "cluster_id": "b"},
+        {"job_link": "5"},
+    ]
+    assert [job["job_link"] for job in collapse_clusters(jobs, top_k=10)] == ["1", "3", "4", "5"]
+    assert [job["job_link"] for job in collapse_clusters(jobs, top_k=2)] == ["1", "3"]
@@ -0,0 +1,109 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+
+import crew
+from disk_cache import DiskCache, content_hash
+from schemas import JobAnalysisResult
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "entries.sqlite")
+
+
+def test_get_and_put(cache_path):
+    cache = DiskCache(cache_path)
+    assert cache.get("k") is None
+    cache.put("k", "value")
+    assert cache.get("k") == "value"
+    assert cache.stats() == {"entries": 1, "bytes": 5, "hits": 1, "misses": 1}
+
+
+def test_entries_persist_across_instances(cache_path):
+    DiskCache(cache_path).put("k", "value")
+    assert DiskCache(cache_path).get("k") == "value"
+
+
+def test_expired_entries_are_misses(cache_path):
+    cache = DiskCache(cache_path, ttl_seconds=0.05)
+    cache.put("k", "value")
+    assert cache.get("k") == "value"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_put_evicts_expired_entries(cache_path):
+    cache = DiskCache(cache_path, ttl_seconds=0.05)
+    cache.put("old", "value")
+    time.sleep(0.1)
+    cache.put("new", "value")
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(cache_path):
+    cache = DiskCache(cache_path, max_bytes=10)
+    cache.put("a", "xxxx")
+    time.sleep(0.01)
+    cache.put("b", "xxxx")
+    time.sleep(0.01)
+    cache.get("a")  # now more recent than b
+    time.sleep(0.01)
+    cache.put("c", "xxxx")
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx" and cache.get("c") == "xxxx"
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_content_hash_separates_parts():
+    assert content_hash("ab", "c") != content_hash("a", "bc")
+    assert content_hash("a", b"b") == content_hash(b"a", "b")
+
+
+# --- Analysis result cache (crew.py) ------------------------------------------------
+
+@pytest.fixture
+def analysis(monkeypatch, cache_path):
+    """run_job_analysis_crew with a fake crew whose result `assemble_job_analysis` returns."""
+    cache = DiskCache(cache_path)
+    runs = []
+    monkeypatch.setattr(crew, "RESULT_CACHE_ENABLED", True)
+    monkeypatch.setattr(crew, "get_result_cache", lambda: cache)
+    monkeypatch.setattr(crew, "analysis_cache_key", lambda pdf_path: content_hash(pdf_path))
+    monkeypatch.setattr(crew, "requires_api_key", lambda: False)
+    monkeypatch.setattr(crew, "build_job_analysis_crew", lambda task_callback=None: SimpleNamespace(
+        kickoff=lambda inputs: runs.append(inputs) or SimpleNamespace(tasks_output=[])))
+
+    def run(result):
+        def assemble(task_outputs):
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        monkeypatch.setattr(crew, "assemble_job_analysis", assemble)
+        return crew.run_job_analysis_crew("resume.pdf", process="sequential")
+
+    run.runs = runs
+    run.cache = cache
+    return run
+
+
+def test_complete_results_are_replayed(analysis):
+    result = JobAnalysisResult(jobs=[], enhanced_resume_markdown="# Resume")
+    assert analysis(result) == result
+    assert analysis(JobAnalysisResult(enhanced_resume_markdown="# Other")) == result
+    assert len(analysis.runs) == 1
+
+
+def test_results_without_a_resume_are_not_cached(analysis):
+    analysis(JobAnalysisResult(enhanced_resume_markdown="  "))
+    assert analysis.cache.stats()["entries"] == 0
+
+
+def test_malformed_outputs_are_not_cached(analysis):
+    with pytest.raises(ValidationError):
+        analysis(ValidationError.from_exception_data("JobSearchResults", []))
+    assert analysis.cache.stats()["entries"] == 0
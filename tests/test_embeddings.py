@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pytest
+
+import embeddings
+from embeddings import load_embedding_backend
+
+WORDS = "data engineer python spark sql nurse patient care software java cloud marketing manager senior".split()
+TEXTS = [
+    "data engineer",
+    "senior data engineer python spark sql cloud",
+    "nurse",
+    "patient care nurse",
+    "java",
+    "senior software engineer java cloud python",
+    "marketing manager",
+    "an unknown word or two",
+] * 3
+# int8 activations are quantized per batch, so how texts are batched moves their vectors slightly
+TOLERANCE = {"torch": 1e-5, "torch-int8": 2e-3, "onnx": 1e-5, "onnx-int8": 2e-3}
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """A tiny randomly initialized BERT sentence encoder, built offline."""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    base = str(tmp_path_factory.mktemp("bert"))
+    vocab_path = os.path.join(base, "vocab.txt")
+    with open(vocab_path, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    BertTokenizerFast(vocab_path).save_pretrained(base)
+    torch.manual_seed(0)
+    BertModel(BertConfig(vocab_size=5 + len(WORDS), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                         intermediate_size=64, max_position_embeddings=64)).save_pretrained(base)
+    model = SentenceTransformer(modules=[models.Transformer(base, max_seq_length=64), models.Pooling(32),
+                                         models.Normalize()], device="cpu")
+    path = str(tmp_path_factory.mktemp("sentence-model"))
+    model.save(path)
+    return path
+
+
+@pytest.fixture(params=embeddings.BACKENDS)
+def backend(request, model_path, tmp_path, monkeypatch):
+    if request.param.startswith("onnx"):
+        pytest.importorskip("onnx")
+        pytest.importorskip("onnxruntime")
+        monkeypatch.setattr(embeddings, "ONNX_DIR", str(tmp_path / "onnx"))
+    return load_embedding_backend(model_path, request.param)
+
+
+def test_vectors_do_not_depend_on_the_batching(backend):
+    one_batch = backend.encode(TEXTS, batch_size=len(TEXTS), max_batch_tokens=10**6)
+    assert one_batch.shape == (len(TEXTS), backend.dimension) and one_batch.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(one_batch, axis=1), 1.0, atol=1e-3)
+    for batching in ({"batch_size": 1}, {"batch_size": 3}, {"max_batch_tokens": 16}):
+        np.testing.assert_allclose(backend.encode(TEXTS, **batching), one_batch, atol=TOLERANCE[backend.name])
+
+
+def test_vectors_match_sentence_transformers(backend, model_path):
+    from sentence_transformers import SentenceTransformer
+
+    expected = SentenceTransformer(model_path, device="cpu").encode(TEXTS)
+    np.testing.assert_allclose(backend.encode(TEXTS, batch_size=5), expected, atol=10 * TOLERANCE[backend.name])
+
+
+def test_empty_input(model_path):
+    assert load_embedding_backend(model_path, "torch").encode([]).shape == (0, 32)
+
+
+def test_unknown_backend_is_rejected(model_path):
+    with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+        load_embedding_backend(model_path, "tensorflow")
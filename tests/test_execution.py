@@ -0,0 +1,250 @@
+import threading
+import time
+
+import pytest
+
+import execution
+from execution import (RateLimiter, RetriesExhaustedError, backoff_delay, call_with_retry, cpu_stage,
+                       is_throttling_error, retry_after_seconds)
+from fake_llm_endpoint import FakeLLMEndpoint
+
+
+class Response:
+    def __init__(self, status_code=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, message="", status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = Response(status_code, headers)
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def throttle(retry_after=None):
+    return HTTPError("429 Too Many Requests", 429, {"retry-after": retry_after} if retry_after else None)
+
+
+# --- RateLimiter ----------------------------------------------------------------
+
+def test_rate_limiter_serves_the_burst_then_waits_for_the_refill():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1)  # 100 tokens/s
+    assert limiter.acquire(100) < 0.05
+    waited = limiter.acquire(50)
+    assert 0.4 <= waited < 1.0
+
+
+def test_rate_limiter_request_bucket():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=0, burst_seconds=0)  # one request per 0.1s
+    assert limiter.max_requests == 1
+    assert limiter.acquire() < 0.05
+    assert 0.07 <= limiter.acquire() < 0.5
+
+
+def test_rate_limiter_settle_returns_unused_tokens():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1)
+    limiter.acquire(100)
+    limiter.settle(100, 10)
+    assert limiter.acquire(80) < 0.05
+
+
+def test_rate_limiter_settle_charges_overuse():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1)
+    limiter.acquire(100)
+    limiter.settle(100, 150)  # the balance goes to -50
+    assert limiter.acquire(10) >= 0.5
+
+
+def test_rate_limiter_pause_holds_callers_back():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    limiter.pause(0.2)
+    assert limiter.acquire() >= 0.15
+
+
+def test_rate_limiter_caps_a_reservation_at_the_bucket_size():
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=6000, burst_seconds=1)
+    assert limiter.acquire(10 ** 6) < 0.05
+
+
+# --- Throttle classification and delays -----------------------------------------
+
+@pytest.mark.parametrize("error", [
+    HTTPError("too many", status_code=429),
+    HTTPError("quota", headers={"retry-after": "2"}),
+    RateLimitError("slow down"),
+    type("ClientError", (Exception,), {"code": 429})("429 RESOURCE_EXHAUSTED"),
+])
+def test_is_throttling_error(error):
+    assert is_throttling_error(error)
+
+
+def test_is_throttling_error_follows_the_cause():
+    try:
+        try:
+            raise throttle()
+        except HTTPError as e:
+            raise ValueError("provider call failed") from e
+    except ValueError as e:
+        assert is_throttling_error(e)
+
+
+@pytest.mark.parametrize("error", [
+    ValueError("bad request"),
+    HTTPError("server error", status_code=500),
+    RetriesExhaustedError("model", 3, throttle()),
+])
+def test_is_not_throttling_error(error):
+    assert not is_throttling_error(error)
+
+
+def test_retry_after_seconds_from_header():
+    assert retry_after_seconds(throttle("3")) == 3.0
+
+
+def test_retry_after_seconds_from_gemini_retry_delay():
+    error = RuntimeError("429 RESOURCE_EXHAUSTED. {'@type': 'RetryInfo', 'retryDelay': '7s'}")
+    assert retry_after_seconds(error) == 7.0
+
+
+def test_retry_after_seconds_from_the_cause():
+    error = ValueError("wrapped")
+    error.__cause__ = throttle("1.5")
+    assert retry_after_seconds(error) == 1.5
+
+
+def test_retry_after_seconds_ignores_http_dates_and_missing_values():
+    assert retry_after_seconds(throttle("Wed, 21 Oct 2026 07:28:00 GMT")) is None
+    assert retry_after_seconds(ValueError("no delay here")) is None
+
+
+def test_backoff_delay_bounds(monkeypatch):
+    monkeypatch.setattr(execution, "LLM_RETRY_BASE_SECONDS", 1.0)
+    monkeypatch.setattr(execution, "LLM_RETRY_MAX_SECONDS", 30.0)
+    assert backoff_delay(1, rng=lambda: 1.0) == 1.0
+    assert backoff_delay(3, rng=lambda: 1.0) == 4.0
+    assert backoff_delay(20, rng=lambda: 1.0) == 30.0
+    assert backoff_delay(5, rng=lambda: 0.0) == 0.0
+    assert backoff_delay(1, retry_after=5, rng=lambda: 1.0) == 5
+    for attempt in range(1, 10):
+        assert 0.0 <= backoff_delay(attempt) <= 30.0
+
+
+# --- call_with_retry --------------------------------------------------------------
+
+def flaky(errors, result="ok"):
+    calls = []
+
+    def operation():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return operation, calls
+
+
+def test_call_with_retry_retries_throttles():
+    operation, calls = flaky([throttle(), throttle("2")])
+    sleeps = []
+    assert call_with_retry(operation, max_attempts=5, limiter=RateLimiter(0, 0), sleep=sleeps.append) == "ok"
+    assert len(calls) == 3
+    assert len(sleeps) == 2 and sleeps[1] >= 2
+
+
+def test_call_with_retry_raises_other_errors_at_once():
+    operation, calls = flaky([ValueError("bad request")])
+    with pytest.raises(ValueError):
+        call_with_retry(operation, max_attempts=5, limiter=RateLimiter(0, 0), sleep=lambda _: None)
+    assert len(calls) == 1
+
+
+def test_call_with_retry_gives_up_after_max_attempts():
+    last = throttle()
+    operation, calls = flaky([throttle(), throttle(), last])
+    with pytest.raises(RetriesExhaustedError) as raised:
+        call_with_retry(operation, max_attempts=3, limiter=RateLimiter(0, 0), sleep=lambda _: None)
+    assert len(calls) == 3
+    assert raised.value.last_error is last
+    # Not chained, so outer retry layers don't see a throttle
+    assert raised.value.__cause__ is None and raised.value.__context__ is None
+
+
+def test_call_with_retry_pauses_the_shared_limiter():
+    limiter = RateLimiter(0, 0)
+    operation, _ = flaky([throttle("0.2")])
+    call_with_retry(operation, max_attempts=2, limiter=limiter, sleep=lambda _: None)
+    assert limiter.acquire() >= 0.1
+
+
+# --- cpu_stage --------------------------------------------------------------------
+
+def test_cpu_stage_caps_concurrency(monkeypatch):
+    monkeypatch.setitem(execution._stage_semaphores, "test", threading.BoundedSemaphore(2))
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with cpu_stage("test"):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+
+
+def test_cpu_stage_without_a_limit():
+    with cpu_stage("not-a-stage") as waited:
+        assert waited == 0.0
+
+
+# --- Against the fake endpoint ----------------------------------------------------
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    from crewai import LLM
+    from llm_backends import CachedLLM
+
+    endpoints = []
+
+    def build(**endpoint_options):
+        endpoint = FakeLLMEndpoint(**endpoint_options).start()
+        endpoints.append(endpoint)
+        inner = LLM(model="openai/fake-model", base_url=endpoint.url, api_key="fake", max_retries=0)
+        return endpoint, CachedLLM(inner, use_cache=False)
+
+    monkeypatch.setattr(execution, "LLM_RETRY_BASE_SECONDS", 0.05)
+    monkeypatch.setattr(execution, "_llm_limiter", RateLimiter(0, 0))
+    yield build
+    for endpoint in endpoints:
+        endpoint.stop()
+
+
+def test_fake_endpoint_throttles_are_retried(fake_llm):
+    endpoint, llm = fake_llm(max_requests=1, window_seconds=1)
+    for step in range(2):
+        assert "Final Answer" in llm.call([{"role": "user", "content": f"step {step}"}])
+    stats = endpoint.stats()
+    assert stats["served"] == 2
+    assert stats["throttled"] >= 1
+    assert stats["requests"] == stats["served"] + stats["throttled"]
+
+
+def test_fake_endpoint_is_not_retried_twice(fake_llm, monkeypatch):
+    monkeypatch.setattr(execution, "LLM_MAX_ATTEMPTS", 2)
+    endpoint, llm = fake_llm(throttle_rate=1.0)
+    with pytest.raises(RetriesExhaustedError):
+        llm.call([{"role": "user", "content": "hello"}])
+    # Only call_with_retry's attempts: neither crewAI nor the OpenAI SDK retried on top
+    assert endpoint.stats()["requests"] == 2
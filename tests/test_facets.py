@@ -0,0 +1,65 @@
+import json
+
+import facets
+from conftest import FIXTURES_DIR
+from facets import build_where, count_facets, filters_from_resume, list_facets, merge_facet_counts
+
+FACETS = {
+    "search_country": {"United States": 4, "United Kingdom": 2, "Canada": 3},
+    "job_level": {"Mid senior": 6, "Associate": 3},
+}
+
+
+def test_build_where():
+    assert build_where({}) is None
+    assert build_where({"job_level": "", "search_country": None, "job_type": []}) is None
+    assert build_where({"job_level": "Associate"}) == {"job_level": "Associate"}
+    assert build_where({"job_level": "Associate", "search_country": ["Canada", "United States"]}) == {
+        "$and": [{"job_level": "Associate"}, {"search_country": {"$in": ["Canada", "United States"]}}]
+    }
+
+
+def test_filters_from_resume_location_and_level():
+    resume = {"last_location": "Seattle, WA, United States", "experience": "Senior"}
+    assert filters_from_resume(resume, FACETS) == {"search_country": "United States", "job_level": "Mid senior"}
+
+
+def test_filters_from_resume_country_aliases():
+    assert filters_from_resume({"last_location": "London, UK"}, FACETS) == {"search_country": "United Kingdom"}
+    assert filters_from_resume({"last_location": "Austin, USA"}, FACETS) == {"search_country": "United States"}
+
+
+def test_filters_from_resume_most_specific_level_first():
+    assert filters_from_resume({"experience": "Mid-Senior"}, FACETS) == {"job_level": "Mid senior"}
+    assert filters_from_resume({"experience": "juinor"}, FACETS) == {"job_level": "Associate"}
+
+
+def test_filters_from_resume_ignores_values_outside_the_index():
+    resume = {"last_location": "Berlin, Germany", "experience": "Senior"}
+    assert filters_from_resume(resume, {"search_country": FACETS["search_country"]}) == {}
+    assert filters_from_resume({"last_location": "Berlin"}, {}) == {}
+
+
+def test_count_and_merge_facets():
+    first = count_facets([{"search_country": "Canada", "job_level": "Associate"}, {"search_country": "Canada"}])
+    second = count_facets([{"search_country": "United States", "job_type": ""}])
+    merged = merge_facet_counts([first, second])
+    assert merged["search_country"] == {"Canada": 2, "United States": 1}
+    assert list(merged["search_country"]) == ["Canada", "United States"]  # most common first
+    assert merged["job_level"] == {"Associate": 1}
+    assert merged["job_type"] == {}
+
+
+def test_ingest_rerun_keeps_facets_and_stats(chroma_path, fake_encoder):
+    from ingest import ingest
+
+    first = ingest(FIXTURES_DIR, chroma_path, chunk_size=5, workers=0)
+    with open(facets.facets_path(chroma_path)) as f:
+        built = json.load(f)
+    assert sum(built["search_country"].values()) == first["rows"] > 0
+
+    again = ingest(FIXTURES_DIR, chroma_path, chunk_size=5, workers=0)
+    assert again.keys() == first.keys()
+    assert again["rows_this_run"] == 0
+    assert again["collection_count"] == first["collection_count"] == first["rows"]
+    assert list_facets(chroma_path) == built
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import resources
+import retrieval
+from conftest import FIXTURES_DIR
+from flat_store import export_collection, int8_scale, load_flat_index, quantize_int8
+from ingest import ingest
+
+QUERIES = [
+    "data scientist python machine learning",
+    "registered nurse patient care",
+    "software engineer java cloud",
+    "marketing manager campaigns",
+]
+FILTERS = [
+    None,
+    {"search_country": "Canada"},
+    {"$and": [{"job_level": "Mid senior"}, {"search_country": {"$in": ["United States", "United Kingdom"]}}]},
+]
+
+
+@pytest.fixture
+def built_index(chroma_path, fake_encoder):
+    ingest(FIXTURES_DIR, chroma_path, chunk_size=5, workers=0, flat_store="float32", quantize="int8")
+    return chroma_path
+
+
+def ranked(result: dict, q: int) -> list:
+    """(id, distance) pairs of query `q`, with tied distances in id order."""
+    pairs = zip(result["ids"][q], result["distances"][q])
+    return sorted(((doc_id, round(distance, 5)) for doc_id, distance in pairs), key=lambda p: (p[1], p[0]))
+
+
+@pytest.mark.parametrize("where", FILTERS)
+def test_flat_store_matches_chroma(built_index, fake_encoder, where):
+    collection = resources.get_jobs_collection()
+    flat = load_flat_index(built_index)
+    assert flat.count() == collection.count()
+    queries = fake_encoder.encode(QUERIES).tolist()
+    expected = collection.query(query_embeddings=queries, n_results=5, where=where)
+    found = flat.query(queries, n_results=5, where=where)
+    for q in range(len(QUERIES)):
+        assert ranked(found, q) == pytest.approx(ranked(expected, q), abs=1e-4)
+        by_id = dict(zip(found["ids"][q], found["metadatas"][q]))
+        for doc_id, metadata in zip(expected["ids"][q], expected["metadatas"][q]):
+            assert by_id[doc_id] == metadata
+
+
+def test_flat_store_get(built_index):
+    collection = resources.get_jobs_collection()
+    flat = load_flat_index(built_index)
+    ids = collection.get(limit=3)["ids"] + ["missing"]
+    found = flat.get(ids=ids, include=["metadatas", "embeddings"])
+    assert sorted(found["ids"]) == sorted(ids[:3])
+    expected = collection.get(ids=found["ids"], include=["embeddings"])
+    by_id = dict(zip(expected["ids"], expected["embeddings"]))
+    for doc_id, embedding in zip(found["ids"], found["embeddings"]):
+        np.testing.assert_allclose(embedding, by_id[doc_id], atol=1e-6)
+    assert flat.get(ids=ids, where={"search_country": "Nowhere"})["ids"] == []
+
+
+def test_export_float16_matches_float32(built_index, fake_encoder):
+    exact = load_flat_index(built_index)
+    export_collection(built_index, resources.COLLECTION_NAME, dtype="float16")
+    half = load_flat_index(built_index)
+    assert half.bytes_per_vector()["float"] == exact.bytes_per_vector()["float"] // 2
+    queries = fake_encoder.encode(QUERIES)
+    _, exact_sims = exact.search(queries, 5, use_int8=False)
+    _, half_sims = half.search(queries, 5, use_int8=False)
+    np.testing.assert_allclose(half_sims, exact_sims, atol=2e-3)
+
+
+def test_int8_scan_with_rescore_finds_the_exact_top_k(built_index, fake_encoder):
+    flat = load_flat_index(built_index)
+    assert flat.bytes_per_vector()["scan"] == flat.bytes_per_vector()["float"] // 4
+    queries = fake_encoder.encode(QUERIES)
+    _, exact_sims = flat.search(queries, 3, use_int8=False)
+    _, int8_sims = flat.search(queries, 3, use_int8=True, rescore_factor=4)
+    # Rescored in float: the same similarities (rows may swap only between ties)
+    np.testing.assert_allclose(int8_sims, exact_sims, atol=1e-6)
+
+
+def test_quantize_int8_round_trip():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(100, 16)).astype(np.float32)
+    scale = int8_scale(np.abs(vectors).max(axis=0))
+    codes = quantize_int8(vectors, scale)
+    assert codes.dtype == np.int8
+    np.testing.assert_allclose(codes * scale, vectors, atol=float(scale.max()))
+
+
+def test_search_jobs_same_on_both_backends(built_index, monkeypatch):
+    results = {}
+    for backend in ("chroma", "flat"):
+        monkeypatch.setattr(resources, "JOB_INDEX_BACKEND", backend)
+        matches = retrieval.search_jobs(QUERIES, top_k=3, where={"job_level": "Mid senior"})
+        results[backend] = [sorted((job["job_link"], round(job["similarity_score"], 4)) for job in jobs)
+                            for jobs in matches]
+    assert results["flat"] == results["chroma"]
+
+
+def test_rebuilt_flat_store_is_reloaded(built_index, monkeypatch):
+    monkeypatch.setattr(resources, "JOB_INDEX_BACKEND", "flat")
+    before = resources.get_job_index()
+    assert resources.get_job_index() is before
+    ingest(FIXTURES_DIR, built_index, chunk_size=5, workers=0, flat_store="float16", restart=True)
+    after = resources.get_job_index()
+    assert after is not before
+    assert after.embeddings.dtype == np.float16
@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+import ingest as ingest_module
+from conftest import FIXTURES_DIR
+from ingest import CHECKPOINT_FILE, ingest, iter_job_chunks, job_id
+
+
+CHUNK_SIZE = 4
+ALL_CHUNKS = list(range(len(list(iter_job_chunks(FIXTURES_DIR, CHUNK_SIZE)))))
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def encoded_chunks(monkeypatch):
+    """Records the chunk numbers encoded; `fail_at` interrupts the load at that chunk."""
+    encode = ingest_module.encode_chunk
+    calls = {"chunks": [], "fail_at": None}
+
+    def tracking(index, rows, dedupe=False):
+        if index == calls["fail_at"]:
+            raise Interrupted()
+        calls["chunks"].append(index)
+        return encode(index, rows, dedupe)
+
+    monkeypatch.setattr(ingest_module, "encode_chunk", tracking)
+    return calls
+
+
+def read_checkpoint(chroma_path):
+    with open(os.path.join(chroma_path, CHECKPOINT_FILE)) as f:
+        return json.load(f)
+
+
+def test_chunks_are_stable():
+    chunks = list(iter_job_chunks(FIXTURES_DIR, CHUNK_SIZE))
+    assert len(chunks) >= 3
+    assert chunks == list(iter_job_chunks(FIXTURES_DIR, CHUNK_SIZE))
+    rows = [row for chunk in chunks for row in chunk]
+    assert len({job_id(row["job_link"]) for row in rows}) == len(rows)
+
+
+def test_interrupted_load_resumes_after_the_last_chunk(chroma_path, fake_encoder, encoded_chunks, tmp_path):
+    clean = ingest(FIXTURES_DIR, str(tmp_path / "clean"), chunk_size=CHUNK_SIZE, workers=0)
+    encoded_chunks["chunks"].clear()
+
+    encoded_chunks["fail_at"] = 1
+    with pytest.raises(Interrupted):
+        ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0)
+    checkpoint = read_checkpoint(chroma_path)
+    assert checkpoint["chunks_done"] == 1 and not checkpoint["completed"]
+    assert encoded_chunks["chunks"] == [0]
+
+    encoded_chunks["fail_at"] = None
+    resumed = ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0)
+    assert encoded_chunks["chunks"] == ALL_CHUNKS  # chunk 0 was not redone
+    assert resumed["rows"] == clean["rows"]
+    assert resumed["collection_count"] == clean["collection_count"]
+    assert resumed["near_duplicate_clusters"] == clean["near_duplicate_clusters"]
+    assert read_checkpoint(chroma_path)["completed"]
+
+
+def test_changed_options_start_over(chroma_path, fake_encoder, encoded_chunks):
+    encoded_chunks["fail_at"] = 1
+    with pytest.raises(Interrupted):
+        ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0)
+    encoded_chunks["fail_at"] = None
+    encoded_chunks["chunks"].clear()
+    ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0, levels=["Mid senior"])
+    assert encoded_chunks["chunks"] == ALL_CHUNKS
+
+
+def test_restart_ignores_a_completed_checkpoint(chroma_path, fake_encoder, encoded_chunks):
+    first = ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0)
+    encoded_chunks["chunks"].clear()
+    again = ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0, restart=True)
+    assert encoded_chunks["chunks"] == ALL_CHUNKS
+    # Stable ids: the rebuild upserts the same documents
+    assert again["collection_count"] == first["collection_count"]
+
+
+def test_starting_over_drops_postings_the_new_load_does_not_write(chroma_path, fake_encoder):
+    import resources
+    from flat_store import load_flat_index
+
+    full = ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0, flat_store="float32")
+    smaller = ingest(FIXTURES_DIR, chroma_path, chunk_size=CHUNK_SIZE, workers=0, flat_store="float32",
+                     levels=["Mid senior"])
+    assert 0 < smaller["rows"] < full["rows"]
+    assert smaller["collection_count"] == smaller["rows"]
+    collection = resources.get_jobs_collection()
+    assert collection.count() == load_flat_index(chroma_path).count() == smaller["rows"]
+    levels = {metadata["job_level"] for metadata in collection.get(include=["metadatas"])["metadatas"]}
+    assert levels == {"Mid senior"}
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue, QueueFullError
+
+
+def wait_for(queue, job_id, status, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job.status == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {queue.get(job_id).status}, not {status}")
+
+
+@pytest.fixture
+def gate():
+    """Jobs block on the event until the test releases them."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def blocked(event, progress):
+    progress("first")
+    event.wait(5)
+    progress("second")
+    return "result"
+
+
+def test_job_reports_stages_and_result(gate):
+    queue = JobQueue(max_workers=1)
+    job_id = queue.submit(blocked, gate, label="one", stages=["first", "second"])
+    wait_for(queue, job_id, RUNNING)
+    deadline = time.time() + 5
+    while queue.get(job_id).progress < 0.5 and time.time() < deadline:
+        time.sleep(0.01)
+    job = queue.get(job_id)
+    assert job.progress == 0.5 and job.current_stage == "second"
+    gate.set()
+    job = wait_for(queue, job_id, DONE)
+    assert job.result == "result" and job.progress == 1.0 and job.finished
+    queue.shutdown()
+
+
+def test_failed_job_keeps_the_traceback():
+    def fail(progress):
+        raise ValueError("bad resume")
+
+    queue = JobQueue(max_workers=1)
+    job = wait_for(queue, queue.submit(fail), FAILED)
+    assert "ValueError: bad resume" in job.error
+    queue.shutdown()
+
+
+def test_queue_positions(gate):
+    queue = JobQueue(max_workers=1, max_pending=4)
+    running = queue.submit(blocked, gate)
+    waiting = [queue.submit(blocked, gate) for _ in range(2)]
+    wait_for(queue, running, RUNNING)
+    assert queue.get(running).queue_position is None
+    assert [queue.get(job_id).queue_position for job_id in waiting] == [1, 2]
+    assert all(queue.get(job_id).status == QUEUED for job_id in waiting)
+    gate.set()
+    wait_for(queue, waiting[-1], DONE)
+    assert queue.get(waiting[-1]).queue_position is None
+    queue.shutdown()
+
+
+def test_full_queue_rejects_new_jobs(gate):
+    queue = JobQueue(max_workers=1, max_pending=2)
+    first = queue.submit(blocked, gate)
+    queue.submit(blocked, gate)
+    with pytest.raises(QueueFullError):
+        queue.submit(blocked, gate)
+    gate.set()
+    wait_for(queue, first, DONE)
+    # A finished job frees its slot
+    queue.submit(blocked, gate)
+    queue.shutdown()
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    queue = JobQueue(max_workers=1, retention_seconds=0)
+    job_id = queue.submit(lambda progress: None)
+    wait_for(queue, job_id, DONE)
+    queue.submit(lambda progress: None)
+    assert queue.get(job_id) is None
+    queue.shutdown()
+
+
+def test_get_returns_a_snapshot():
+    queue = JobQueue(max_workers=1)
+    job_id = queue.submit(lambda progress: progress("only"), stages=["only"])
+    job = wait_for(queue, job_id, DONE)
+    job.completed_stages.append("tampered")
+    assert queue.get(job_id).completed_stages == ["only"]
+    assert queue.get("unknown") is None
+    queue.shutdown()
@@ -0,0 +1,128 @@
+import math
+
+import pytest
+
+from lexical_index import (LexicalIndexBuilder, index_dir, load_lexical_index, reciprocal_rank_fusion,
+                           tokenize, BM25_B, BM25_K1)
+
+DOCS = {
+    "d1": "Senior Python developer, Django and PostgreSQL",
+    "d2": "Data scientist: Python, pandas, machine learning",
+    "d3": "Registered nurse for the night shift",
+    "d4": "C++ engineer for embedded systems; C# a plus",
+    "d5": "Python data engineer with Spark and SQL, Python tooling",
+}
+
+
+def reference_bm25(query: str, docs: dict) -> dict:
+    tokenized = {doc_id: tokenize(text) for doc_id, text in docs.items()}
+    avgdl = sum(map(len, tokenized.values())) / len(tokenized)
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(term in tokens for tokens in tokenized.values())
+        idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+        for doc_id, tokens in tokenized.items():
+            tf = tokens.count(term)
+            if tf:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return scores
+
+
+COUNTRIES = {"d1": "Canada", "d2": "United States", "d3": "Canada", "d4": "United States", "d5": "Canada"}
+
+
+def build(chroma_path, chunks):
+    builder = LexicalIndexBuilder(index_dir(chroma_path))
+    for index, doc_ids in enumerate(chunks):
+        builder.add_chunk(index, doc_ids, [DOCS[doc_id] for doc_id in doc_ids],
+                          [{"search_country": COUNTRIES[doc_id]} for doc_id in doc_ids])
+    builder.finish()
+    return load_lexical_index(chroma_path)
+
+
+def test_tokenize_keeps_skill_spellings():
+    assert tokenize("C++ and C# for the Web") == ["c++", "c#", "web"]
+
+
+def test_missing_index(tmp_path):
+    assert load_lexical_index(str(tmp_path)) is None
+
+
+# Terms in over half the documents are skipped at query time, so the queries avoid "python"
+@pytest.mark.parametrize("query", ["data engineer spark", "nurse night", "c++ c#", "pandas machine learning sql"])
+def test_search_matches_reference_bm25(tmp_path, query):
+    index = build(str(tmp_path), [["d1", "d2"], ["d3"], ["d4", "d5"]])
+    expected = reference_bm25(query, DOCS)
+    found = dict(index.search(query, top_n=10))
+    assert found.keys() == expected.keys()
+    for doc_id, score in expected.items():
+        assert found[doc_id] == pytest.approx(score, rel=1e-5)
+    ranked = [doc_id for doc_id, _ in index.search(query, top_n=10)]
+    assert ranked == sorted(ranked, key=lambda doc_id: -expected[doc_id])
+
+
+@pytest.mark.parametrize("where, expected", [
+    ({"search_country": "Canada"}, ["d5", "d1"]),
+    ({"search_country": {"$in": ["United States"]}}, ["d2", "d4"]),
+    ({"$and": [{"search_country": "Canada"}, {"job_level": "Associate"}]}, []),
+    ({"$or": [{"search_country": "Nowhere"}, {"search_country": "United States"}]}, ["d2", "d4"]),
+])
+def test_search_applies_the_facet_filter(tmp_path, where, expected):
+    index = build(str(tmp_path), [["d1", "d2", "d3"], ["d4", "d5"]])
+    assert [doc_id for doc_id, _ in index.search("python data engineer django pandas", where=where)] == expected
+
+
+def test_filter_is_applied_before_top_n(tmp_path):
+    index = build(str(tmp_path), [list(DOCS)])
+    query = "python data engineer django pandas"
+    assert index.search(query, top_n=1)[0][0] == "d2"
+    # The best in-filter document, not the best overall dropped afterwards
+    assert [doc_id for doc_id, _ in index.search(query, top_n=1, where={"search_country": "Canada"})] == ["d5"]
+
+
+def test_conditions_on_fields_without_codes_are_not_applied(tmp_path):
+    index = build(str(tmp_path), [list(DOCS)])
+    assert len(index.search("nurse django", where={"company": "Contoso"})) == 2
+
+
+def test_search_top_n(tmp_path):
+    index = build(str(tmp_path), [list(DOCS)])
+    assert len(index.search("python data", top_n=2)) == 2
+
+
+def test_common_terms_are_skipped(tmp_path):
+    index = build(str(tmp_path), [list(DOCS)])
+    # "python" is in 3 of 5 documents, over max_df_ratio=0.5
+    assert len(index.term_ids("python", max_df_ratio=0.5)) == 0
+    assert len(index.term_ids("python", max_df_ratio=1.0)) == 1
+
+
+def test_redone_chunk_replaces_its_spill(tmp_path):
+    path = index_dir(str(tmp_path))
+    builder = LexicalIndexBuilder(path)
+    builder.add_chunk(0, ["d1"], [DOCS["d1"]])
+    builder.add_chunk(1, ["d2"], [DOCS["d2"]])
+    # Resumed after an interruption that lost chunk 1's checkpoint: it is written again
+    builder = LexicalIndexBuilder(path, resume=True)
+    builder.add_chunk(1, ["d2"], [DOCS["d2"]])
+    builder.finish()
+    assert len(load_lexical_index(str(tmp_path))) == 2
+
+
+def test_rebuild_replaces_the_live_index(tmp_path):
+    build(str(tmp_path), [["d1", "d2"]])
+    index = build(str(tmp_path), [["d3", "d4"]])
+    assert len(index) == 2
+    assert [doc_id for doc_id, _ in index.search("nurse django")] == ["d3"]
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b"]
+    assert dict(fused)["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert dict(fused)["b"] == pytest.approx(1 / 62)
+
+
+def test_reciprocal_rank_fusion_of_nothing():
+    assert reciprocal_rank_fusion([[], []]) == []
@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+from disk_cache import DiskCache
+from llm_backends import CachedLLM, StubLLM
+from schemas import EnhancedResume
+
+RESUME_TEXT = "Jane Doe, Data Engineer in Toronto, Canada. Senior. Skills: Python, Spark, SQL, Airflow."
+MESSAGES = [{"role": "system", "content": "You summarize resumes."}, {"role": "user", "content": RESUME_TEXT}]
+SUMMARIZE = SimpleNamespace(name="summarize_text_task")
+DRAFT = SimpleNamespace(name="resume_drafting_task")
+
+
+class CountingStub(StubLLM):
+    """StubLLM that counts its calls and, like crewAI's LLM, returns `response_model` instances."""
+
+    calls: int = 0
+
+    def call(self, messages, *args, response_model=None, **kwargs):
+        self.calls += 1
+        response = super().call(messages, *args, response_model=response_model, **kwargs)
+        return response_model.model_validate_json(response) if response_model is not None else response
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(str(tmp_path / "llm_responses.sqlite"))
+
+
+def test_identical_calls_reach_the_model_once(cache):
+    inner = CountingStub()
+    llm = CachedLLM(inner, cache=cache)
+    first = llm.call(MESSAGES, from_task=SUMMARIZE)
+    # Whitespace differences normalize to the same key
+    second = llm.call([{**m, "content": m["content"] + "  "} for m in MESSAGES], from_task=SUMMARIZE)
+    assert first == second and inner.calls == 1
+    assert cache.stats()["hits"] == 1
+
+    llm.call(MESSAGES + [{"role": "user", "content": "Shorter, please."}], from_task=SUMMARIZE)
+    assert inner.calls == 2
+
+
+def test_calls_bypass_the_cache_when_disabled_or_with_functions(cache):
+    inner = CountingStub()
+    CachedLLM(inner, cache=cache, use_cache=False).call(MESSAGES, from_task=SUMMARIZE)
+    CachedLLM(inner, cache=cache, use_cache=False).call(MESSAGES, from_task=SUMMARIZE)
+    assert inner.calls == 2 and cache.stats()["entries"] == 0
+
+    llm = CachedLLM(inner, cache=cache)
+    llm.call(MESSAGES, from_task=SUMMARIZE, available_functions={"search": print})
+    llm.call(MESSAGES, from_task=SUMMARIZE, available_functions={"search": print})
+    assert inner.calls == 4 and cache.stats()["entries"] == 0
+
+
+def test_structured_responses_come_back_from_the_cache_as_the_model(cache):
+    inner = CountingStub()
+    llm = CachedLLM(inner, cache=cache)
+    fresh = llm.call(MESSAGES, from_task=DRAFT, response_model=EnhancedResume)
+    cached = llm.call(MESSAGES, from_task=DRAFT, response_model=EnhancedResume)
+    assert isinstance(fresh, EnhancedResume) and isinstance(cached, EnhancedResume)
+    assert cached == fresh and cached.markdown.startswith("#")
+    assert inner.calls == 1
+
+    # The plain-text call has a different key: it doesn't get the JSON of the structured one
+    assert not llm.call(MESSAGES, from_task=DRAFT).startswith("{")
+    assert inner.calls == 2
+
+
+def test_cached_responses_that_no_longer_validate_are_misses():
+    assert CachedLLM._decode('{"markdown": "# Jane"}', EnhancedResume) == EnhancedResume(markdown="# Jane")
+    assert CachedLLM._decode('{"other": 1}', EnhancedResume) is None
+    assert CachedLLM._decode("text", None) == "text"
+    assert CachedLLM._decode(None, EnhancedResume) is None
+
+
+@pytest.mark.parametrize("task", [SUMMARIZE, DRAFT, SimpleNamespace(name="unknown_task")])
+def test_stub_llm_is_deterministic(task):
+    responses = {StubLLM().call(MESSAGES, from_task=task) for _ in range(3)}
+    assert len(responses) == 1
+    response, = responses
+    assert response.startswith("Thought: I now know the final answer\nFinal Answer: ")
+
+
+def test_stub_llm_structured_output_is_the_model_json():
+    response = StubLLM().call(MESSAGES, from_task=DRAFT, response_model=EnhancedResume)
+    assert response == StubLLM().call(MESSAGES, from_task=DRAFT, response_model=EnhancedResume)
+    assert EnhancedResume.model_validate_json(response).markdown
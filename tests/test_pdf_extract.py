@@ -0,0 +1,104 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from PyPDF2 import PageObject
+
+import pdf_extract
+from pdf_extract import PDFTooLargeError, extract_text, iter_pages
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    from reportlab.pdfgen import canvas
+
+    path = str(tmp_path / "resume.pdf")
+    pdf = canvas.Canvas(path)
+    for number in range(1, 4):
+        pdf.drawString(72, 720, f"Page {number} text")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+@pytest.fixture
+def slow_second_page(monkeypatch):
+    extract = PageObject.extract_text
+
+    def slow(page, *args, **kwargs):
+        text = extract(page, *args, **kwargs)
+        if "Page 2" in text:
+            time.sleep(1)
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", slow)
+
+
+def test_iter_pages_streams_in_order(pdf_path):
+    pages = iter_pages(pdf_path, workers=1)
+    assert next(pages).strip() == "Page 1 text"
+    assert [page.strip() for page in pages] == ["Page 2 text", "Page 3 text"]
+
+
+def test_max_pages_and_max_chars(pdf_path):
+    assert len(list(iter_pages(pdf_path, max_pages=2, workers=1))) == 2
+    assert extract_text(pdf_path, max_chars=8, workers=1) == "Page 1 t"
+
+
+def test_size_limit(pdf_path):
+    with pytest.raises(PDFTooLargeError):
+        pdf_extract.check_pdf_size(pdf_path, max_bytes=10)
+
+
+def test_slow_pages_are_skipped_and_reported(pdf_path, slow_second_page):
+    skipped = []
+    started = time.perf_counter()
+    text = extract_text(pdf_path, workers=1, page_timeout=0.2, skipped=skipped)
+    assert time.perf_counter() - started < 0.9
+    assert skipped == [2]
+    assert "Page 1 text" in text and "Page 3 text" in text and "Page 2" not in text
+
+
+def slow_page_worker(marker_path: str):
+    """Pool initializer: page 2 takes a second and then writes `marker_path`."""
+    extract = PageObject.extract_text
+
+    def slow(page, *args, **kwargs):
+        text = extract(page, *args, **kwargs)
+        if "Page 2" in text:
+            time.sleep(1)
+            with open(marker_path, "w") as f:
+                f.write("page 2 finished")
+        return text
+
+    PageObject.extract_text = slow
+
+
+def test_slow_pages_are_interrupted_off_the_main_thread(pdf_path, tmp_path, monkeypatch):
+    # Worker threads can't use SIGALRM, so the document is read on the pool, where it applies
+    marker = tmp_path / "finished"
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=slow_page_worker, initargs=(str(marker),))
+    monkeypatch.setattr(pdf_extract, "_pool", pool)
+    outcome = {"skipped": []}
+
+    def run():
+        outcome["text"] = extract_text(pdf_path, workers=1, page_timeout=0.2, skipped=outcome["skipped"])
+        outcome["finished_at"] = time.perf_counter()
+
+    pool.submit(int).result()  # start the worker before timing
+    started = time.perf_counter()
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    try:
+        assert outcome["skipped"] == [2]
+        assert "Page 1 text" in outcome["text"] and "Page 3 text" in outcome["text"]
+        assert outcome["finished_at"] - started < 0.9
+        # The slow page was stopped, not left running next to the next page
+        time.sleep(1.2)
+        assert not marker.exists()
+    finally:
+        pool.shutdown()
@@ -0,0 +1,70 @@
+import io
+
+from PyPDF2 import PdfReader
+
+from pdf_render import markdown_to_flowables, render_pdf
+
+RESUME = """# Jane Doe
+
+## Experience
+
+Led the **data platform** team and *mentored* engineers.
+
+- Built pipelines
+    1. Spark jobs
+    2. Airflow DAGs
+- Cut costs by **30%**
+
+### Skills
+
+Python, *SQL*
+"""
+
+
+def page_lines(pdf_bytes: bytes) -> list:
+    page, = PdfReader(io.BytesIO(pdf_bytes)).pages
+    return [line for line in page.extract_text().splitlines() if line.strip()]
+
+
+def test_rendered_text_keeps_the_document_order():
+    lines = page_lines(render_pdf(RESUME, use_cache=False))
+    # The bullet glyphs extract as font-specific characters; the numbers come through as written
+    assert [line.lstrip("\x7f•–") for line in lines] == [
+        "Jane Doe",
+        "Experience",
+        "Led the data platform team and mentored engineers.",
+        "Built pipelines",
+        "1.Spark jobs",
+        "2.Airflow DAGs",
+        "Cut costs by 30%",
+        "Skills",
+        "Python, SQL",
+    ]
+
+
+def test_inline_markup_is_rendered_in_bold_and_italic_fonts():
+    page, = PdfReader(io.BytesIO(render_pdf(RESUME, use_cache=False))).pages
+    fonts = page["/Resources"]["/Font"]
+    assert {fonts[name].get_object()["/BaseFont"] for name in fonts} == {
+        "/Helvetica", "/Helvetica-Bold", "/Helvetica-Oblique"}
+
+
+def test_flowables_follow_the_structure():
+    paragraphs = [(p.style.name, p.bulletText, p.text) for p in markdown_to_flowables(RESUME)]
+    assert paragraphs == [
+        ("Heading1", None, "Jane Doe"),
+        ("Heading2", None, "Experience"),
+        ("Body", None, "Led the <b>data platform</b> team and <i>mentored</i> engineers."),
+        ("ListItem1", "•", "Built pipelines"),
+        ("ListItem2", "1.", "Spark jobs"),
+        ("ListItem2", "2.", "Airflow DAGs"),
+        ("ListItem1", "•", "Cut costs by <b>30%</b>"),
+        ("Heading3", None, "Skills"),
+        ("Body", None, "Python, <i>SQL</i>"),
+    ]
+
+
+def test_unclosed_inline_markup_is_closed_at_the_end_of_the_block():
+    paragraph, = markdown_to_flowables("<p>plain <b>bold <i>both</p>")
+    assert paragraph.text == "plain <b>bold <i>both</i></b>"
+    assert page_lines(render_pdf("<p>plain <b>bold <i>both</p>", use_cache=False)) == ["plain bold both"]
@@ -0,0 +1,69 @@
+import threading
+
+import resources
+from lexical_index import LexicalIndexBuilder, index_dir
+from resources import INDEX_VERSION_FILE, ResourceRegistry
+
+
+def test_loads_once_and_counts_hits():
+    registry = ResourceRegistry()
+    loads = []
+    registry.register("thing", lambda: loads.append(1) or object())
+    threads = [threading.Thread(target=registry.get, args=("thing",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.get("thing") is registry.get("thing")
+    assert len(loads) == 1
+    stats = registry.stats()["thing"]
+    assert stats["loads"] == 1 and stats["misses"] == 1 and stats["hits"] == 9
+
+
+def test_none_is_not_cached():
+    registry = ResourceRegistry()
+    available = []
+    registry.register("thing", lambda: available[0] if available else None)
+    assert registry.get("thing") is None
+    available.append("built")
+    assert registry.get("thing") == "built"
+
+
+def test_reloads_when_the_version_changes():
+    registry = ResourceRegistry()
+    version = ["v1"]
+    registry.register("thing", lambda: object(), version=lambda: version[0])
+    first = registry.get("thing")
+    assert registry.get("thing") is first
+    version[0] = "v2"
+    assert registry.get("thing") is not first
+    assert registry.stats()["thing"]["loads"] == 2
+
+
+def test_invalidate():
+    registry = ResourceRegistry()
+    registry.register("thing", lambda: object())
+    first = registry.get("thing")
+    registry.invalidate("thing")
+    assert registry.get("thing") is not first
+
+
+def test_lexical_index_built_after_startup_is_picked_up(tmp_path, monkeypatch):
+    chroma_path = str(tmp_path)
+    monkeypatch.setattr(resources, "CHROMA_PATH", chroma_path)
+    resources.registry.invalidate("lexical_index")
+
+    def build(doc_ids, version):
+        builder = LexicalIndexBuilder(index_dir(chroma_path))
+        builder.add_chunk(0, doc_ids, ["python developer"] * len(doc_ids))
+        builder.finish()
+        (tmp_path / INDEX_VERSION_FILE).write_text(version)
+
+    try:
+        assert resources.get_lexical_index() is None
+        build(["a"], "v1")
+        assert len(resources.get_lexical_index()) == 1
+        build(["a", "b"], "v2")
+        assert len(resources.get_lexical_index()) == 2
+    finally:
+        resources.registry.invalidate("lexical_index")
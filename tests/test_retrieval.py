@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+import batch_match
+from conftest import FIXTURES_DIR
+from ingest import ingest
+from retrieval import search_resumes
+
+CANADIAN_RESUME = json.dumps({"role": "Data Engineer", "skills": "Python, Spark, SQL",
+                              "last_location": "Toronto, Canada", "experience": "Senior"})
+UNKNOWN_PLACE_RESUME = json.dumps({"role": "Data Engineer", "skills": "Python, Spark, SQL",
+                                   "last_location": "Reykjavik, Iceland"})
+
+
+@pytest.fixture
+def job_index(chroma_path, fake_encoder):
+    ingest(FIXTURES_DIR, chroma_path, chunk_size=5, workers=0)
+    return chroma_path
+
+
+def test_filters_are_derived_from_the_resume(job_index):
+    match, = search_resumes([CANADIAN_RESUME], top_k=10)
+    assert match["filters"] == {"search_country": "Canada", "job_level": "Mid senior"}
+    assert not match["filter_fallback"]
+    assert match["jobs"]
+    assert {(job["search_country"], job["job_level"]) for job in match["jobs"]} == {("Canada", "Mid senior")}
+
+
+def test_filters_matching_nothing_fall_back_to_the_whole_index(job_index):
+    match, = search_resumes([CANADIAN_RESUME], top_k=3, filters=[{"search_country": "Nowhere"}])
+    assert match["filter_fallback"] and len(match["jobs"]) == 3
+
+
+def test_batch_search_equals_one_resume_at_a_time(job_index):
+    resumes = [CANADIAN_RESUME, UNKNOWN_PLACE_RESUME, "free text resume: nurse, patient care"]
+    together = search_resumes(resumes, top_k=3)
+    assert together == [search_resumes([resume], top_k=3)[0] for resume in resumes]
+    assert together[1]["filters"] == {} and together[2]["filters"] == {}
+
+
+def test_job_searcher_tool_and_batch_matcher_agree(job_index, monkeypatch):
+    from tools import JobSearcherTool
+
+    tool_jobs = json.loads(JobSearcherTool()._run(CANADIAN_RESUME, top_k=3))["jobs"]
+    monkeypatch.setattr(batch_match, "extract_texts", lambda paths: [(path, "resume text") for path in paths])
+    monkeypatch.setattr(batch_match, "summarize_resume", lambda text: CANADIAN_RESUME)
+    result, = batch_match.match_resumes(["resume.pdf"], top_k=3)
+    assert result["filters"] == {"search_country": "Canada", "job_level": "Mid senior"}
+    assert [job["job_link"] for job in result["jobs"]] == [job["job_link"] for job in tool_jobs]
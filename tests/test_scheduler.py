@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from crewai import Agent, Task
+
+from llm_backends import StubLLM
+from scheduler import run_dag, run_tasks_as_dag, task_dependencies
+
+
+def sleeper(name, seconds, log):
+    def stage(dep_outputs):
+        log.append(("start", name, sorted(dep_outputs)))
+        time.sleep(seconds)
+        log.append(("end", name))
+        return f"{name}({','.join(dep_outputs[dep] for dep in sorted(dep_outputs))})"
+    return stage
+
+
+def test_stages_run_after_their_dependencies():
+    log = []
+    result = run_dag({
+        "extract": (sleeper("extract", 0.05, log), []),
+        "search": (sleeper("search", 0.05, log), ["extract"]),
+        "analyze": (sleeper("analyze", 0.05, log), ["extract"]),
+        "draft": (sleeper("draft", 0.05, log), ["search", "analyze"]),
+    })
+    assert result.output == "draft(analyze(extract()),search(extract()))"
+    assert result.final_stage == "draft"
+    timings = {timing["stage"]: timing for timing in result.timings()}
+    for name, timing in timings.items():
+        for dep in timing["dependencies"]:
+            assert timings[dep]["ended_at"] <= timing["started_at"], (dep, name)
+    assert log[0] == ("start", "extract", []) and log[-1] == ("end", "draft")
+    assert ("start", "draft", ["analyze", "search"]) in log
+
+
+def test_independent_stages_overlap():
+    log = []
+    result = run_dag({name: (sleeper(name, 0.3, log), []) for name in ("a", "b", "c")})
+    timings = result.timings()
+    assert max(t["started_at"] for t in timings) < min(t["ended_at"] for t in timings)
+    assert result.duration < 0.6
+
+
+def test_max_parallel_limits_concurrency():
+    log = []
+    result = run_dag({name: (sleeper(name, 0.1, log), []) for name in ("a", "b", "c")}, max_parallel=1)
+    spans = sorted((t["started_at"], t["ended_at"]) for t in result.timings())
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+
+
+def test_failing_stage_stops_its_dependents():
+    log = []
+    ran_after = threading.Event()
+
+    def fail(dep_outputs):
+        raise RuntimeError("stage broke")
+
+    with pytest.raises(RuntimeError, match="stage broke"):
+        run_dag({
+            "extract": (sleeper("extract", 0.01, log), []),
+            "search": (fail, ["extract"]),
+            "draft": (lambda dep_outputs: ran_after.set(), ["search"]),
+        })
+    assert not ran_after.is_set()
+    assert [entry[1] for entry in log] == ["extract", "extract"]
+
+
+@pytest.mark.parametrize("stages, message", [
+    ({"a": (None, ["missing"])}, "unknown stage"),
+    ({"a": (None, ["b"]), "b": (None, ["a"]), "c": (None, [])}, "cycle"),
+])
+def test_invalid_graphs_are_rejected(stages, message):
+    with pytest.raises(ValueError, match=message):
+        run_dag(stages)
+
+
+def make_tasks(latency_ms=0.0):
+    def agent():
+        return Agent(role="Tester", goal="Answer", backstory="Answers test tasks.",
+                     llm=StubLLM(latency_ms=latency_ms), allow_delegation=False)
+
+    first = Task(name="first", description="First.", expected_output="Text.", agent=agent())
+    second = Task(name="second", description="Second.", expected_output="Text.", agent=agent(), context=[])
+    last = Task(name="last", description="Last about {topic}.", expected_output="Text.", agent=agent())
+    return [first, second, last]
+
+
+def test_task_dependencies_follow_context():
+    first, second, last = make_tasks()
+    # No context: depends on everything declared before it; an explicit (empty) context is kept
+    assert task_dependencies([first, second, last]) == {"first": [], "second": [], "last": ["first", "second"]}
+
+
+def test_run_tasks_as_dag_with_stub_llm():
+    tasks = make_tasks(latency_ms=200)
+    result = run_tasks_as_dag(tasks, inputs={"topic": "jobs"})
+    assert set(result.outputs) == {"first", "second", "last"}
+    assert result.output is result.outputs["last"] and result.output.raw
+    assert "Last about jobs." in tasks[-1].description
+    timings = {timing["stage"]: timing for timing in result.timings()}
+    assert timings["first"]["started_at"] < timings["second"]["ended_at"]
+    assert timings["second"]["started_at"] < timings["first"]["ended_at"]
+    assert timings["last"]["started_at"] >= max(timings["first"]["ended_at"], timings["second"]["ended_at"])
+
+
+def test_run_tasks_as_dag_needs_unique_names():
+    first, second, _ = make_tasks()
+    second.name = "first"
+    with pytest.raises(ValueError, match="unique name"):
+        run_tasks_as_dag([first, second])
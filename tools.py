@@ -1,9 +1,9 @@
 from crewai.tools import BaseTool
-from PyPDF2 import PdfReader
-import chromadb
-import json
-from sentence_transformers import SentenceTransformer
-import pandas as pd
+from retrieval import search_resumes
+from pdf_extract import PDFTooLargeError, extract_text
+from execution import cpu_stage
+from schemas import JobSearchResults
+from tracing import record_result_size, span
 
 
 class PDFReaderTool(BaseTool):
@@ -11,11 +11,20 @@ class PDFReaderTool(BaseTool):
     description: str = "Reads the content of a PDF file and returns the text."
 
     def _run(self, pdf_path: str) -> str:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        return text
+        with span("tool.pdf_reader") as current:
+            # Streaming, size-limited extraction; long documents use a process pool (see pdf_extract.py)
+            skipped = []
+            try:
+                with cpu_stage("pdf_extract"):
+                    text = extract_text(pdf_path, skipped=skipped)
+            except PDFTooLargeError as e:
+                current.set("rejected", str(e))
+                return f"The PDF could not be read: {e}"
+            if skipped:
+                current.set("skipped_pages", skipped)
+                text += f"\n\n(Pages {', '.join(map(str, skipped))} could not be read and were skipped.)"
+            record_result_size(current, "pdf_reader", text)
+            return text
 
 
 pdf_reader_tool = PDFReaderTool()
@@ -23,49 +32,27 @@ pdf_reader_tool = PDFReaderTool()
 
 class JobSearcherTool(BaseTool):
     name: str = "Job Searcher"
-    description: str = "Searches for job listings based on resume details."
-
-    def _run(self, resume_details: str, top_k: int = 5):
-        # Embedding model
-        sent_transform = SentenceTransformer("all-MiniLM-L6-v2")
-
-        # Init Chroma client (persistent storage)
-        client = chromadb.PersistentClient(path="./chroma_db")
-
-        # Create or get collection
-        collection = client.get_or_create_collection(
-            name="jobs",
-            metadata={"hnsw:space": "cosine"}  # use cosine similarity
-        )
-
-        try:
-            resume_dict = json.loads(resume_details)
-        except (TypeError, json.JSONDecodeError):
-            resume_dict = resume_details if isinstance(resume_details, dict) else {"text": str(resume_details)}
-
-        # Convert dict to text for embedding
-        resume_text = " ".join([f"{k}: {v}" for k, v in resume_dict.items() if v])
-
-        embedding = sent_transform.encode([resume_text])[0]
-
-        results = collection.query(
-            query_embeddings=[embedding.tolist()],
-            n_results=top_k,
-            # where=filters  # will be None by default
-        )
-
-        jobs = []
-        for i in range(len(results["ids"][0])):
-            jobs.append({
-                "similarity_score": results["distances"][0][i],
-                **results["metadatas"][0][i]
-            })
-        result = pd.DataFrame(jobs)
-        result.sort_values(by="similarity_score", ascending=False, inplace=True)
-
-        json_string = result.to_json(orient="records", indent=4)
-
-        return json_string
-
-
-job_searcher_tool = JobSearcherTool()
+    description: str = (
+        "Searches for job listings based on resume details. Optional `filters` "
+        "({field: value}) restrict results by search_country, job_level, job_type or search_city."
+    )
+
+    def _run(self, resume_details: str, top_k: int = 5, filters: dict = None):
+        with span("tool.job_searcher", top_k=top_k) as current:
+            # Shared with the batch matcher; without explicit filters they are derived
+            # from the summarized last_location/experience (see facets.py)
+            match = search_resumes([resume_details], top_k=top_k, filters=[filters])[0]
+            jobs = match["jobs"]
+            current.set("filters", match["filters"])
+            if match["filter_fallback"]:
+                current.set("filter_fallback", True)
+            current.set("jobs", len(jobs))
+
+            json_string = JobSearchResults(jobs=jobs).model_dump_json(exclude_none=True)
+            record_result_size(current, "job_searcher", json_string)
+
+            return json_string
+
+
+# The tool's JSON is the task's answer as-is; the agent doesn't re-serialize the listings
+job_searcher_tool = JobSearcherTool(result_as_answer=True)
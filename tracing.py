@@ -0,0 +1,343 @@
+"""
+Lightweight tracing and metrics for the analysis pipeline.
+
+`span(name, **attributes)` times a block (or, via `traced(name)`, a function).
+Spans opened inside another span become its children, also across the DAG
+scheduler's worker threads, because the parent travels in a context variable.
+
+Two outputs:
+
+- Traces: a fraction TRACE_SAMPLE_RATE of root spans (e.g. one analysis) is
+  sampled, and every span of a sampled trace is appended to TRACE_FILE as one
+  JSON line when the root span ends. With sampling off (the default) a span
+  costs two clock reads, a context variable update and a histogram update.
+- Metrics: span durations and errors, LLM tokens and cache hits are always
+  aggregated in-process and rendered in the Prometheus text format by
+  `render_metrics()`. They are written to METRICS_FILE after every root span
+  and served on http://METRICS_HOST:METRICS_PORT/metrics by `start_metrics_server()`.
+"""
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(os.getenv("CACHE_DIR", "./.cache"), "traces.jsonl"))
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Loopback by default; set 0.0.0.0 to let a scraper on another host reach it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PREFIX = "job_analysis_"
+
+# Histogram buckets (seconds): cache hits and tool calls up to multi-minute analyses
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+METRIC_HELP = {
+    "span_duration_seconds": ("histogram", "Duration of instrumented operations."),
+    "span_errors_total": ("counter", "Instrumented operations that raised."),
+    "llm_tokens_total": ("counter", "LLM tokens used, by type."),
+    "llm_rate_limited_total": ("counter", "LLM calls that failed with a rate limit (retried with backoff, see execution.py)."),
+    "cache_requests_total": ("counter", "Cache lookups, by cache and result."),
+    "result_bytes_total": ("counter", "Size of the results returned by tools and the crew."),
+    "llm_retries_total": ("counter", "Throttled LLM calls retried after a backoff (see execution.py)."),
+    "stage_wait_seconds": ("histogram", "Time spent waiting for the LLM rate limiter or a CPU stage slot."),
+    "pdf_pages_skipped_total": ("counter", "PDF pages skipped because their text took too long to extract."),
+}
+
+_current_span = contextvars.ContextVar("tracing_current_span", default=None)
+
+
+class Span:
+    """A timed operation in a sampled trace. `set`/`add` record attributes."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_time", "duration_ms", "attributes",
+                 "status", "error")
+    sampled = True
+
+    def __init__(self, name: str, trace, parent_id, attributes: dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration_ms = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+
+    def set(self, key: str, value):
+        self.attributes[key] = value
+
+    def add(self, key: str, value=1):
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "name": self.name, "start_time": self.start_time, "duration_ms": self.duration_ms,
+            "status": self.status, "error": self.error, "attributes": self.attributes,
+        }
+
+
+class _UnsampledSpan:
+    """Stands in for spans of unsampled traces; attributes are dropped."""
+
+    __slots__ = ()
+    sampled = False
+
+    def set(self, key: str, value):
+        pass
+
+    def add(self, key: str, value=1):
+        pass
+
+
+_UNSAMPLED = _UnsampledSpan()
+
+
+class _Trace:
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self.lock = threading.Lock()
+
+
+class span:
+    """
+    Context manager timing one operation as a span.
+
+    Args:
+        name (str): Operation name, e.g. "tool.job_searcher"; also the `span` label of its metrics.
+        **attributes: Initial span attributes (JSON-serializable).
+
+    Yields the span; call `.set(key, value)` or `.add(key, n)` on it to attach
+    results such as sizes or cache hits (no-ops when the trace isn't sampled).
+    """
+
+    __slots__ = ("name", "attributes", "_span", "_root", "_token", "_started")
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self._root = parent is None
+        if parent is None:
+            sampled = TRACE_SAMPLE_RATE > 0 and (TRACE_SAMPLE_RATE >= 1 or random.random() < TRACE_SAMPLE_RATE)
+            self._span = Span(self.name, _Trace(), None, self.attributes) if sampled else _UNSAMPLED
+        elif parent.sampled:
+            self._span = Span(self.name, parent.trace, parent.span_id, self.attributes)
+        else:
+            self._span = _UNSAMPLED
+        # Unsampled spans are pushed too, so their children aren't sampled as roots of their own
+        self._token = _current_span.set(self._span)
+        self._started = time.perf_counter()
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        observe("span_duration_seconds", elapsed, span=self.name)
+        if exc_type is not None:
+            inc("span_errors_total", span=self.name, error=exc_type.__name__)
+
+        current = self._span
+        if current.sampled:
+            current.duration_ms = round(elapsed * 1000, 3)
+            if exc_type is not None:
+                current.status, current.error = "error", f"{exc_type.__name__}: {exc}"
+            with current.trace.lock:
+                current.trace.spans.append(current)
+        if self._root:
+            if current.sampled:
+                _export_trace(current.trace)
+            if METRICS_FILE:
+                write_metrics_file()
+        return False
+
+
+def traced(name: str = None, **attributes):
+    """Decorator form of `span`; the span name defaults to the function's qualified name."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """The innermost open span (a no-op span outside any sampled trace)."""
+    return _current_span.get() or _UNSAMPLED
+
+
+# --- Trace export ---------------------------------------------------------------
+
+_export_lock = threading.Lock()
+
+
+def _export_trace(trace: _Trace):
+    if not TRACE_FILE:
+        return
+    with trace.lock:
+        spans = sorted(trace.spans, key=lambda s: s.start_time)
+    lines = "".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans)
+    with _export_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+        with open(TRACE_FILE, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+# --- Metrics --------------------------------------------------------------------
+
+_metrics_lock = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Adds `value` to the counter `name` with the given labels."""
+    key = (name, _labels(labels))
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    """Records `value` in the histogram `name` (DURATION_BUCKETS) with the given labels."""
+    key = (name, _labels(labels))
+    with _metrics_lock:
+        buckets = _histograms.get(key)
+        if buckets is None:
+            buckets = _histograms[key] = [0] * (len(DURATION_BUCKETS) + 2)
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                buckets[i] += 1
+                break
+        else:
+            buckets[len(DURATION_BUCKETS)] += 1
+        buckets[-1] += value
+
+
+def record_cache(cache: str, hit: bool):
+    inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def record_result_size(current, source: str, text):
+    """Sets the span's `result_chars` and adds the UTF-8 size of `text` to result_bytes_total."""
+    text = text if isinstance(text, str) else str(text)
+    current.set("result_chars", len(text))
+    inc("result_bytes_total", len(text.encode("utf-8")), source=source)
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _format_labels(labels, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _metrics_lock:
+        counters = dict(_counters)
+        histograms = {key: list(buckets) for key, buckets in _histograms.items()}
+
+    lines, described = [], set()
+
+    def _describe(name, kind):
+        if name not in described:
+            described.add(name)
+            help_text = METRIC_HELP.get(name, (kind, name))[1]
+            lines.append(f"# HELP {METRICS_PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {METRICS_PREFIX}{name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        _describe(name, "counter")
+        lines.append(f"{METRICS_PREFIX}{name}{_format_labels(labels)} {_format_number(value)}")
+
+    for (name, labels), buckets in sorted(histograms.items()):
+        _describe(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS + ("+Inf",), buckets[:-1]):
+            cumulative += count
+            lines.append(f"{METRICS_PREFIX}{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"{METRICS_PREFIX}{name}_sum{_format_labels(labels)} {_format_number(buckets[-1])}")
+        lines.append(f"{METRICS_PREFIX}{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path: str = None):
+    """Atomically replaces `path` (default METRICS_FILE) with the current metrics."""
+    path = path or METRICS_FILE
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # keep scrapes out of the app's console
+        pass
+
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = None, host: str = None):
+    """
+    Serves `render_metrics()` at /metrics from a daemon thread (once per process).
+
+    Args:
+        port (int): Port to listen on; defaults to METRICS_PORT. Nothing is started when it's 0.
+        host (str): Address to bind; defaults to METRICS_HOST.
+
+    Returns:
+        The running ThreadingHTTPServer, or None.
+    """
+    global _metrics_server
+    port = METRICS_PORT if port is None else port
+    host = METRICS_HOST if host is None else host
+    with _metrics_server_lock:
+        if _metrics_server is None and port:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _metrics_server